@@ -0,0 +1,347 @@
+"""Containing asyncio adapters for unpacking NMEA sentences and frames as received
+from network gateways, i.e. NMEA0183 over UDP port 10110 or TCP streams. Lines
+are unpacked in the event loop, yielding to other tasks between small batches,
+and handed over through a bounded queue.
+"""
+import asyncio
+from contextlib import suppress
+from typing import Any, AsyncIterable, AsyncIterator, List, Optional, Tuple, Type
+
+from marulc.parser_bases import RawParserBase
+from marulc.exceptions import FilteredMessageError, MultiPacketError, ParseError
+
+# Lines unpacked before yielding to other tasks
+DEFAULT_BATCH_SIZE = 64
+
+# Longer lines are garbage, NMEA0183 sentences are at most 82 characters
+MAX_LINE_LENGTH = 4096
+
+_CLOSED = object()
+
+
+async def parse_from_async_iterator(
+    parser: Type[RawParserBase],
+    source: AsyncIterable[str],
+    quiet: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> AsyncIterator[dict]:
+    """Asynchronous version of parse_from_iterator, for use with ``async for``
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc import NMEA0183Parser
+        from marulc.aio import parse_from_async_iterator, read_lines
+
+        async def print_messages(reader):
+            parser = NMEA0183Parser()
+            async for msg in parse_from_async_iterator(parser, read_lines(reader)):
+                print(msg)
+
+    Args:
+        parser (Type[RawParserBase]): Parser conforming to the RawParser interface.
+        source (AsyncIterable[str]): Asynchronous iterable source which yields
+            NMEA 0183 sentences or NMEA2000 frames
+        quiet (bool, optional): Whether exceptions encountered should be raised or
+            silenced. Defaults to False.
+        batch_size (int, optional): Number of lines unpacked before yielding to
+            other tasks, in case the source has many lines readily available.
+            Defaults to DEFAULT_BATCH_SIZE.
+
+    Yields:
+        AsyncIterator[dict]: The next, complete, unpacked message as a python
+            dictionary.
+    """
+    count = 0
+    async for sentence in source:
+        count += 1
+        if count % batch_size == 0:
+            await asyncio.sleep(0)
+
+        try:
+            yield parser.unpack(sentence)
+        except (MultiPacketError, FilteredMessageError):
+            # Never do anything about MultiPacketErrors or filtered messages
+            pass
+        except ParseError:
+            if not quiet:
+                raise
+
+
+def _decode(line: bytes) -> str:
+    return line.rstrip(b"\r").decode("ascii", errors="replace")
+
+
+class LineBuffer:
+    """Frames a stream of bytes into lines, keeping incomplete lines until the
+    rest arrives. Overlong lines are discarded."""
+
+    def __init__(self, max_length: int = MAX_LINE_LENGTH) -> None:
+        """
+        Args:
+            max_length (int, optional): Maximum length of a line, in bytes.
+                Defaults to MAX_LINE_LENGTH.
+        """
+        self._max_length = max_length
+        self._partial = b""
+        self.discarded = 0
+
+    def feed(self, data: bytes) -> List[str]:
+        """Feed received bytes
+
+        Args:
+            data (bytes): Received bytes
+
+        Returns:
+            List[str]: Complete, non-empty lines, without line endings
+        """
+        *lines, self._partial = (self._partial + data).split(b"\n")
+        if len(self._partial) > self._max_length:
+            self._partial = b""
+            self.discarded += 1
+
+        output = []
+        for line in lines:
+            if len(line) > self._max_length:
+                self.discarded += 1
+            elif line.strip():
+                output.append(_decode(line))
+        return output
+
+    def flush(self) -> List[str]:
+        """Flush the incomplete line, i.e. at the end of the stream
+
+        Returns:
+            List[str]: The incomplete line, if not empty
+        """
+        partial, self._partial = self._partial, b""
+        return [_decode(partial)] if partial.strip() else []
+
+
+async def read_lines(
+    reader: asyncio.StreamReader, chunk_size: int = 65536
+) -> AsyncIterator[str]:
+    """Read lines from a StreamReader, i.e. a TCP connection opened using
+    asyncio.open_connection, in chunks rather than line by line
+
+    Args:
+        reader (asyncio.StreamReader): Stream to read from
+        chunk_size (int, optional): Maximum number of bytes read at a time.
+            Defaults to 65536.
+
+    Yields:
+        AsyncIterator[str]: Lines, without line endings, until the end of the
+            stream
+    """
+    buffer = LineBuffer()
+    while chunk := await reader.read(chunk_size):
+        for line in buffer.feed(chunk):
+            yield line
+
+    for line in buffer.flush():
+        yield line
+
+
+def read_messages(
+    reader: asyncio.StreamReader,
+    parser: Type[RawParserBase],
+    quiet: bool = False,
+) -> AsyncIterator[dict]:
+    """Unpack the lines of a StreamReader, as they arrive. Nothing is read from
+    the stream while the consumer is busy, which in the case of TCP pushes back on
+    the sender.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        import asyncio
+        from marulc import NMEA0183Parser
+        from marulc.aio import read_messages
+
+        async def main():
+            reader, _ = await asyncio.open_connection("192.168.4.1", 1456)
+            async for msg in read_messages(reader, NMEA0183Parser(), quiet=True):
+                print(msg)
+
+    Args:
+        reader (asyncio.StreamReader): Stream to read from
+        parser (Type[RawParserBase]): Parser conforming to the RawParser interface.
+        quiet (bool, optional): Whether exceptions encountered should be raised or
+            silenced. Defaults to False.
+
+    Returns:
+        AsyncIterator[dict]: Unpacked messages, until the end of the stream
+    """
+    return parse_from_async_iterator(parser, read_lines(reader), quiet)
+
+
+class MessageQueue:
+    """Bounded queue of unpacked messages, handing messages from a producer, such
+    as a protocol or a stream, to a consumer iterating over the queue using
+    ``async for``. Iteration ends once the queue is closed and drained. Exceptions
+    put in the queue are raised to the consumer.
+
+    Producers awaiting put are held back while the queue is full. Producers that
+    cannot wait, such as datagram protocols, use put_nowait, which drops messages
+    while the queue is full.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        import asyncio
+        from marulc import NMEA0183Parser
+        from marulc.aio import MessageQueue, read_messages
+
+        async def main():
+            reader, _ = await asyncio.open_connection("192.168.4.1", 1456)
+            messages = MessageQueue(maxsize=1024)
+            asyncio.create_task(
+                messages.feed(read_messages(reader, NMEA0183Parser(), quiet=True))
+            )
+            async for msg in messages:
+                print(msg)
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        """
+        Args:
+            maxsize (int, optional): Maximum number of queued messages.
+                Defaults to 1024.
+        """
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._closed = False
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def closed(self) -> bool:
+        """Whether the queue has been closed"""
+        return self._closed
+
+    async def put(self, msg: Any) -> None:
+        """Put a message, or an exception, waiting while the queue is full
+
+        Args:
+            msg (Any): Unpacked message or exception
+        """
+        if not self._closed:
+            await self._queue.put(msg)
+
+    def put_nowait(self, msg: Any) -> bool:
+        """Put a message, or an exception, dropping it if the queue is full
+
+        Args:
+            msg (Any): Unpacked message or exception
+
+        Returns:
+            bool: Whether the message was queued
+        """
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait(msg)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    async def feed(self, source: AsyncIterable[dict]) -> None:
+        """Put all messages of an asynchronous iterable, i.e. read_messages, and
+        close the queue once exhausted. Exceptions raised by the source are put in
+        the queue as well.
+
+        Args:
+            source (AsyncIterable[dict]): Unpacked messages
+        """
+        try:
+            async for msg in source:
+                await self.put(msg)
+        except Exception as exc:  # pylint: disable=broad-except
+            await self.put(exc)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Close the queue, messages already queued can still be consumed"""
+        self._closed = True
+        with suppress(asyncio.QueueFull):
+            # If full, the consumer will find the queue closed once drained
+            self._queue.put_nowait(_CLOSED)
+
+    def __aiter__(self) -> "MessageQueue":
+        return self
+
+    async def __anext__(self) -> dict:
+        if self._closed and self._queue.empty():
+            raise StopAsyncIteration
+
+        msg = await self._queue.get()
+        if msg is _CLOSED:
+            raise StopAsyncIteration
+        if isinstance(msg, Exception):
+            raise msg
+        return msg
+
+
+class NMEADatagramProtocol(asyncio.DatagramProtocol):
+    """Datagram protocol unpacking the lines of each datagram as it is received,
+    i.e. NMEA0183 broadcast over UDP port 10110, into a MessageQueue. Messages
+    are dropped, and counted in ``messages.dropped``, while the queue is full.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        import asyncio
+        from marulc import NMEA0183Parser
+        from marulc.aio import NMEADatagramProtocol
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            transport, protocol = await loop.create_datagram_endpoint(
+                lambda: NMEADatagramProtocol(NMEA0183Parser(), quiet=True),
+                local_addr=("0.0.0.0", 10110),
+            )
+            async for msg in protocol.messages:
+                print(msg)
+    """
+
+    def __init__(
+        self,
+        parser: Type[RawParserBase],
+        maxsize: int = 1024,
+        quiet: bool = False,
+    ) -> None:
+        """
+        Args:
+            parser (Type[RawParserBase]): Parser conforming to the RawParser
+                interface.
+            maxsize (int, optional): Maximum number of queued messages.
+                Defaults to 1024.
+            quiet (bool, optional): Whether exceptions encountered should be
+                raised to the consumer or silenced. Defaults to False.
+        """
+        super().__init__()
+        self._parser = parser
+        self._quiet = quiet
+        self.messages = MessageQueue(maxsize)
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        for line in data.split(b"\n"):
+            if not line.strip():
+                continue
+            try:
+                self.messages.put_nowait(self._parser.unpack(_decode(line)))
+            except (MultiPacketError, FilteredMessageError):
+                pass
+            except ParseError as exc:
+                if not self._quiet:
+                    self.messages.put_nowait(exc)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.messages.close()
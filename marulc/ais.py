@@ -0,0 +1,323 @@
+"""Containing functionality for decoding AIS messages encapsulated in !AIVDM and
+!AIVDO sentences, including the reassembly of multi-fragment messages. The 6-bit
+armored payload is converted into a single integer through a precomputed
+translation table, from which the fields are extracted by decode functions
+generated once per message type.
+"""
+from pathlib import Path
+from typing import Callable, Dict, List, MutableMapping, Optional, Tuple
+
+from marulc.can import FastPacketBucket
+from marulc.database import LazyDatabase, load_database
+from marulc.exceptions import (
+    ParseError,
+    MultiPacketDiscardedError,
+    MultiPacketInProcessError,
+)
+
+# Message type definitions, read from file on first use
+DB_PATH = Path(__file__).parent / "ais_message_types.json"
+AIS_MESSAGE_TYPES: MutableMapping[str, dict] = LazyDatabase(
+    lambda: load_database(DB_PATH)
+)
+
+# Sentence formatters encapsulating AIS messages, received from other vessels and
+# from own vessel
+AIS_SENTENCE_FORMATTERS = frozenset(("VDM", "VDO"))
+
+# Shortest payload that can be decoded, message type, repeat indicator and MMSI
+MIN_BITS = 38
+
+# Payload character mapped to its 6-bit value as a string of "0" and "1"
+_ARMOR = str.maketrans(
+    {
+        chr(char): format(char - 48 if char < 88 else char - 56, "06b")
+        for char in (*range(48, 88), *range(96, 120))
+    }
+)
+
+# Message types reporting the positions of vessels
+AIS_POSITION_REPORTS = (1, 2, 3, 18, 19, 27)
+
+# 6-bit ASCII of text fields, "@" is used for padding
+SIXBIT_ASCII = "@ABCDEFGHIJKLMNOPQRSTUVWXYZ[\\]^_ !\"#$%&'()*+,-./0123456789:;<=>?"
+
+DecodeFunction = Callable[[int, int], dict]
+
+_DECODE_FUNCTIONS: Dict[str, DecodeFunction] = {}
+
+# Decode functions of replaced message types are generated again
+AIS_MESSAGE_TYPES.observe(lambda key: _DECODE_FUNCTIONS.pop(key, None))
+
+
+def armored_to_bits(payload: str, fill_bits: int = 0) -> Tuple[int, int]:
+    """Convert a 6-bit armored payload into its bits
+
+    Args:
+        payload (str): Armored payload, i.e. "15M67FC000G?ufbE`FepT@3n00Sa"
+        fill_bits (int, optional): Number of bits added to pad the payload to a
+            multiple of 6 bits. Defaults to 0.
+
+    Raises:
+        ParseError: If the payload contains characters outside of the armoring or
+            the number of fill bits is out of range
+
+    Returns:
+        Tuple[int, int]: The bits as an integer, most significant bit first, and
+            the number of bits
+    """
+    bits = payload.translate(_ARMOR)
+    # Characters outside of the armoring are left as is, a single character each
+    if not payload or len(bits) != 6 * len(payload) or not 0 <= fill_bits <= 5:
+        raise ParseError("Malformed AIS payload", payload)
+
+    return int(bits, 2) >> fill_bits, len(bits) - fill_bits
+
+
+def decode_text(raw: int, length: int) -> str:
+    """Decode a 6-bit ASCII text field, without trailing padding and spaces
+
+    Args:
+        raw (int): Bits of the field
+        length (int): Number of bits in field
+
+    Returns:
+        str: Text
+    """
+    chars = length // 6
+    return "".join(
+        SIXBIT_ASCII[(raw >> 6 * (chars - 1 - index)) & 0x3F] for index in range(chars)
+    ).rstrip("@ ")
+
+
+def generate_decode_function(key: str, definition: dict) -> DecodeFunction:
+    """Generate a specialised, straight-line decode function for a message type.
+
+    The generated function aligns the bits to the length of the definition and
+    extracts every field with a shift and a mask, building the output dictionary
+    in one pass. Payloads shorter than the definition, as sent by some
+    transponders, are padded with zero bits and longer payloads are truncated.
+
+    Args:
+        key (str): Key of the definition, i.e. "1" or "24A"
+        definition (dict): Message type definition
+
+    Returns:
+        DecodeFunction: Callable taking the bits and the number of bits, see
+            armored_to_bits, and returning the fields
+    """
+    total_bits = definition["Length"]
+
+    items = []
+    for field in definition["Fields"]:
+        length = field["BitLength"]
+        offset = total_bits - field["BitOffset"] - length
+        expr = f"(raw >> {offset})" if offset else "raw"
+        expr = f"({expr} & {(1 << length) - 1:#x})"
+
+        if field["Type"] == "int":
+            sign_bit = 1 << (length - 1)
+            expr = f"(({expr} ^ {sign_bit:#x}) - {sign_bit:#x})"
+        elif field["Type"] == "bool":
+            expr = f"bool({expr})"
+        elif field["Type"] == "text":
+            expr = f"text({expr}, {length})"
+
+        if "Divisor" in field:
+            expr = f"{expr} / {field['Divisor']!r}"
+
+        items.append(f"        {field['Id']!r}: {expr},")
+
+    source = "\n".join(
+        [
+            f"def decode_ais_{key}(raw, nbits):",
+            f"    if nbits < {total_bits}:",
+            f"        raw <<= {total_bits} - nbits",
+            "    else:",
+            f"        raw >>= nbits - {total_bits}",
+            "    return {",
+            *items,
+            "    }",
+        ]
+    )
+
+    namespace = {"text": decode_text}
+    exec(source, namespace)  # pylint: disable=exec-used
+    return namespace[f"decode_ais_{key}"]
+
+
+def get_decode_function(key: str) -> DecodeFunction:
+    """Returns the generated decode function for a message type, generating it on
+    first use
+
+    Args:
+        key (str): Key of the definition, i.e. "1" or "24A"
+
+    Returns:
+        DecodeFunction: Decode function
+    """
+    try:
+        return _DECODE_FUNCTIONS[key]
+    except KeyError:
+        function = _DECODE_FUNCTIONS[key] = generate_decode_function(
+            key, AIS_MESSAGE_TYPES[key]
+        )
+        return function
+
+
+def definition_key(raw: int, nbits: int) -> str:
+    """Key of the definition of a message, the message type except for the two
+    parts of type 24, "24A" and "24B"
+
+    Args:
+        raw (int): Bits of the message
+        nbits (int): Number of bits
+
+    Returns:
+        str: Key of the definition
+    """
+    message_type = raw >> (nbits - 6)
+    if message_type == 24 and nbits >= 40:
+        return "24B" if (raw >> (nbits - 40)) & 0x3 else "24A"
+    return str(message_type)
+
+
+def decode_payload(payload: str, fill_bits: int = 0) -> dict:
+    """Decode a complete, armored AIS payload
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc.ais import decode_payload
+
+        msg = decode_payload("15M67FC000G?ufbE`FepT@3n00Sa")
+        print(msg["Fields"]["lat"], msg["Fields"]["lon"])
+
+    Args:
+        payload (str): Armored payload, joined if spread over several fragments
+        fill_bits (int, optional): Number of fill bits. Defaults to 0.
+
+    Raises:
+        ParseError: If the payload is malformed or there is no definition for its
+            message type
+
+    Returns:
+        dict: Message type and fields
+    """
+    raw, nbits = armored_to_bits(payload, fill_bits)
+    if nbits < MIN_BITS:
+        raise ParseError("AIS payload too short", payload)
+
+    key = definition_key(raw, nbits)
+    if key not in AIS_MESSAGE_TYPES:
+        raise ParseError("Could not find a definition for this AIS message", payload)
+
+    return {
+        "MessageType": raw >> (nbits - 6),
+        "Fields": get_decode_function(key)(raw, nbits),
+    }
+
+
+def process_fragment(
+    sentence_type: str,
+    data: List[str],
+    bucket: MutableMapping,
+    timestamp: Optional[float] = None,
+) -> Tuple[str, int]:
+    """Process a single fragment of a multi-fragment AIS message. Fragments of the
+    same message share the sequential message id and the channel, and must arrive
+    in order.
+
+    Args:
+        sentence_type (str): Sentence type, i.e. "AIVDM,"
+        data (List[str]): Data elements of the sentence, fragment count, fragment
+            number, sequential message id, channel, payload and fill bits
+        bucket (MutableMapping): Reference to temporary storage for partly
+            assembled messages, typically a FastPacketBucket
+        timestamp (Optional[float], optional): Timestamp of this fragment, used for
+            expiring stale messages in a FastPacketBucket. Defaults to None,
+            meaning that the clock of the bucket is used.
+
+    Raises:
+        ParseError: If the data elements are malformed
+        MultiPacketDiscardedError: If this fragment is discarded due to missing
+            fragments
+        MultiPacketInProcessError: If this fragment has been processed successfully
+            but more fragments are required to complete the message
+
+    Returns:
+        Tuple[str, int]: Complete payload and its fill bits
+    """
+    try:
+        count, number = int(data[0]), int(data[1])
+        payload, fill_bits = data[4], int(data[5] or 0)
+    except (ValueError, IndexError):
+        raise ParseError("Malformed AIS sentence", data) from None
+
+    if count == 1:
+        return payload, fill_bits
+
+    sequence_id = (sentence_type, data[2], data[3])
+
+    if isinstance(bucket, FastPacketBucket):
+        bucket.expire(timestamp)
+
+    if number == 1:
+        # First fragment, starting over any incomplete message with the same id
+        parts = bucket[sequence_id] = [payload]
+    elif sequence_id not in bucket:
+        # Too late to the party
+        raise MultiPacketDiscardedError
+    else:
+        parts = bucket[sequence_id]
+        if len(parts) != number - 1:
+            # Dropped fragment
+            del bucket[sequence_id]
+            raise MultiPacketDiscardedError
+        parts.append(payload)
+
+    if number >= count:
+        del bucket[sequence_id]
+        return "".join(parts), fill_bits
+
+    raise MultiPacketInProcessError
+
+
+def unpack_ais_sentence(
+    sentence_type: str,
+    data: List[str],
+    bucket: Optional[MutableMapping] = None,
+    timestamp: Optional[float] = None,
+) -> dict:
+    """Unpack the AIS message of a !AIVDM or !AIVDO sentence, see
+    unpack_nmea0183_message
+
+    Args:
+        sentence_type (str): Sentence type, i.e. "AIVDM,"
+        data (List[str]): Data elements of the sentence
+        bucket (Optional[MutableMapping], optional): Temporary storage for partly
+            assembled messages, see process_fragment. Defaults to None, meaning
+            that multi-fragment messages cannot be assembled.
+        timestamp (Optional[float], optional): Timestamp of this sentence, see
+            process_fragment. Defaults to None.
+
+    Raises:
+        ParseError: If the sentence is malformed, is a fragment while there is no
+            bucket or there is no definition for its message type
+        MultiPacketDiscardedError: If this fragment is discarded
+        MultiPacketInProcessError: If more fragments are required
+
+    Returns:
+        dict: Unpacked message, with "Talker", "Formatter", "Channel",
+            "MessageType" and "Fields" keys
+    """
+    if bucket is None and data[0] != "1":
+        raise ParseError("Multi-fragment AIS sentences require a fragment bucket", data)
+
+    payload, fill_bits = process_fragment(sentence_type, data, bucket, timestamp)
+
+    output = decode_payload(payload, fill_bits)
+    output["Talker"] = sentence_type[:2]
+    output["Formatter"] = sentence_type[2:5]
+    output["Channel"] = data[3]
+    return output
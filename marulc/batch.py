@@ -0,0 +1,675 @@
+"""Containing functionality for batch decoding of NMEA2000 frames into columnar
+NumPy arrays, for batch encoding of columns into frames and for verifying the
+checksums of NMEA0183 sentences in bulk. Requires numpy to be installed
+(``pip install marulc[numpy]``).
+"""
+import math
+from binascii import unhexlify
+from collections import defaultdict
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from marulc.nmea2000 import (
+    FastPacketBucket,
+    PacketDecoder,
+    get_complete_packet_decoder,
+    process_sub_packet,
+)
+from marulc.encoder import (
+    DEFAULT_PRIORITY,
+    FAST_PACKET_MAX_LENGTH,
+    FieldEncoder,
+    PacketEncoder,
+    get_packet_encoder,
+    pack_value,
+)
+from marulc.utils import calculate_checksum
+from marulc.ais import (
+    AIS_MESSAGE_TYPES,
+    AIS_POSITION_REPORTS,
+    AIS_SENTENCE_FORMATTERS,
+    SIXBIT_ASCII,
+    process_fragment,
+)
+from marulc.exceptions import MultiPacketError, ParseError
+
+Frame = Union[str, bytes]
+Columns = Dict[Hashable, dict]
+
+
+def split_frame(frame: Frame) -> Tuple[int, bytes]:
+    """Split a frame into its CAN id and payload
+
+    Args:
+        frame (Frame): Either a hex line as accepted by NMEA2000Parser.unpack or
+            raw bytes consisting of the 4-byte, big-endian CAN id followed by the
+            payload.
+
+    Returns:
+        Tuple[int, bytes]: (CAN id, payload)
+    """
+    if isinstance(frame, str):
+        header, *data = frame.split()
+        return int(header, 16), unhexlify("".join(data))
+
+    return int.from_bytes(frame[:4], "big"), bytes(frame[4:])
+
+
+def decode_field_column(
+    matrix: np.ndarray, position: int, length: int, signed: bool
+) -> np.ndarray:
+    """Extract a single bit field from every row of a payload matrix
+
+    Args:
+        matrix (np.ndarray): Payloads as a (rows, bytes) uint8 matrix
+        position (int): Bit position of the field in the payload, counted from the
+            least significant bit of the payload read as a little-endian integer
+        length (int): Number of bits in field
+        signed (bool): Whether the field is a two's complement signed integer
+
+    Returns:
+        np.ndarray: uint64/int64 column for fields fitting in 64 bits, otherwise an
+            object column holding python ints
+    """
+    if not length:
+        return np.zeros(len(matrix), dtype=np.uint64)
+
+    first, bit = divmod(position, 8)
+
+    if bit + length > 64:
+        # Too wide for vectorized extraction, fall back to python ints
+        mask = (1 << length) - 1
+        column = np.empty(len(matrix), dtype=object)
+        for row, payload in enumerate(matrix):
+            value = (int.from_bytes(payload.tobytes(), "little") >> position) & mask
+            if signed and value >> (length - 1):
+                value -= 1 << length
+            column[row] = value
+        return column
+
+    last = (position + length - 1) // 8
+    column = np.zeros(len(matrix), dtype=np.uint64)
+    for shift, index in enumerate(range(first, last + 1)):
+        column |= matrix[:, index].astype(np.uint64) << np.uint64(8 * shift)
+
+    column >>= np.uint64(bit)
+    if length < 64:
+        column &= np.uint64((1 << length) - 1)
+
+    if not signed:
+        return column
+
+    if length == 64:
+        return column.view(np.int64)
+
+    sign_bit = np.uint64(1 << (length - 1))
+    return (column ^ sign_bit).astype(np.int64) - np.int64(1 << (length - 1))
+
+
+def decode_payload_matrix(
+    decoder: PacketDecoder, matrix: np.ndarray, sentinels: bool = False
+) -> dict:
+    """Decode all fields of a matrix of complete payloads for a single PGN
+
+    Args:
+        decoder (PacketDecoder): Pre-compiled decoder for the PGN
+        matrix (np.ndarray): Payloads as a (rows, decoder.length) uint8 matrix
+        sentinels (bool, optional): Whether to mask "data not available"
+            sentinel values of fields as NaN, turning their columns into floats.
+            Defaults to False.
+
+    Returns:
+        dict: Field ids mapped to columns, scaled according to "Resolution"
+    """
+    # Align fields exactly as the scalar decoders do, see compile_packet_decoder
+    shift = matrix.shape[1] * 8 - decoder.total_bits if decoder.variants == 1 else 0
+
+    fields = {}
+    for field_id, offset, length, signed, scale, sentinel in zip(
+        decoder.field_ids,
+        decoder.bit_offsets,
+        decoder.bit_lengths,
+        decoder.signed,
+        decoder.scales,
+        decoder.sentinels,
+    ):
+        column = decode_field_column(matrix, offset + shift, length, signed)
+
+        mask = None
+        if sentinels and sentinel < 1 << length:
+            mask = column >= sentinel
+
+        # Mirror the scalar decoders, an int scale of 1 leaves the values untouched
+        if not (isinstance(scale, int) and scale == 1):
+            column = column * scale
+
+        if mask is not None:
+            column = column.astype(np.float64)
+            column[mask] = np.nan
+
+        fields[field_id] = column
+
+    return fields
+
+
+def unpack_frames_to_columns(  # pylint: disable=too-many-locals
+    frames: Iterable[Frame], sentinels: bool = False
+) -> Columns:
+    """Unpack a batch of NMEA2000 frames into columnar NumPy arrays, one set of
+    columns per PGN. Frames are grouped by PGN based on the header and each group
+    is decoded at once with vectorized bit extraction. Multi-packet (fast-type)
+    messages are reassembled in input order before decoding.
+
+    Frames with a PGN we cant decode, frames that do not have the expected
+    payload length and incomplete multi-packet sequences are skipped.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc.batch import unpack_frames_to_columns
+
+        columns = unpack_frames_to_columns(open("candump.txt"))
+        rpm = columns[127488]["Fields"]["speed"]  # numpy array
+
+    Args:
+        frames (Iterable[Frame]): Hex lines or raw bytes, see split_frame
+        sentinels (bool, optional): Whether to mask "data not available"
+            sentinel values as NaN, see decode_payload_matrix. Defaults to False.
+
+    Returns:
+        Columns: PGN number mapped to a dictionary with the same layout as an
+            unpacked message, i.e. "Priority", "SourceAddress", "PGN" and
+            "Fields" keys, but with numpy arrays as values. Proprietary PGNs with
+            several definitions are keyed by (PGN number, definition id).
+    """
+    can_ids: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    payloads: Dict[Tuple[int, int], List[bytes]] = defaultdict(list)
+    decoders: Dict[Tuple[int, int], PacketDecoder] = {}
+    # Logs are processed much faster than real-time, never expire on wall clock time
+    bucket = FastPacketBucket(timeout=None)
+
+    for frame in frames:
+        can_id, payload = split_frame(frame)
+        pgn = (can_id >> 8) & 0x3FFFF
+
+        decoder = get_complete_packet_decoder(pgn)
+        if decoder is None:
+            continue
+
+        if decoder.packet_type == "Fast":
+            try:
+                payload = process_sub_packet(pgn, can_id & 0xFF, payload, bucket)
+            except (MultiPacketError, ParseError):
+                continue
+
+        if decoder.variants > 1:
+            # Resolve which of the definitions sharing this PGN that applies
+            decoder = get_complete_packet_decoder(pgn, payload)
+            if decoder is None:
+                continue
+
+            # Definitions sharing a PGN number differ in length, trust the sender
+            payload = payload[: decoder.length]
+
+        if len(payload) != decoder.length:
+            continue
+
+        decoders[decoder.pgn, decoder.variant] = decoder
+        can_ids[decoder.pgn, decoder.variant].append(can_id)
+        payloads[decoder.pgn, decoder.variant].append(bytes(payload))
+
+    output = {}
+    for key, group in payloads.items():
+        decoder = decoders[key]
+        matrix = np.frombuffer(b"".join(group), dtype=np.uint8).reshape(
+            len(group), decoder.length
+        )
+        ids = np.array(can_ids[key], dtype=np.uint32)
+
+        # Definitions sharing a PGN number are kept apart by their ids
+        output[decoder.pgn if decoder.variants == 1 else (decoder.pgn, decoder.id)] = {
+            "Fields": decode_payload_matrix(decoder, matrix, sentinels),
+            "Priority": ((ids >> 26) & 0x7).astype(np.uint8),
+            "SourceAddress": (ids & 0xFF).astype(np.uint8),
+            "PGN": ((ids >> 8) & 0x3FFFF).astype(np.uint32),
+        }
+
+    return output
+
+
+def _or_bits(matrix: np.ndarray, raw: np.ndarray, position: int, length: int) -> None:
+    """OR unsigned raw values of at most 64 bits into every row of a payload
+    matrix, at a bit position counted as in decode_field_column"""
+    first, bit = divmod(position, 8)
+
+    if bit + length > 64:
+        # Does not fit in 64 bits once shifted, split into two parts
+        low = 64 - bit
+        _or_bits(matrix, raw & np.uint64((1 << low) - 1), position, low)
+        _or_bits(matrix, raw >> np.uint64(low), position + low, length - low)
+        return
+
+    shifted = raw << np.uint64(bit)
+    for index in range((bit + length + 7) // 8):
+        matrix[:, first + index] |= (
+            (shifted >> np.uint64(8 * index)) & np.uint64(0xFF)
+        ).astype(np.uint8)
+
+
+def pack_field_column(pgn: int, field: FieldEncoder, column: Any) -> np.ndarray:
+    """Convert a column of field values into raw, unsigned values, the inverse of
+    decode_field_column
+
+    Args:
+        pgn (int): PGN number, for error messages
+        field (FieldEncoder): Pre-compiled field
+        column (Any): Array-like of physical values, NaN means "data not
+            available". Object columns are converted value by value, see
+            marulc.encoder.pack_value.
+
+    Raises:
+        ValueError: If a value can not be represented by the field
+
+    Returns:
+        np.ndarray: uint64 column for fields of at most 64 bits, otherwise an
+            object column holding python ints
+    """
+    values = np.asarray(column)
+
+    if values.dtype.kind not in "biuf" or field.length > 64:
+        raw = np.array(
+            [pack_value(pgn, field, value) for value in values.tolist()], dtype=object
+        )
+        return raw if field.length > 64 else raw.astype(np.uint64)
+
+    if field.signed:
+        low, high = -(1 << (field.length - 1)), (1 << (field.length - 1)) - 1
+    else:
+        low, high = 0, (1 << field.length) - 1
+
+    missing = None
+    if values.dtype.kind == "f":
+        missing = np.isnan(values)
+        values = np.rint(np.where(missing, 0, values) / field.scale)
+    elif not isinstance(field.scale, int):
+        values = np.rint(values / field.scale)
+
+    if values.size and (values.min() < low or values.max() > high):
+        raise ValueError(f"Values out of range for {field.id}, PGN {pgn}")
+
+    raw = values.astype(np.int64 if field.signed else np.uint64).astype(np.uint64)
+    if field.length < 64:
+        raw &= np.uint64((1 << field.length) - 1)
+
+    if missing is not None:
+        raw[missing] = field.default
+
+    return raw
+
+
+def pack_payload_matrix(
+    encoder: PacketEncoder, fields: Mapping[str, Any], rows: int
+) -> np.ndarray:
+    """Pack columns of field values into a matrix of complete payloads, the inverse
+    of decode_payload_matrix
+
+    Args:
+        encoder (PacketEncoder): Pre-compiled encoder for the PGN
+        fields (Mapping[str, Any]): Field ids mapped to array-likes of values,
+            missing fields are "data not available"
+        rows (int): Number of payloads
+
+    Returns:
+        np.ndarray: Payloads as a (rows, encoder.length) uint8 matrix
+    """
+    fill = np.frombuffer(encoder.fill.to_bytes(encoder.length, "little"), np.uint8)
+    matrix = np.tile(fill, (rows, 1))
+
+    for field in encoder.fields:
+        if not field.length:
+            continue
+
+        if field.id in fields:
+            raw = pack_field_column(encoder.pgn, field, fields[field.id])
+        else:
+            raw = np.full(rows, field.default, dtype=object)
+
+        if field.length > 64:
+            for row, value in enumerate(raw.tolist()):
+                value = (value << field.position).to_bytes(encoder.length, "little")
+                matrix[row] |= np.frombuffer(value, np.uint8)
+        else:
+            _or_bits(matrix, raw.astype(np.uint64), field.position, field.length)
+
+    return matrix
+
+
+def pack_columns(  # pylint: disable=too-many-locals
+    pgn: int,
+    fields: Mapping[str, Any],
+    source_address: Any = 0,
+    priority: Any = DEFAULT_PRIORITY,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack columns of field values into CAN frames in bulk, the inverse of
+    unpack_frames_to_columns. Fast packets are split into frames with a sequence
+    counter per source address, starting at 0.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        import numpy as np
+        from marulc.batch import pack_columns
+
+        can_ids, frames = pack_columns(
+            127488, {"instance": np.zeros(1000), "speed": np.linspace(0, 3000, 1000)}
+        )
+
+    Args:
+        pgn (int): PGN number
+        fields (Mapping[str, Any]): Field ids mapped to array-likes of values, with
+            the same layout as the "Fields" of unpack_frames_to_columns. For PGN
+            numbers with several definitions, all rows must match the definition
+            matched by the first row.
+        source_address (Any, optional): Source address, either for all messages
+            or as an array-like. Defaults to 0.
+        priority (Any, optional): Priority, either for all messages or as an
+            array-like. Defaults to 6.
+
+    Raises:
+        PGNError: If we dont know how to pack a message with this PGN number
+        ValueError: If a value can not be represented by its field
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: uint32 CAN ids and a matching matrix of
+            uint8 frame payloads, one row per frame
+    """
+    rows = len(next(iter(fields.values())))
+    first = {key: np.asarray(column)[0].item() for key, column in fields.items()}
+    encoder = get_packet_encoder(
+        pgn,
+        {
+            # NaN means "data not available", as None does for a single message
+            key: None if isinstance(value, float) and math.isnan(value) else value
+            for key, value in first.items()
+        },
+    )
+    payloads = pack_payload_matrix(encoder, fields, rows)
+
+    source_address = np.broadcast_to(np.asarray(source_address, np.uint32), rows)
+    priority = np.broadcast_to(np.asarray(priority, np.uint32), rows)
+    can_ids = (priority & 0x7) << 26 | np.uint32(pgn << 8) | source_address & 0xFF
+
+    if encoder.packet_type != "Fast":
+        return can_ids, payloads
+
+    if encoder.length > FAST_PACKET_MAX_LENGTH:
+        raise ValueError(f"{encoder.length} bytes is too long for a fast packet")
+
+    # Sequence counter of each message, counted per source address
+    sequences = np.zeros(rows, dtype=np.uint8)
+    for address in np.unique(source_address):
+        (indexes,) = np.nonzero(source_address == address)
+        sequences[indexes] = np.arange(len(indexes)) % 8
+
+    # 6 payload bytes in the first frame and 7 in the rest, padded with 0xFF
+    count = 1 + max(0, -(-(encoder.length - 6) // 7))
+    padded = np.full((rows, 6 + 7 * (count - 1)), 0xFF, dtype=np.uint8)
+    padded[:, : encoder.length] = payloads
+
+    frames = np.empty((rows, count, 8), dtype=np.uint8)
+    frames[:, :, 0] = (sequences << 5)[:, None] | np.arange(count, dtype=np.uint8)
+    frames[:, 0, 1] = encoder.length
+    frames[:, 0, 2:] = padded[:, :6]
+    frames[:, 1:, 1:] = padded[:, 6:].reshape(rows, count - 1, 7)
+
+    return np.repeat(can_ids, count), frames.reshape(rows * count, 8)
+
+
+# Value of each ASCII hex digit, 0xFF for anything else
+_HEX_VALUES = np.full(256, 0xFF, dtype=np.uint8)
+for _digit in "0123456789abcdefABCDEF":
+    _HEX_VALUES[ord(_digit)] = int(_digit, 16)
+
+
+def _first_in_lines(
+    positions: np.ndarray, starts: np.ndarray, ends: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """First of the sorted positions at or after each start, and whether it is
+    before the corresponding end"""
+    index = np.searchsorted(positions, starts)
+    first = np.append(positions, ends[-1] if len(ends) else 0)[index]
+    return first, first < ends
+
+
+def verify_checksums(  # pylint: disable=too-many-locals
+    buffer: Union[bytes, bytearray, memoryview]
+) -> np.ndarray:
+    """Verify the checksums of a buffer of newline separated NMEA0183 sentences in
+    one go, XOR:ing the whole buffer as a cumulative array rather than sentence by
+    sentence. Sentences that passed can then be unpacked without verifying their
+    checksums again, see NMEA0183Parser(verify_checksums=False).
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc import NMEA0183Parser, parse_from_iterator
+        from marulc.batch import verify_checksums
+
+        buffer = open("nmea_log.txt", "rb").read()
+        lines = [
+            line.decode()
+            for line, valid in zip(buffer.split(b"\\n"), verify_checksums(buffer))
+            if valid
+        ]
+
+        parser = NMEA0183Parser(verify_checksums=False)
+        messages = list(parse_from_iterator(parser, lines, quiet=True))
+
+    Args:
+        buffer (Union[bytes, bytearray, memoryview]): Sentences separated by "\\n",
+            optionally "\\r\\n"
+
+    Returns:
+        np.ndarray: Whether each line, as split by bytes.split(b"\\n") but without
+            the empty line following a final newline, has a valid checksum.
+            Lines without a checksum are valid, lines with a malformed one are not.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    size = len(data)
+    if not size:
+        return np.zeros(0, dtype=bool)
+
+    newlines = np.flatnonzero(data == ord("\n"))
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.append(newlines, size)
+    if starts[-1] == size:
+        starts, ends = starts[:-1], ends[:-1]
+
+    # The checksum covers everything between the first "$" or "!" (or the start
+    # of the line) and the first "*" following it
+    dollars, has_dollar = _first_in_lines(
+        np.flatnonzero((data == ord("$")) | (data == ord("!"))), starts, ends
+    )
+    first = np.where(has_dollar, dollars + 1, starts)
+    stars, has_checksum = _first_in_lines(np.flatnonzero(data == ord("*")), first, ends)
+
+    # XOR of data[first:star] from the cumulative XOR of the buffer
+    cumulative = np.concatenate(([0], np.bitwise_xor.accumulate(data)))
+    calculated = cumulative[stars] ^ cumulative[first]
+
+    # The two hex digits following "*", out of bounds digits count as malformed
+    padded = np.append(data, np.zeros(2, dtype=np.uint8))
+    high = _HEX_VALUES[padded[stars + 1]]
+    low = _HEX_VALUES[padded[stars + 2]]
+    well_formed = (high != 0xFF) & (low != 0xFF) & (stars + 2 < ends)
+    received = (high << 4) | low
+
+    return ~has_checksum | (well_formed & (calculated == received))
+
+
+# 6-bit value of each AIS payload character, 0xFF for anything else
+_ARMOR_VALUES = np.full(256, 0xFF, dtype=np.uint8)
+for _char in (*range(48, 88), *range(96, 120)):
+    _ARMOR_VALUES[_char] = _char - 48 if _char < 88 else _char - 56
+
+_SEXTETS = {
+    chr(char): int(value) for char, value in enumerate(_ARMOR_VALUES) if value != 0xFF
+}
+
+_SIXBIT_CHARS = np.array(list(SIXBIT_ASCII))
+
+
+def decode_ais_matrix(definition: dict, sextets: np.ndarray) -> Dict[str, np.ndarray]:
+    """Decode the fields of a batch of AIS payloads of the same message type
+
+    Args:
+        definition (dict): Message type definition, see marulc.ais
+        sextets (np.ndarray): 6-bit values of the payloads as a (rows, characters)
+            uint8 matrix, padded with zeros to the length of the definition
+
+    Returns:
+        Dict[str, np.ndarray]: Field ids mapped to columns, uint64 or int64 for
+            integer fields, float64 for scaled fields, bool for flags and object
+            columns of str for text fields
+    """
+    rows, width = sextets.shape
+    bits = np.unpackbits(sextets[:, :, np.newaxis], axis=2)[:, :, 2:].reshape(
+        rows, 6 * width
+    )
+
+    fields = {}
+    for field in definition["Fields"]:
+        offset, length = field["BitOffset"], field["BitLength"]
+        field_bits = bits[:, offset : offset + length]
+
+        if field["Type"] == "text":
+            chars = _SIXBIT_CHARS[
+                field_bits.reshape(rows, length // 6, 6)
+                @ np.array([32, 16, 8, 4, 2, 1])
+            ]
+            fields[field["Id"]] = np.array(
+                ["".join(row).rstrip("@ ") for row in chars], dtype=object
+            )
+            continue
+
+        weights = np.uint64(1) << np.arange(length - 1, -1, -1, dtype=np.uint64)
+        column = field_bits.astype(np.uint64) @ weights
+
+        if field["Type"] == "bool":
+            column = column.astype(bool)
+        elif field["Type"] == "int":
+            column = column.astype(np.int64) - (
+                (column >> np.uint64(length - 1)).astype(np.int64) << length
+            )
+
+        if "Divisor" in field:
+            column = column / field["Divisor"]
+
+        fields[field["Id"]] = column
+
+    return fields
+
+
+def unpack_ais_to_columns(  # pylint: disable=too-many-locals
+    sentences: Iterable[str],
+    message_types: Optional[Iterable[int]] = AIS_POSITION_REPORTS,
+    *,
+    verify_checksum: bool = True,
+) -> Columns:
+    """Unpack a batch of !AIVDM and !AIVDO sentences into columnar NumPy arrays,
+    one set of columns per message type. The payloads are grouped by message type
+    and each group is converted from the 6-bit armoring and decoded at once.
+    Multi-fragment messages are assembled in input order before decoding.
+
+    Sentences of other kinds, with a mismatching checksum, malformed payloads and
+    incomplete multi-fragment messages are skipped.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc.batch import unpack_ais_to_columns
+
+        columns = unpack_ais_to_columns(open("ais_log.txt"))
+        latitudes = columns[1]["Fields"]["lat"]  # numpy array
+
+    Args:
+        sentences (Iterable[str]): NMEA0183 sentences
+        message_types (Optional[Iterable[int]], optional): Message types to
+            unpack. Defaults to AIS_POSITION_REPORTS, None means all message types
+            with a definition.
+        verify_checksum (bool, optional): Whether to verify the checksums of the
+            sentences, see unpack_nmea0183_message. Defaults to True.
+
+    Returns:
+        Columns: Message type mapped to a dictionary with the same layout as an
+            unpacked message, i.e. "MessageType" and "Fields" keys, but with numpy
+            arrays as values. The two parts of message type 24 are keyed by
+            (24, part number).
+    """
+    wanted = None if message_types is None else set(message_types)
+    known = set(AIS_MESSAGE_TYPES)
+    payloads: Dict[str, List[str]] = defaultdict(list)
+    # Logs are processed much faster than real-time, never expire on wall clock time
+    bucket = FastPacketBucket(timeout=None)
+
+    for sentence in sentences:
+        line = sentence.strip()
+        if line[3:6] not in AIS_SENTENCE_FORMATTERS or line[:1] not in ("!", "$"):
+            continue
+
+        body, _, checksum = line[1:].partition("*")
+        try:
+            if (
+                checksum
+                and verify_checksum
+                and int(checksum, 16) != calculate_checksum(body)
+            ):
+                continue
+            payload, _ = process_fragment(body[:6], body.split(",")[1:], bucket)
+        except (ValueError, MultiPacketError):
+            # ParseErrors as well as malformed checksums
+            continue
+
+        message_type = _SEXTETS.get(payload[:1])
+        if message_type is None or (wanted is not None and message_type not in wanted):
+            continue
+
+        key = str(message_type)
+        if message_type == 24:
+            key += "B" if (_SEXTETS.get(payload[6:7], 0) >> 2) & 0x3 else "A"
+
+        if key in known:
+            payloads[key].append(payload)
+
+    output = {}
+    for key, group in payloads.items():
+        definition = AIS_MESSAGE_TYPES[key]
+        width = -(-definition["Length"] // 6)
+
+        # Shorter payloads are padded with zeros ("0"), longer ones are truncated
+        raw = "".join(payload[:width].ljust(width, "0") for payload in group)
+        codes = np.frombuffer(raw.encode("utf-32-le"), dtype=np.uint32)
+        sextets = _ARMOR_VALUES[np.minimum(codes, 0xFF)].reshape(len(group), width)
+
+        # Drop payloads with characters outside of the armoring
+        sextets = sextets[(sextets != 0xFF).all(axis=1)]
+
+        fields = decode_ais_matrix(definition, sextets)
+        message_type = int(key.rstrip("AB"))
+        output[(24, int(key == "24B")) if message_type == 24 else message_type] = {
+            "Fields": fields,
+            "MessageType": np.full(len(sextets), message_type, dtype=np.uint8),
+        }
+
+    return output
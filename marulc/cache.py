@@ -0,0 +1,83 @@
+"""Containing a bounded cache of decoded messages, for traffic where the same
+payloads are sent over and over again
+"""
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Union
+
+Payload = Union[bytes, bytearray, memoryview]
+
+
+class DecodeCache:
+    """Bounded, least-recently-used cache of decoded messages keyed on PGN number
+    and raw payload. Repeated payloads are handed out from the cache instead of
+    being decoded again, as a fresh dict with a copy of the cached "Fields".
+
+    A cache must only be shared between parsers using the same decoding options.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc import NMEA2000Parser
+        from marulc.cache import DecodeCache
+
+        cache = DecodeCache(max_entries=256)
+        parser = NMEA2000Parser(cache=cache)
+        ...
+        print(cache.hits, cache.misses, cache.evicted)
+    """
+
+    def __init__(self, max_entries: Optional[int] = 1024) -> None:
+        """
+        Args:
+            max_entries (Optional[int], optional): Maximum number of cached
+                messages. Defaults to 1024, None means unbounded.
+        """
+        self._entries: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def unpack(
+        self, pgn: int, data: Payload, unpack: Callable[[int, Payload], dict]
+    ) -> dict:
+        """Unpack a complete message, from the cache if this payload has been
+        unpacked before
+
+        Args:
+            pgn (int): PGN number
+            data (Payload): Complete, raw binary message
+            unpack (Callable[[int, Payload], dict]): Unpacks a complete message
+                on a cache miss, i.e. unpack_complete_message
+
+        Returns:
+            dict: Unpacked message as a python dictionary
+        """
+        key = (pgn, bytes(data))
+
+        try:
+            output = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            output = self._entries[key] = unpack(pgn, data)
+
+            if self._max_entries is not None and len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+        # Hand out copies, callers are free to modify the output
+        fields = output["Fields"]
+        return {
+            **output,
+            "Fields": dict(fields) if isinstance(fields, dict) else fields,
+        }
+
+    def clear(self) -> None:
+        """Drop all cached messages, keeping the counters"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
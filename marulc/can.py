@@ -0,0 +1,325 @@
+"""Containing functionality for reading raw CAN frames from SocketCAN buffers and
+candump logs, filtering frames on their headers and storing partly reassembled
+multi-packet messages
+"""
+import time
+import struct
+from binascii import unhexlify
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import (
+    Any,
+    Callable,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from marulc.exceptions import ParseError
+
+# (CAN id, payload, timestamp)
+CANFrame = Tuple[int, bytes, Optional[float]]
+
+# SocketCAN struct can_frame, ie: can_id, len, 3 x padding, data
+CAN_FRAME = struct.Struct("=IB3x8s")
+CAN_EFF_FLAG = 0x80000000
+CAN_RTR_FLAG = 0x40000000
+CAN_ERR_FLAG = 0x20000000
+CAN_EFF_MASK = 0x1FFFFFFF
+
+
+def read_can_frames(buffer: Union[bytes, bytearray, memoryview]) -> Iterator[CANFrame]:
+    """Read CAN frames from a buffer of packed SocketCAN ``struct can_frame``
+    records (16 bytes each, host byte order), as read from a raw CAN socket or
+    dumped to a binary file. Frames that are not extended data frames (standard,
+    remote and error frames) are skipped, as are trailing, incomplete records.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        import socket
+        from marulc import NMEA2000Parser
+        from marulc.nmea2000 import read_can_frames
+
+        sock = socket.socket(socket.AF_CAN, socket.SOCK_RAW, socket.CAN_RAW)
+        sock.bind(("can0",))
+
+        parser = NMEA2000Parser()
+        for msg in parser.unpack_frames(read_can_frames(sock.recv(16 * 64))):
+            print(msg)
+
+    Args:
+        buffer (Union[bytes, bytearray, memoryview]): Packed can_frame records
+
+    Yields:
+        Iterator[CANFrame]: (CAN id, payload, None) tuples
+    """
+    view = memoryview(buffer)
+    view = view[: len(view) - len(view) % CAN_FRAME.size]
+
+    for can_id, length, data in CAN_FRAME.iter_unpack(view):
+        if can_id & (CAN_EFF_FLAG | CAN_RTR_FLAG | CAN_ERR_FLAG) != CAN_EFF_FLAG:
+            continue
+        yield can_id & CAN_EFF_MASK, data[:length], None
+
+
+def _parse_candump_line(line: str) -> Optional[CANFrame]:
+    timestamp = None
+    line = line.strip()
+    if line.startswith("("):
+        stamp, _, line = line.partition(")")
+        timestamp = float(stamp[1:])
+
+    parts = line.split()[1:]
+    if not parts:
+        return None
+
+    if len(parts) == 1:
+        # Log file format, ie: '09F80265#79FC77BA0000FFFF'
+        can_id, _, data = parts[0].partition("#")
+    else:
+        # Default output format, ie: '09F80265 [8] 79 FC 77 BA 00 00 FF FF', or
+        # '09F80265 [0] remote request' for remote frames
+        can_id, _, *data = parts
+        if "remote" in data:
+            return None
+        data = "".join(data)
+
+    # Only extended data frames, no remote or CAN FD frames
+    if len(can_id) != 8 or data.startswith(("R", "#")):
+        return None
+
+    return int(can_id, 16), unhexlify(data), timestamp
+
+
+def read_candump_log(source: Iterable[str], quiet: bool = False) -> Iterator[CANFrame]:
+    """Read CAN frames from lines of candump output. Both the log file format
+    (``candump -l``) and the default output format, with or without absolute
+    timestamps (``candump -ta``), are supported:
+
+    .. highlight:: console
+    .. code-block:: console
+
+        (1436509052.249713) can0 09F80265#79FC77BA0000FFFF
+        (1436509052.249713)  can0  09F80265   [8]  79 FC 77 BA 00 00 FF FF
+          can0  09F80265   [8]  79 FC 77 BA 00 00 FF FF
+
+    Lines that do not hold an extended data frame are skipped.
+
+    Args:
+        source (Iterable[str]): Lines of candump output
+        quiet (bool, optional): Whether malformed lines, i.e. truncated or not
+            hexadecimal, should be skipped rather than raised. Defaults to False.
+
+    Raises:
+        ParseError: If a line is malformed and quiet is False. Being raised from
+            a generator, this ends the iteration.
+
+    Yields:
+        Iterator[CANFrame]: (CAN id, payload, timestamp) tuples, timestamp is None
+            if not present in the log
+    """
+    for line in source:
+        try:
+            frame = _parse_candump_line(line)
+        except ValueError:
+            if quiet:
+                continue
+            raise ParseError("Malformed candump line", line) from None
+
+        if frame is not None:
+            yield frame
+
+
+class FastPacketBucket(MutableMapping):  # pylint: disable=too-many-instance-attributes
+    """Bounded temporary storage for partly reassembled multi-packet messages.
+
+    Sequences are kept in least-recently-used order. If a ``timeout`` is given,
+    sequences that have not received a sub-packet within it are expired and, if the
+    bucket is full, the least recently used sequence is evicted to make room for a
+    new one. Time is taken from the timestamps of the frames, when provided to
+    process_sub_packet, or from ``clock`` otherwise. The two are never compared,
+    when switching between them the pending sequences start over at the new time.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc import NMEA2000Parser
+        from marulc.nmea2000 import FastPacketBucket
+
+        bucket = FastPacketBucket(max_entries=128, timeout=0.5)
+        parser = NMEA2000Parser(bucket=bucket)
+        ...
+        print(bucket.evicted, bucket.expired)
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = 1024,
+        timeout: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            max_entries (Optional[int], optional): Maximum number of sequences in
+                process at the same time. Defaults to 1024, None means unbounded.
+            timeout (Optional[float], optional): Maximum time (seconds) between two
+                sub-packets of the same sequence. Defaults to None, meaning that
+                sequences never expire.
+            clock (Callable[[], float], optional): Clock used when no frame
+                timestamps are given. Defaults to time.monotonic.
+        """
+        super().__init__()
+        # Key -> [time of last activity, value]
+        self._entries: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._max_entries = max_entries
+        self._timeout = timeout
+        self._clock = clock
+        self._now = 0.0
+        # Whether the time of this bucket is taken from frame timestamps
+        self._frame_time = False
+        self.evicted = 0
+        self.expired = 0
+
+    def expire(self, timestamp: Optional[float] = None) -> int:
+        """Advance the time of this bucket and drop all sequences that have timed out
+
+        Args:
+            timestamp (Optional[float], optional): Current time. Defaults to None,
+                meaning that the time is taken from the clock of this bucket.
+
+        Returns:
+            int: Number of expired sequences
+        """
+        if self._timeout is None:
+            return 0
+
+        frame_time = timestamp is not None
+        self._now = timestamp if frame_time else self._clock()
+        if frame_time is not self._frame_time:
+            # Frame timestamps and the clock are not comparable, restart the
+            # pending sequences at the new time rather than expiring them all
+            self._frame_time = frame_time
+            for entry in self._entries.values():
+                entry[0] = self._now
+            return 0
+
+        deadline = self._now - self._timeout
+        count = 0
+        # Sequences are ordered by activity, the stale ones are at the front
+        for last_seen, _ in self._entries.values():
+            if last_seen >= deadline:
+                break
+            count += 1
+
+        for _ in range(count):
+            self._entries.popitem(last=False)
+
+        self.expired += count
+        return count
+
+    def __getitem__(self, key: Hashable) -> Any:
+        entry = self._entries[key]
+        self._entries.move_to_end(key)
+        entry[0] = self._now
+        return entry[1]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        elif self._max_entries is not None and len(self._entries) >= self._max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+        self._entries[key] = [self._now, value]
+
+    def __delitem__(self, key: Hashable) -> None:
+        del self._entries[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FrameFilter:
+    """Header-level filter on PGN number and source address. Used by the parsers
+    to drop unwanted frames as soon as the header is read, before the payload is
+    unhexlified, reassembled or decoded.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc import NMEA2000Parser
+        from marulc.nmea2000 import FrameFilter
+
+        # Only engine and position rapid updates, and only from address 10
+        parser = NMEA2000Parser(
+            frame_filter=FrameFilter(pgns=[127488, 129025], source_addresses=[10])
+        )
+    """
+
+    __slots__ = ("pgns", "excluded_pgns", "source_addresses")
+
+    def __init__(
+        self,
+        pgns: Optional[Iterable[int]] = None,
+        exclude_pgns: Optional[Iterable[int]] = None,
+        source_addresses: Optional[Iterable[int]] = None,
+    ) -> None:
+        """
+        Args:
+            pgns (Optional[Iterable[int]], optional): Allowlist of PGN numbers.
+                Defaults to None, meaning all PGN numbers.
+            exclude_pgns (Optional[Iterable[int]], optional): Denylist of PGN
+                numbers. Defaults to None.
+            source_addresses (Optional[Iterable[int]], optional): Allowlist of
+                source addresses. Defaults to None, meaning all source addresses.
+        """
+        self.pgns: Optional[FrozenSet[int]] = None if pgns is None else frozenset(pgns)
+        self.excluded_pgns: FrozenSet[int] = frozenset(exclude_pgns or ())
+        self.source_addresses: Optional[FrozenSet[int]] = (
+            None if source_addresses is None else frozenset(source_addresses)
+        )
+
+    def accepts_pgn(self, pgn: int) -> bool:
+        """Whether frames with this PGN number pass the filter
+
+        Args:
+            pgn (int): PGN number
+
+        Returns:
+            bool: True if accepted
+        """
+        return (self.pgns is None or pgn in self.pgns) and pgn not in self.excluded_pgns
+
+    def accepts_source_address(self, source_address: int) -> bool:
+        """Whether frames from this source address pass the filter
+
+        Args:
+            source_address (int): Source address
+
+        Returns:
+            bool: True if accepted
+        """
+        return self.source_addresses is None or source_address in self.source_addresses
+
+    def accepts(self, pgn: int, source_address: int) -> bool:
+        """Whether frames with this PGN number and source address pass the filter
+
+        Args:
+            pgn (int): PGN number
+            source_address (int): Source address
+
+        Returns:
+            bool: True if accepted
+        """
+        return self.accepts_pgn(pgn) and self.accepts_source_address(source_address)
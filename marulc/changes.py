@@ -0,0 +1,96 @@
+"""Containing change detection on raw payloads, for dropping messages which are
+identical to the last message of the same kind before they are decoded
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple, Union
+
+Payload = Union[str, bytes, bytearray, memoryview]
+
+
+class ChangeFilter:
+    """Tracks the last raw payload seen per key, i.e. (PGN, source address) for
+    NMEA2000 messages or (talker, formatter) for NMEA0183 sentences, and tells
+    whether a new payload differs from it. Unchanged payloads can still be let
+    through as a heartbeat every `heartbeat` seconds.
+
+    The number of tracked keys is bounded, the least recently seen key is
+    forgotten first and its next payload is considered changed.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc import NMEA2000Parser
+        from marulc.changes import ChangeFilter
+
+        # Only yield changed messages, and at least one every 10 seconds
+        parser = NMEA2000Parser(change_filter=ChangeFilter(heartbeat=10))
+    """
+
+    __slots__ = ("_heartbeat", "_max_entries", "_clock", "_state", "suppressed")
+
+    def __init__(
+        self,
+        heartbeat: Optional[float] = None,
+        max_entries: Optional[int] = 4096,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            heartbeat (Optional[float], optional): Let an unchanged payload through
+                when this many seconds have passed since the last payload let
+                through for the same key. Defaults to None, i.e. never.
+            max_entries (Optional[int], optional): Maximum number of tracked keys.
+                Defaults to 4096, None means unbounded.
+            clock (Callable[[], float], optional): Source of the current time in
+                seconds, used when no timestamp is given. Defaults to
+                time.monotonic.
+        """
+        self._heartbeat = heartbeat
+        self._max_entries = max_entries
+        self._clock = clock
+        self._state: "OrderedDict[Hashable, Tuple[Payload, float]]" = OrderedDict()
+        self.suppressed = 0
+
+    def changed(
+        self, key: Hashable, payload: Payload, timestamp: Optional[float] = None
+    ) -> bool:
+        """Check a payload against the last payload seen for its key, recording it
+        if it is let through
+
+        Args:
+            key (Hashable): Kind of message, i.e. (PGN, source address)
+            payload (Payload): Raw payload of the message
+            timestamp (Optional[float], optional): Time of reception in seconds.
+                Defaults to None, i.e. the current time according to the clock.
+
+        Returns:
+            bool: Whether the message should be let through
+        """
+        if timestamp is None:
+            timestamp = self._clock()
+
+        state = self._state.get(key)
+        if state is not None:
+            self._state.move_to_end(key)
+            if payload == state[0] and (
+                self._heartbeat is None or timestamp - state[1] < self._heartbeat
+            ):
+                self.suppressed += 1
+                return False
+
+        if not isinstance(payload, (str, bytes)):
+            payload = bytes(payload)
+
+        self._state[key] = (payload, timestamp)
+        if self._max_entries is not None and len(self._state) > self._max_entries:
+            self._state.popitem(last=False)
+
+        return True
+
+    def clear(self) -> None:
+        """Forget all tracked payloads"""
+        self._state.clear()
+
+    def __len__(self) -> int:
+        return len(self._state)
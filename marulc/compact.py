@@ -0,0 +1,185 @@
+"""Containing a compact representation of unpacked messages, for keeping large
+numbers of messages in memory.
+
+A compact message is a tuple of values whose class is generated once per kind of
+message, i.e. per PGN or sentence formatter, and carries a MessageSchema with the
+names of the values. The names are thereby stored once instead of once per
+message. The containers of a $MXPGN message of PGN 127488 take 120 bytes
+instead of 456 bytes as nested dicts, those of a $YDGGA sentence 168 bytes
+instead of 648 bytes (sys.getsizeof, CPython 3.11).
+
+Including the values themselves, measured with tracemalloc while keeping 10000
+messages of each kind from tests/nmea_test_log.txt in a list:
+
+===============================  =========  ==========  =======
+Messages                         dict       compact     ratio
+===============================  =========  ==========  =======
+$MXPGN, PGN 127488, 5 fields     668 B      357 B       1.9x
+$YDGGA, 14 fields                862 B      401 B       2.1x
+$YDMDA, 20 fields                808 B      435 B       1.9x
+===============================  =========  ==========  =======
+"""
+from keyword import iskeyword
+from operator import itemgetter
+from typing import Any, Dict, Hashable, Iterable, Iterator, Mapping, Tuple, Type
+
+# Generated message classes, keyed on the layout of the messages
+_MESSAGE_CLASSES: Dict[Hashable, Type["CompactMessage"]] = {}
+
+
+class MessageSchema:  # pylint: disable=too-few-public-methods
+    """Names of the values of a kind of compact message, shared by all messages of
+    that kind"""
+
+    __slots__ = ("attributes", "fields", "index")
+
+    def __init__(self, attributes: Tuple[str, ...], fields: Tuple[str, ...]):
+        """
+        Args:
+            attributes (Tuple[str, ...]): Names of the message attributes, i.e.
+                "Priority", "SourceAddress" and "PGN"
+            fields (Tuple[str, ...]): Ids of the message fields
+        """
+        self.attributes = attributes
+        self.fields = fields
+        self.index: Dict[str, int] = {
+            name: position for position, name in enumerate(fields, len(attributes))
+        }
+        self.index.update((name, position) for position, name in enumerate(attributes))
+
+    def __repr__(self) -> str:
+        return f"MessageSchema(attributes={self.attributes}, fields={self.fields})"
+
+
+class CompactMessage(tuple):
+    """Unpacked message as a tuple of the attribute values followed by the field
+    values, named by the schema of its class. Fields and attributes are available
+    by name through get, and as attributes when the name is a valid identifier.
+    """
+
+    __slots__ = ()
+
+    schema: MessageSchema
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Get the value of a field or an attribute of the message
+
+        Args:
+            name (str): Field id or attribute name
+            default (Any, optional): Returned if the message has no such value.
+                Defaults to None.
+
+        Returns:
+            Any: The value
+        """
+        position = self.schema.index.get(name)
+        return default if position is None else self[position]
+
+    @property
+    def fields(self) -> Dict[str, Any]:
+        """The fields of the message as a dict"""
+        schema = self.schema
+        return dict(zip(schema.fields, self[len(schema.attributes) :]))
+
+    def to_dict(self) -> dict:
+        """Convert into the regular, dict based, representation
+
+        Returns:
+            dict: Unpacked message as a python dictionary
+        """
+        output = {"Fields": self.fields}
+        output.update(zip(self.schema.attributes, self))
+        return output
+
+    def __reduce__(self):
+        # The generated classes can not be pickled by reference
+        schema = self.schema
+        name = type(self).__name__[len("Compact") :]
+        return _rebuild, (name, schema.attributes, schema.fields, tuple(self))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def _rebuild(
+    name: str, attributes: Tuple[str, ...], fields: Tuple[str, ...], values: tuple
+) -> "CompactMessage":
+    return message_class(name, attributes, fields)(values)
+
+
+def message_class(
+    name: str, attributes: Tuple[str, ...], fields: Tuple[str, ...]
+) -> Type[CompactMessage]:
+    """Get the compact message class of a layout, generating it on first use
+
+    Args:
+        name (str): Kind of message, i.e. the PGN or sentence formatter
+        attributes (Tuple[str, ...]): Names of the message attributes
+        fields (Tuple[str, ...]): Ids of the message fields
+
+    Returns:
+        Type[CompactMessage]: Class of compact messages with this layout
+    """
+    key = (name, attributes, fields)
+    cls = _MESSAGE_CLASSES.get(key)
+    if cls is None:
+        schema = MessageSchema(attributes, fields)
+        namespace: Dict[str, Any] = {"__slots__": (), "schema": schema}
+
+        # Named accessors, like a namedtuple, where they dont shadow anything
+        for value_name, position in schema.index.items():
+            if (
+                value_name.isidentifier()
+                and not iskeyword(value_name)
+                and not value_name.startswith("_")
+                and not hasattr(CompactMessage, value_name)
+            ):
+                namespace[value_name] = property(itemgetter(position))
+
+        cls = _MESSAGE_CLASSES[key] = type(
+            f"Compact{name}", (CompactMessage,), namespace
+        )
+
+    return cls
+
+
+def compact_message(msg: Mapping[str, Any]) -> CompactMessage:
+    """Convert an unpacked message into a compact message
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc import NMEA2000Parser
+        from marulc.compact import compact_message
+
+        parser = NMEA2000Parser()
+        msg = compact_message(parser.unpack("09F200C9 00 57 30 FF FF 01 FF FF"))
+        msg.speed  # 3093.75
+        msg.to_dict()  # The message as returned by the parser
+
+    Args:
+        msg (Mapping[str, Any]): Unpacked message, as returned by a parser
+
+    Returns:
+        CompactMessage: The same message in compact form
+    """
+    fields = msg["Fields"]
+    attributes = tuple(key for key in msg if key != "Fields")
+    name = f"PGN{msg['PGN']}" if "PGN" in msg else msg.get("Formatter", "")
+
+    cls = message_class(name, attributes, tuple(fields))
+    return cls((*(msg[key] for key in attributes), *fields.values()))
+
+
+def compact_messages(messages: Iterable[Mapping[str, Any]]) -> Iterator[CompactMessage]:
+    """Convert unpacked messages into compact messages, i.e. as yielded by
+    parse_from_iterator
+
+    Args:
+        messages (Iterable[Mapping[str, Any]]): Unpacked messages
+
+    Yields:
+        Iterator[CompactMessage]: The next message in compact form
+    """
+    for msg in messages:
+        yield compact_message(msg)
@@ -0,0 +1,231 @@
+"""Containing functionality for converting the data elements of NMEA0183 sentences
+according to the types of the fields of their definitions, i.e. "float", "int",
+"char", "text", "time" (hhmmss.ss), "lat" (ddmm.mm), "lon" (dddmm.mm) and "date"
+(ddmmyy), compiled once per sentence definition
+"""
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+Converter = Callable[[str], Any]
+
+# Field ids of a sentence definition paired with their converters
+Converters = Tuple[Tuple[str, Converter], ...]
+
+
+class Conversion(NamedTuple):
+    """How to convert the data elements of sentences.
+
+    By default, every data element is parsed using parse_value, regardless of the
+    type of its field. With typed, data elements are converted according to the
+    types of their fields: numbers to float or int, text, times and dates are kept
+    as strings and empty data elements become None. Fields without a type are
+    always parsed using parse_value.
+    """
+
+    # Convert according to the types of the fields
+    typed: bool = False
+    # Convert "lat" and "lon" fields from ddmm.mm to decimal degrees, without sign
+    degrees: bool = False
+    # Convert "time" fields from hhmmss.ss to seconds since midnight
+    seconds: bool = False
+
+
+DEFAULT_CONVERSION = Conversion()
+
+# Converters of sentence definitions, see compile_converters
+_CONVERTERS: Dict[Tuple[int, Conversion], Tuple[dict, Converters]] = {}
+
+
+def parse_value(value: str) -> Union[str, int, float]:
+    """Parses a value to either str, int or float depending on format
+
+    Args:
+        value (str): Inputted raw string
+
+    Returns:
+        Union[str, int, float]: Parsed output
+    """
+    try:
+        value = float(value)
+        value = int(value) if value.is_integer() else value
+    except ValueError:
+        # Keep as string
+        pass
+    return value
+
+
+def _parse_value(value: str) -> Union[str, int, float]:
+    # Same as parse_value, without raising for empty data elements
+    return parse_value(value) if value else value
+
+
+def _parse_char(value: str) -> Union[str, int, float]:
+    # Same as parse_value, without raising for single, non-digit characters
+    if len(value) < 2 and not value.isdigit():
+        return value
+    return parse_value(value)
+
+
+def _parse_text(value: str) -> Union[str, int, float]:
+    # Same as parse_value, without trying float on data elements starting with a
+    # letter that cannot start a number, i.e. anything but "inf" and "nan"
+    if value[:1].isalpha() and value[0] not in "iInN":
+        return value
+    return _parse_value(value)
+
+
+def to_float(value: str) -> Optional[Union[float, str]]:
+    """Convert a "float" data element
+
+    Args:
+        value (str): Data element
+
+    Returns:
+        Optional[Union[float, str]]: None if empty, the data element as is if
+            malformed
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def to_int(value: str) -> Optional[Union[int, float, str]]:
+    """Convert an "int" data element
+
+    Args:
+        value (str): Data element
+
+    Returns:
+        Optional[Union[int, float, str]]: None if empty, parsed using parse_value if
+            not an integer
+    """
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return parse_value(value)
+
+
+def to_text(value: str) -> Optional[str]:
+    """Convert a "char", "text", "time" or "date" data element
+
+    Args:
+        value (str): Data element
+
+    Returns:
+        Optional[str]: None if empty
+    """
+    return value or None
+
+
+def to_degrees(value: str) -> Optional[Union[float, str]]:
+    """Convert a "lat" (ddmm.mm) or "lon" (dddmm.mm) data element into decimal
+    degrees. The hemisphere is given by the following field.
+
+    Args:
+        value (str): Data element
+
+    Returns:
+        Optional[Union[float, str]]: None if empty, the data element as is if
+            malformed
+    """
+    if not value:
+        return None
+    dot = value.find(".")
+    split = (len(value) if dot < 0 else dot) - 2
+    try:
+        return int(value[:split] or 0) + float(value[split:]) / 60
+    except ValueError:
+        return value
+
+
+def to_seconds(value: str) -> Optional[Union[float, str]]:
+    """Convert a "time" (hhmmss.ss) data element into seconds since midnight
+
+    Args:
+        value (str): Data element
+
+    Returns:
+        Optional[Union[float, str]]: None if empty, the data element as is if
+            malformed
+    """
+    if not value:
+        return None
+    try:
+        return int(value[:2]) * 3600 + int(value[2:4]) * 60 + float(value[4:])
+    except ValueError:
+        return value
+
+
+_TYPED_CONVERTERS: Dict[str, Converter] = {
+    "float": to_float,
+    "int": to_int,
+    "char": to_text,
+    "text": to_text,
+    "time": to_text,
+    "lat": to_float,
+    "lon": to_float,
+    "date": to_text,
+}
+
+
+# Converters parsing the same as parse_value, given the type of the field
+_DEFAULT_CONVERTERS: Dict[str, Converter] = {
+    "char": _parse_char,
+    "text": _parse_text,
+}
+
+
+def field_converter(
+    field: dict, conversion: Conversion = DEFAULT_CONVERSION
+) -> Converter:
+    """Converter of the data elements of a field
+
+    Args:
+        field (dict): Field definition, typed by its "Type", if any
+        conversion (Conversion, optional): How to convert. Defaults to
+            DEFAULT_CONVERSION.
+
+    Returns:
+        Converter: Callable converting a data element
+    """
+    field_type = field.get("Type")
+    if conversion.degrees and field_type in ("lat", "lon"):
+        return to_degrees
+    if conversion.seconds and field_type == "time":
+        return to_seconds
+    if conversion.typed and field_type in _TYPED_CONVERTERS:
+        return _TYPED_CONVERTERS[field_type]
+    return _DEFAULT_CONVERTERS.get(field_type, _parse_value)
+
+
+def compile_converters(
+    definition: dict, conversion: Conversion = DEFAULT_CONVERSION
+) -> Converters:
+    """Converters of all fields of a sentence definition, compiled once
+
+    Args:
+        definition (dict): Sentence definition
+        conversion (Conversion, optional): How to convert. Defaults to
+            DEFAULT_CONVERSION.
+
+    Returns:
+        Converters: (field id, converter) of each field, in order
+    """
+    key = (id(definition), conversion)
+    cached = _CONVERTERS.get(key)
+
+    # Make sure the cached converters belong to this very definition
+    if cached is None or cached[0] is not definition:
+        cached = _CONVERTERS[key] = (
+            definition,
+            tuple(
+                (field["Id"], field_converter(field, conversion))
+                for field in definition["Fields"]
+            ),
+        )
+
+    return cached[1]
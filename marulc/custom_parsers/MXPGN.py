@@ -3,28 +3,45 @@
 """
 
 from binascii import unhexlify
-from typing import List
+from typing import List, Optional
 
 import bitstruct
 
+from marulc.cache import DecodeCache
+from marulc.changes import ChangeFilter
 from marulc.parser_bases import NMEA0183StandardFormatterBase
-from marulc.nmea2000 import (
-    PGN_DB,
-    unpack_complete_message,
-    process_sub_packet,
-    packet_type,
-)
-from marulc.exceptions import PGNError
+from marulc.nmea2000 import FastPacketBucket, FrameFilter, MessageUnpacker
 
 
 class MXPGNFormatter(NMEA0183StandardFormatterBase):
     """A parser for MXPGN messages, can handle both little-endian
     and big-endian byte-order"""
 
-    def __init__(self, reverse_byte_ordering=False) -> None:
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        reverse_byte_ordering: bool = False,
+        compiled: bool = False,
+        bucket: Optional[FastPacketBucket] = None,
+        lazy: bool = False,
+        *,
+        frame_filter: Optional[FrameFilter] = None,
+        lookups: bool = False,
+        sentinels: bool = False,
+        cache: Optional[DecodeCache] = None,
+        change_filter: Optional[ChangeFilter] = None,
+    ) -> None:
         super().__init__()
         self._reverse_byte_ordering = reverse_byte_ordering
-        self._bucket = {}
+        self._unpacker = MessageUnpacker(
+            compiled=compiled,
+            bucket=FastPacketBucket() if bucket is None else bucket,
+            lazy=lazy,
+            frame_filter=frame_filter,
+            lookups=lookups,
+            sentinels=sentinels,
+            cache=cache,
+            change_filter=change_filter,
+        )
 
     def sentence_formatter(self) -> str:
         return "PGN"
@@ -41,6 +58,9 @@ class MXPGNFormatter(NMEA0183StandardFormatterBase):
         Raises:
             PGNError:
                 If we dont know how to decode as message associated with this PGN number
+            FilteredMessageError:
+                If the message does not pass the filters of this formatter, or is
+                unchanged (UnchangedMessageError)
             MultiPacketDiscardedError:
                 If this subpacket is discarded due to missing messages
             MultiPacketInProcessError:
@@ -50,33 +70,19 @@ class MXPGNFormatter(NMEA0183StandardFormatterBase):
         Returns:
             dict: A fully unpacked --PGN message as a dict
         """
-        # Unpack pgn
+        # Unpack pgn and attributes
         pgn = int(msg[0], 16)
-
-        if pgn not in PGN_DB or not PGN_DB[pgn]["Complete"]:
-            raise PGNError(f"Cant decode message with PGN {pgn}", msg)
-
-        # Unpack attributes
         _, priority, _, source_address = bitstruct.unpack(
             ">u1u3u4u8", unhexlify(msg[1])
         )
+        decoder = self._unpacker.decoder(pgn, source_address, msg)
 
         data = unhexlify(msg[2])
         if self._reverse_byte_ordering:
             data = data[::-1]
 
-        # Unpack message
-        if packet_type(pgn) == "Single":
-            output = unpack_complete_message(pgn, data)
-        elif packet_type(pgn) == "Fast":
-            # Will raise if packet is not complete!
-            complete_packet = process_sub_packet(
-                pgn, source_address, data, self._bucket
-            )
-            output = unpack_complete_message(pgn, complete_packet)
-
-        else:
-            raise PGNError(f"Cant decode message with PGN {pgn}", msg)
+        # Unpack message, will raise if a fast packet is not complete!
+        output = self._unpacker.unpack(decoder, source_address, data, msg)
 
         # Add some attributes to output
         output["Priority"] = priority
@@ -1,17 +1,41 @@
 # pylint: disable=invalid-name
 """A parser for PCDIN messages
 """
-from typing import List
+from typing import List, Optional
 from binascii import unhexlify
 
+from marulc.cache import DecodeCache
+from marulc.changes import ChangeFilter
 from marulc.parser_bases import NMEA0183ProprietaryFormatterBase
-from marulc.nmea2000 import PGN_DB, unpack_complete_message
-from marulc.exceptions import PGNError
+from marulc.nmea2000 import FrameFilter, MessageUnpacker
 
 
 class PCDINFormatter(NMEA0183ProprietaryFormatterBase):
     """A parser for PCDIN messages"""
 
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        compiled: bool = False,
+        lazy: bool = False,
+        *,
+        frame_filter: Optional[FrameFilter] = None,
+        lookups: bool = False,
+        sentinels: bool = False,
+        cache: Optional[DecodeCache] = None,
+        change_filter: Optional[ChangeFilter] = None,
+    ) -> None:
+        super().__init__()
+        # PCDIN messages are complete, fast packets are reassembled by the gateway
+        self._unpacker = MessageUnpacker(
+            compiled=compiled,
+            lazy=lazy,
+            frame_filter=frame_filter,
+            lookups=lookups,
+            sentinels=sentinels,
+            cache=cache,
+            change_filter=change_filter,
+        )
+
     def manufacturer_code(self) -> str:
         return "CDI"
 
@@ -27,23 +51,22 @@ class PCDINFormatter(NMEA0183ProprietaryFormatterBase):
         Raises:
             PGNError:
                 If we dont know how to decode as message associated with this PGN number
+            FilteredMessageError:
+                If the message does not pass the filters of this formatter, or is
+                unchanged (UnchangedMessageError)
 
         Returns:
             dict: A fully unpacked --DIN message as a dict
         """
         assert msg[0] == "N"
-        # Unpack pgn
+        # Unpack pgn and attributes
         pgn = int(msg[1], 16)
-
-        if pgn not in PGN_DB or not PGN_DB[pgn]["Complete"]:
-            raise PGNError(f"Cant decode message with PGN {pgn}", msg)
-
-        # Unpack attributes
         timestamp = int(msg[2], 16)
         source_id = int(msg[3], 16)
+        decoder = self._unpacker.decoder(pgn, source_id, msg)
 
         # Unpack message
-        output = unpack_complete_message(pgn, unhexlify(msg[4]))
+        output = self._unpacker.unpack(decoder, source_id, unhexlify(msg[4]), msg)
 
         # Add some attributes to output
         output["Timestamp"] = timestamp
@@ -0,0 +1,228 @@
+"""Containing functionality for lazily loading the bundled JSON databases, using a
+precompiled artifact when available.
+
+The artifacts are pickled copies of the JSON databases, built alongside the
+package (see setup.py) or with compile_database. Each artifact records the size
+and modification time of the JSON file it was built from, as well as a digest of
+its content. The artifact is used as is while the size and modification time
+match. Otherwise the digest is checked, and if the content is unchanged (i.e. the
+file was copied on installation) the artifact is refreshed with the new
+modification time. If the content changed, the JSON file is parsed as usual.
+
+Only depends on the standard library so that it can be used at build time. The
+json, pickle and hashlib modules are imported when a database is first loaded,
+keeping them out of a plain import of the package.
+"""
+import os
+import time
+from pathlib import Path
+from collections.abc import MutableMapping
+from typing import Any, Callable, Hashable, Iterator, List, Optional, Tuple, Union
+
+ARTIFACT_SUFFIX = ".pickle"
+
+# JSON files modified less than this long ago (nanoseconds) may change again
+# within the resolution of the file system clock, their artifacts are always
+# checked against the digest
+RACY_INTERVAL = 2_000_000_000
+
+
+def artifact_path(json_path: Union[str, Path]) -> Path:
+    """Path of the precompiled artifact belonging to a JSON database
+
+    Args:
+        json_path (Union[str, Path]): Path to JSON database
+
+    Returns:
+        Path: Path to precompiled artifact
+    """
+    return Path(json_path).with_suffix(ARTIFACT_SUFFIX)
+
+
+def _digest(raw: bytes) -> str:
+    import hashlib  # pylint: disable=import-outside-toplevel
+
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _stat_key(json_path: Path) -> Optional[Tuple[int, int]]:
+    stat = json_path.stat()
+    if time.time_ns() - stat.st_mtime_ns < RACY_INTERVAL:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _write_artifact(json_path: Path, output_path: Path, raw: bytes, data: Any) -> None:
+    import pickle  # pylint: disable=import-outside-toplevel
+
+    payload = pickle.dumps(
+        {"stat": _stat_key(json_path), "digest": _digest(raw), "data": data},
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    if pickle.loads(payload)["data"] != data:
+        raise ValueError(f"Precompiled artifact of {json_path} does not match")
+
+    # Replaced atomically, other processes may be loading the artifact
+    temporary_path = output_path.with_name(f"{output_path.name}.{os.getpid()}")
+    temporary_path.write_bytes(payload)
+    os.replace(temporary_path, output_path)
+
+
+def load_database(json_path: Union[str, Path]) -> Any:
+    """Load a JSON database, from its precompiled artifact if there is one built
+    from the current version of the JSON file. The JSON file is only read if its
+    size or modification time differ from those recorded in the artifact.
+
+    Args:
+        json_path (Union[str, Path]): Path to JSON database
+
+    Returns:
+        Any: The content of the JSON database
+    """
+    # pylint: disable=import-outside-toplevel
+    import json
+    import pickle
+
+    json_path = Path(json_path)
+    raw = None
+
+    try:
+        with artifact_path(json_path).open("rb") as f_handle:
+            artifact = pickle.load(f_handle)
+
+        stat = json_path.stat()
+        if artifact["stat"] == (stat.st_size, stat.st_mtime_ns):
+            return artifact["data"]
+
+        raw = json_path.read_bytes()
+        if artifact["digest"] == _digest(raw):
+            try:
+                # Same content, record the new size and modification time
+                _write_artifact(
+                    json_path, artifact_path(json_path), raw, artifact["data"]
+                )
+            except OSError:
+                # Read-only installation, keep checking the digest
+                pass
+            return artifact["data"]
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+        # Missing or broken artifact, fall back to the JSON file
+        pass
+
+    return json.loads(json_path.read_bytes() if raw is None else raw)
+
+
+def compile_database(
+    json_path: Union[str, Path], output_path: Optional[Union[str, Path]] = None
+) -> Path:
+    """Compile a JSON database into a precompiled artifact, validating that the
+    artifact reproduces the JSON database exactly.
+
+    Args:
+        json_path (Union[str, Path]): Path to JSON database
+        output_path (Optional[Union[str, Path]], optional): Where to write the
+            artifact. Defaults to None, i.e. next to the JSON database.
+
+    Raises:
+        ValueError: If the artifact does not reproduce the JSON database
+
+    Returns:
+        Path: Path to the written artifact
+    """
+    import json  # pylint: disable=import-outside-toplevel
+
+    json_path = Path(json_path)
+    raw = json_path.read_bytes()
+    output_path = Path(output_path) if output_path else artifact_path(json_path)
+
+    _write_artifact(json_path, output_path, raw, json.loads(raw))
+    return output_path
+
+
+class LazyDatabase(MutableMapping):
+    """Mapping which is loaded on first use. Entries can be added, replaced and
+    removed like in a dict, i.e. to add custom definitions, and the observers of
+    the mapping are told which key changed, so that anything compiled from the
+    old entry can be dropped.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc.database import LazyDatabase
+
+        db = LazyDatabase(lambda: {"A": 1})  # Nothing loaded yet
+        db["A"]  # Loads and returns 1
+        db["B"] = 2
+    """
+
+    __slots__ = ("_loader", "_data", "_observers")
+
+    def __init__(self, loader: Callable[[], dict]):
+        self._loader = loader
+        self._data: Optional[dict] = None
+        self._observers: List[Callable[[Hashable], None]] = []
+
+    def observe(self, callback: Callable[[Hashable], None]) -> None:
+        """Register a callback, called with the key of every entry that is set or
+        deleted
+
+        Args:
+            callback (Callable[[Hashable], None]): Callback
+        """
+        self._observers.append(callback)
+
+    def reset(self) -> None:
+        """Drop the loaded mapping, it is loaded again on next use. Used for
+        mappings derived from other mappings, whenever those change."""
+        self._data = None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the underlying mapping has been loaded"""
+        return self._data is not None
+
+    @property
+    def data(self) -> dict:
+        """The underlying mapping, loaded on first access"""
+        if self._data is None:
+            self._data = self._loader()
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value) -> None:
+        self.data[key] = value
+        for callback in self._observers:
+            callback(key)
+
+    def __delitem__(self, key) -> None:
+        del self.data[key]
+        for callback in self._observers:
+            callback(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self.data
+
+    def __iter__(self) -> Iterator:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def keys(self):
+        return self.data.keys()
+
+    def items(self):
+        return self.data.items()
+
+    def values(self):
+        return self.data.values()
+
+    def __repr__(self) -> str:
+        if self._data is None:
+            return f"{type(self).__name__}(<not loaded>)"
+        return f"{type(self).__name__}({self._data!r})"
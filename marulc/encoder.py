@@ -0,0 +1,469 @@
+"""Containing functionality for packing python values into binary NMEA2000
+messages and CAN frames, the inverse of unpacking them. Messages are packed
+according to the same PGN definitions as they are unpacked, using pre-compiled,
+per-PGN encoders.
+"""
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from marulc.nmea2000 import (
+    DEFINITION_INDEX,
+    FAST_PACKET_MAX_LENGTH,
+    PGN_DEFINITIONS,
+    compile_packet_decoder,
+    definition_fields,
+    resolve_definition,
+)
+from marulc.can import CANFrame
+from marulc.exceptions import PGNError
+
+DEFAULT_PRIORITY = 6
+
+
+class FieldEncoder(NamedTuple):
+    """Pre-compiled packing information for a single field"""
+
+    id: Optional[str]
+    position: int
+    length: int
+    signed: bool
+    scale: Union[int, float]
+    default: int
+    names: Optional[Dict[str, int]]
+    bits: Optional[Dict[str, int]]
+
+
+class PacketEncoder(NamedTuple):
+    """Pre-compiled, ready-to-use packing information for a single PGN definition"""
+
+    pgn: int
+    id: str
+    variant: int
+    variants: int
+    packet_type: str
+    length: int
+    fill: int
+    fields: Tuple[FieldEncoder, ...]
+    field_ids: frozenset
+
+
+# Registry of pre-compiled encoders, keyed by (PGN number, variant)
+_PACKET_ENCODERS: Dict[Tuple[int, int], PacketEncoder] = {}
+
+# Per-PGN list of definitions which can be packed, with their variants
+_PACKABLE_VARIANTS: Dict[int, List[int]] = {}
+
+
+def _pgn_definitions_changed(pgn: int) -> None:
+    # Drop the encoders compiled from the old definitions
+    for key in [key for key in _PACKET_ENCODERS if key[0] == pgn]:
+        del _PACKET_ENCODERS[key]
+    _PACKABLE_VARIANTS.pop(pgn, None)
+
+
+PGN_DEFINITIONS.observe(_pgn_definitions_changed)
+
+
+def pack_can_id(source_address: int, pgn: int, priority: int) -> int:
+    """Pack priority, PGN number and source address into a 29-bit CAN
+    identifier, the inverse of unpack_can_id
+
+    Args:
+        source_address (int): Source address
+        pgn (int): PGN number
+        priority (int): Priority
+
+    Returns:
+        int: The 29-bit CAN identifier as an integer
+    """
+    return (priority & 0x7) << 26 | (pgn & 0x3FFFF) << 8 | source_address & 0xFF
+
+
+def pack_header(source_address: int, pgn: int, priority: int) -> bytes:
+    """Pack priority, PGN number and source address into a N2K header, the inverse
+    of unpack_header
+
+    Args:
+        source_address (int): Source address
+        pgn (int): PGN number
+        priority (int): Priority
+
+    Returns:
+        bytes: The N2K header, 4 bytes
+    """
+    return pack_can_id(source_address, pgn, priority).to_bytes(4, "big")
+
+
+def _field_default(field: dict) -> int:
+    # Match fields identify the definition, others are "data not available"
+    if "Match" in field:
+        return int(field["Match"])
+    return (1 << (field["BitLength"] - field["Signed"])) - 1
+
+
+def compile_packet_encoder(
+    definition: dict, variant: int = 0, variants: int = 1
+) -> PacketEncoder:
+    """Compile an encoder for a PGN definition. Fields are laid out exactly as
+    compile_packet_decoder lays them out, bits not covered by any field are set.
+
+    Args:
+        definition (dict): PGN definition as found in PGN_DEFINITIONS
+        variant (int, optional): Index of the definition among all definitions
+            sharing this PGN number. Defaults to 0.
+        variants (int, optional): Number of definitions sharing this PGN number.
+            Defaults to 1.
+
+    Returns:
+        PacketEncoder: Pre-compiled encoder
+    """
+    decoder = compile_packet_decoder(definition, variant, variants)
+    length = max(decoder.length, (decoder.total_bits + 7) // 8)
+
+    # See compile_packet_decoder regarding the alignment of the fields
+    shift = 0 if variants > 1 else length * 8 - decoder.total_bits
+
+    fields = []
+    for position, field in enumerate(definition_fields(definition)):
+        lookup = decoder.lookups.get(position)
+        masks = getattr(lookup, "masks", None)
+        field_id = decoder.field_ids[position]
+        fields.append(
+            FieldEncoder(
+                # Only the last of duplicate ids is unpacked, the others are left
+                # at their defaults
+                id=field_id if decoder.field_index[field_id] == position else None,
+                position=decoder.bit_offsets[position] + shift,
+                length=decoder.bit_lengths[position],
+                signed=decoder.signed[position],
+                scale=decoder.scales[position],
+                default=_field_default(field),
+                names=(
+                    {name: value for value, name in lookup.items()}
+                    if lookup is not None and masks is None
+                    else None
+                ),
+                bits=(
+                    {name: mask for mask, name in masks} if masks is not None else None
+                ),
+            )
+        )
+
+    return PacketEncoder(
+        pgn=decoder.pgn,
+        id=decoder.id,
+        variant=variant,
+        variants=variants,
+        packet_type=decoder.packet_type,
+        length=length,
+        fill=((1 << (length * 8)) - 1) ^ (((1 << decoder.total_bits) - 1) << shift),
+        fields=tuple(fields),
+        field_ids=frozenset(decoder.field_ids),
+    )
+
+
+def _get_variant_encoder(pgn: int, variant: int) -> PacketEncoder:
+    try:
+        return _PACKET_ENCODERS[pgn, variant]
+    except KeyError:
+        definitions = PGN_DEFINITIONS[pgn]
+        encoder = _PACKET_ENCODERS[pgn, variant] = compile_packet_encoder(
+            definitions[variant], variant, len(definitions)
+        )
+        return encoder
+
+
+def _packable_variants(pgn: int) -> List[int]:
+    try:
+        return _PACKABLE_VARIANTS[pgn]
+    except KeyError:
+        if pgn not in PGN_DEFINITIONS:
+            raise PGNError(f"No definition of PGN {pgn}", pgn) from None
+
+    variants = _PACKABLE_VARIANTS[pgn] = [
+        variant
+        for variant, definition in enumerate(PGN_DEFINITIONS[pgn])
+        if definition["Complete"]
+        and definition["Type"] in ("Single", "Fast")
+        and (definition["Type"] == "Fast" or definition["Length"] <= 8)
+    ]
+    return variants
+
+
+def get_packet_encoder(
+    pgn: int, fields: Optional[Mapping[str, Any]] = None
+) -> PacketEncoder:
+    """Returns the pre-compiled encoder for this PGN number from the encoder
+    registry, compiling it on first use.
+
+    If the PGN number has several definitions, the first definition holding all
+    of the given fields whose packed payload resolves back to the definition
+    itself is used, i.e. the one whose "Match" fields agree with the given values.
+    Otherwise, the default definition is used.
+
+    Args:
+        pgn (int): PGN number
+        fields (Optional[Mapping[str, Any]], optional): Values of the fields to
+            pack. Defaults to None.
+
+    Raises:
+        PGNError: If no complete, single or fast packet definition of this PGN
+            number applies
+
+    Returns:
+        PacketEncoder: Pre-compiled encoder
+    """
+    variants = _packable_variants(pgn)
+
+    if pgn not in DEFINITION_INDEX:
+        if not variants:
+            raise PGNError(f"Cant pack message with PGN {pgn}", pgn)
+        return _get_variant_encoder(pgn, variants[-1])
+
+    for variant in variants:
+        encoder = _get_variant_encoder(pgn, variant)
+        if fields is not None and not encoder.field_ids >= fields.keys():
+            continue
+        if resolve_definition(pgn, pack_payload(encoder, fields or {})) == variant:
+            return encoder
+
+    raise PGNError(f"No definition of PGN {pgn} matches these fields", fields)
+
+
+def pack_value(pgn: int, field: FieldEncoder, value: Any) -> int:
+    """Convert a field value into its raw, unsigned representation
+
+    Args:
+        pgn (int): PGN number, for error messages
+        field (FieldEncoder): Pre-compiled field
+        value (Any): Physical value, scaled according to "Resolution". None means
+            "data not available". Names are accepted for lookup table fields and
+            collections of names for bitfields, as unpacked with lookups.
+
+    Raises:
+        ValueError: If the value can not be represented by the field
+
+    Returns:
+        int: Raw value, masked to the length of the field
+    """
+    if value is None:
+        return field.default
+
+    if isinstance(value, str):
+        if field.names is None or value not in field.names:
+            raise ValueError(f"Unknown name {value!r} of field {field.id}, PGN {pgn}")
+        raw = field.names[value]
+    elif isinstance(value, (tuple, list, set, frozenset)):
+        if field.bits is None or not field.bits.keys() >= set(value):
+            raise ValueError(f"Unknown bits {value!r} of field {field.id}, PGN {pgn}")
+        raw = 0
+        for name in value:
+            raw |= field.bits[name]
+    elif isinstance(value, int) and isinstance(field.scale, int):
+        raw = value
+    else:
+        raw = round(value / field.scale)
+
+    if field.signed:
+        low, high = -(1 << (field.length - 1)), (1 << (field.length - 1)) - 1
+    else:
+        low, high = 0, (1 << field.length) - 1
+
+    if not low <= raw <= high:
+        raise ValueError(f"Value {value!r} out of range for {field.id}, PGN {pgn}")
+
+    return raw & ((1 << field.length) - 1)
+
+
+def pack_payload(encoder: PacketEncoder, fields: Mapping[str, Any]) -> bytes:
+    """Pack the fields of a message into a complete, binary payload
+
+    Args:
+        encoder (PacketEncoder): Pre-compiled encoder
+        fields (Mapping[str, Any]): Field ids mapped to values, see pack_value.
+            Missing fields are "data not available".
+
+    Raises:
+        ValueError: If a value can not be represented by its field
+
+    Returns:
+        bytes: Complete, raw binary message
+    """
+    raw = encoder.fill
+    for field in encoder.fields:
+        raw |= pack_value(encoder.pgn, field, fields.get(field.id)) << field.position
+
+    return raw.to_bytes(encoder.length, "little")
+
+
+def pack_fields(pgn: int, fields: Mapping[str, Any]) -> bytes:
+    """Pack all fields of a message into a complete binary message, the inverse of
+    unpack_fields
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc.encoder import pack_fields
+
+        data = pack_fields(127488, {"instance": 0, "speed": 3093.75})
+
+    Args:
+        pgn (int): PGN number
+        fields (Mapping[str, Any]): Field ids mapped to values, see pack_value.
+            Missing fields are "data not available".
+
+    Raises:
+        PGNError: If we dont know how to pack a message with this PGN number
+        ValueError: If a value can not be represented by its field
+
+    Returns:
+        bytes: Complete, raw binary message
+    """
+    return pack_payload(get_packet_encoder(pgn, fields), fields)
+
+
+def split_fast_packet(payload: bytes, sequence: int) -> List[bytes]:
+    """Split a complete payload into the frames of a fast packet, the inverse of
+    process_sub_packet. The last frame is padded with 0xFF.
+
+    Args:
+        payload (bytes): Complete, raw binary message
+        sequence (int): Sequence counter of the message, 0-7
+
+    Raises:
+        ValueError: If the payload is too long for a fast packet
+
+    Returns:
+        List[bytes]: 8-byte frame payloads
+    """
+    if len(payload) > FAST_PACKET_MAX_LENGTH:
+        raise ValueError(f"{len(payload)} bytes is too long for a fast packet")
+
+    order = (sequence & 0x7) << 5
+    frames = [bytes((order, len(payload))) + payload[:6]]
+    for index, offset in enumerate(range(6, len(payload), 7), 1):
+        frames.append(bytes((order | index,)) + payload[offset : offset + 7])
+
+    frames[-1] = frames[-1].ljust(8, b"\xff")
+    return frames
+
+
+def format_frame(can_id: int, data: bytes) -> str:
+    """Format a CAN frame as a hex line, as accepted by NMEA2000Parser.unpack
+
+    Args:
+        can_id (int): 29-bit CAN identifier
+        data (bytes): Frame payload
+
+    Returns:
+        str: I.e. "09F200C9 00 57 30 FF FF 01 FF FF"
+    """
+    return f"{can_id:08X} {data.hex(' ').upper()}"
+
+
+class NMEA2000Encoder:
+    """An encoder packing messages, in the same layout as unpacked by
+    NMEA2000Parser, into CAN frames. Keeps a fast packet sequence counter per PGN
+    number and source address.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc import NMEA2000Parser
+        from marulc.encoder import NMEA2000Encoder
+
+        encoder = NMEA2000Encoder()
+        frames = encoder.pack_hex(
+            {"PGN": 127488, "SourceAddress": 201, "Fields": {"speed": 3093.75}}
+        )
+        msg = NMEA2000Parser().unpack(frames[0])
+    """
+
+    def __init__(self, priority: int = DEFAULT_PRIORITY, source_address: int = 0):
+        """
+        Args:
+            priority (int, optional): Priority of messages without a "Priority".
+                Defaults to 6.
+            source_address (int, optional): Source address of messages without a
+                "SourceAddress". Defaults to 0.
+        """
+        self._priority = priority
+        self._source_address = source_address
+        self._sequences: Dict[Tuple[int, int], int] = {}
+
+    def pack(self, msg: Mapping[str, Any]) -> List[CANFrame]:
+        """Pack a message into CAN frames, several for fast packets
+
+        Args:
+            msg (Mapping[str, Any]): Message with "PGN" and "Fields" and optionally
+                "Priority" and "SourceAddress"
+
+        Raises:
+            PGNError: If we dont know how to pack a message with this PGN number
+            ValueError: If a value can not be represented by its field
+
+        Returns:
+            List[CANFrame]: (CAN id, payload, None) tuples, as accepted by
+                NMEA2000Parser.unpack_frames
+        """
+        pgn = msg["PGN"]
+        source_address = msg.get("SourceAddress", self._source_address)
+        can_id = pack_can_id(source_address, pgn, msg.get("Priority", self._priority))
+
+        encoder = get_packet_encoder(pgn, msg["Fields"])
+        payload = pack_payload(encoder, msg["Fields"])
+
+        if encoder.packet_type != "Fast":
+            return [(can_id, payload, None)]
+
+        key = (pgn, source_address)
+        sequence = self._sequences.get(key, 0)
+        self._sequences[key] = (sequence + 1) & 0x7
+
+        return [(can_id, data, None) for data in split_fast_packet(payload, sequence)]
+
+    def pack_hex(self, msg: Mapping[str, Any]) -> List[str]:
+        """Pack a message into CAN frames formatted as hex lines, see format_frame
+
+        Args:
+            msg (Mapping[str, Any]): Message, see pack
+
+        Returns:
+            List[str]: Hex lines, as accepted by NMEA2000Parser.unpack
+        """
+        return [format_frame(can_id, data) for can_id, data, _ in self.pack(msg)]
+
+    def pack_bytes(self, msg: Mapping[str, Any]) -> List[bytes]:
+        """Pack a message into raw CAN frames, each a 4-byte, big-endian CAN id
+        followed by the payload
+
+        Args:
+            msg (Mapping[str, Any]): Message, see pack
+
+        Returns:
+            List[bytes]: Raw frames, as accepted by marulc.batch.split_frame
+        """
+        return [can_id.to_bytes(4, "big") + data for can_id, data, _ in self.pack(msg)]
+
+    def pack_many(self, messages: Iterable[Mapping[str, Any]]) -> List[CANFrame]:
+        """Pack messages into CAN frames, in order
+
+        Args:
+            messages (Iterable[Mapping[str, Any]]): Messages, see pack
+
+        Returns:
+            List[CANFrame]: (CAN id, payload, None) tuples
+        """
+        frames = []
+        for msg in messages:
+            frames.extend(self.pack(msg))
+        return frames
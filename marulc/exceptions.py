@@ -8,6 +8,10 @@ class ParseError(ValueError):
     def __init__(self, message, data):
         super().__init__((message, data))
 
+    def __reduce__(self):
+        # Pickle with the original arguments, i.e. when sent between processes
+        return type(self), self.args[0]
+
 
 class SentenceTypeError(ParseError):
     pass
@@ -31,3 +35,11 @@ class MultiPacketInProcessError(MultiPacketError):
 
 class MultiPacketDiscardedError(MultiPacketError):
     pass
+
+
+class FilteredMessageError(RuntimeError):
+    pass
+
+
+class UnchangedMessageError(FilteredMessageError):
+    pass
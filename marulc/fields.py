@@ -0,0 +1,104 @@
+"""Containing functionality for interpreting the raw values of NMEA2000 fields,
+i.e. lookup tables, bitfields and "data not available" sentinels, compiled
+once per field definition
+"""
+from typing import Any, Mapping, Optional, Tuple
+
+# Types of fields holding physical values, which use the top codes of their
+# range to mark data as not available, out of range or reserved. Untyped fields
+# are physical values only when they have units or a resolution.
+SENTINEL_TYPES = frozenset(
+    {
+        "Integer",
+        "Date",
+        "Time",
+        "Latitude",
+        "Longitude",
+        "Temperature",
+        "Temperature (hires)",
+        "Pressure",
+        "Pressure (hires)",
+    }
+)
+
+
+class EnumLookup(dict):
+    """Lookup table from raw values to names for a "Lookup table" field. Values
+    without a name are passed through as is."""
+
+    __slots__ = ()
+
+    def __missing__(self, value: int) -> Any:
+        return value
+
+
+class BitfieldLookup(dict):
+    """Lookup table from raw values to the names of all set bits for a "Bitfield"
+    field, as a tuple. Each distinct value is expanded once, using precomputed
+    masks, and memoized."""
+
+    __slots__ = ("masks",)
+
+    def __init__(self, masks: Tuple[Tuple[int, str], ...]):
+        super().__init__()
+        self.masks = masks
+
+    def __missing__(self, value: int) -> Tuple[str, ...]:
+        names = self[value] = tuple(name for mask, name in self.masks if value & mask)
+        return names
+
+
+def compile_lookup(field: dict) -> Optional[Mapping[int, Any]]:
+    """Compile the lookup table of a field, if it has any
+
+    Args:
+        field (dict): Field definition
+
+    Returns:
+        Optional[Mapping[int, Any]]: EnumLookup, BitfieldLookup or None
+    """
+    if "EnumValues" in field:
+        return EnumLookup(
+            (int(item["value"]), item["name"]) for item in field["EnumValues"]
+        )
+
+    if "EnumBitValues" in field:
+        return BitfieldLookup(
+            tuple(
+                (1 << int(bit), name)
+                for item in field["EnumBitValues"]
+                for bit, name in item.items()
+            )
+        )
+
+    return None
+
+
+def field_sentinel(field: dict) -> int:
+    """The smallest raw value of a field that is a "data not available" sentinel.
+
+    Physical values use the top codes of their range (for signed fields, of the
+    positive range) as sentinels. All ones means "data not available". For
+    fields of at least 4 bits, the two codes below it mean "out of range" and
+    "reserved". For 2 and 3 bit fields, only all ones is a sentinel. Fields that
+    are not physical values, such as untyped sequence ids and instances without
+    units or resolution, 1 bit fields and "Match" fields have no sentinels.
+
+    Args:
+        field (dict): Field definition
+
+    Returns:
+        int: Smallest sentinel value, ``1 << BitLength`` (unreachable) if the field
+            has no sentinels
+    """
+    length = field["BitLength"]
+    if "Type" in field:
+        physical = field["Type"] in SENTINEL_TYPES
+    else:
+        physical = field.get("Units") is not None or "Resolution" in field
+
+    if not physical or "Match" in field or length < 2:
+        return 1 << length
+
+    maximum = (1 << (length - field["Signed"])) - 1
+    return maximum - 2 if length >= 4 else maximum
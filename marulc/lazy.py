@@ -0,0 +1,189 @@
+"""Containing lazily decoded message fields, decoding each field only when it is
+accessed. Used for the optional lazy mode of the parsers.
+"""
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
+
+import bitstruct
+
+# Field indexes of NMEA0183 sentence definitions, see SentenceFields
+_SENTENCE_FIELD_INDEXES: Dict[int, Tuple[dict, Dict[str, int]]] = {}
+
+
+class LazyFields(Mapping, ABC):
+    """An abstract base class for read-only mappings of field ids to field
+    values, where each field is decoded on first access and memoized. Compares
+    equal to a dict holding the same fields and values, use to_dict for a plain
+    dict.
+    """
+
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, index: Dict[str, int]):
+        """
+        Args:
+            index (Dict[str, int]): Field ids mapped to their positions
+        """
+        self._index = index
+        self._values: Dict[str, Any] = {}
+
+    @abstractmethod
+    def _decode(self, position: int) -> Any:
+        """Decode a single field
+
+        Args:
+            position (int): Position of the field, as given by the index
+        """
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._values[key]
+        except KeyError:
+            value = self._values[key] = self._decode(self._index[key])
+            return value
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def to_dict(self) -> dict:
+        """Decode all fields into a plain dict
+
+        Returns:
+            dict: Field ids mapped to field values
+        """
+        return {key: self[key] for key in self._index}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class PacketFields(LazyFields):
+    """Lazily decoded fields of a complete, binary NMEA2000 message. The payload
+    is read into a single integer on creation and every field is extracted from
+    it with a shift and a mask on access, exactly as the generated decode
+    functions do.
+    """
+
+    __slots__ = ("_decoder", "_raw", "_lookups", "_sentinels")
+
+    def __init__(
+        self,
+        decoder: Any,
+        data: bytes,
+        lookups: bool = False,
+        sentinels: bool = False,
+    ):
+        """
+        Args:
+            decoder (PacketDecoder): Pre-compiled decoder for the message
+            data (bytes): Complete, raw binary message
+            lookups (bool, optional): Whether to resolve lookup table and bitfield
+                fields into names. Defaults to False.
+            sentinels (bool, optional): Whether fields holding "data not
+                available" sentinel values are returned as None. Defaults to False.
+
+        Raises:
+            bitstruct.Error: If the message is too short for the definition
+        """
+        super().__init__(decoder.field_index)
+        self._decoder = decoder
+        self._lookups = decoder.lookups if lookups else None
+        self._sentinels = sentinels
+
+        total_bits = decoder.total_bits
+        shift = len(data) * 8 - total_bits
+        if shift < 0:
+            raise bitstruct.Error(
+                f"unpack requires at least {total_bits} bits to unpack "
+                f"(got {len(data) * 8})"
+            )
+
+        # See compile_packet_decoder regarding the alignment of the fields
+        self._raw = int.from_bytes(data, "little") >> (
+            0 if decoder.variants > 1 else shift
+        )
+
+    def _decode(self, position: int) -> Any:
+        decoder = self._decoder
+        length = decoder.bit_lengths[position]
+        value = (self._raw >> decoder.bit_offsets[position]) & ((1 << length) - 1)
+
+        if decoder.signed[position] and length and value >> (length - 1):
+            value -= 1 << length
+
+        if self._sentinels and value >= decoder.sentinels[position]:
+            return None
+
+        value *= decoder.scales[position]
+        if self._lookups and position in self._lookups:
+            return self._lookups[position][value]
+
+        return value
+
+
+class SentenceFields(LazyFields):
+    """Lazily parsed fields of a NMEA0183 sentence, parsing each data element
+    on access"""
+
+    __slots__ = ("_data", "_parse")
+
+    def __init__(
+        self,
+        definition: dict,
+        data: List[str],
+        parse: Union[Callable[[str], Any], Tuple[Callable[[str], Any], ...]],
+    ):
+        """
+        Args:
+            definition (dict): Definition describing how the data should be
+                interpreted
+            data (List[str]): Raw data elements
+            parse (Union[Callable[[str], Any], Tuple[Callable[[str], Any], ...]]):
+                Parser of a single data element, or one parser per field
+        """
+        super().__init__(sentence_field_index(definition, len(data)))
+        self._data = data
+        self._parse = parse
+
+    def _decode(self, position: int) -> Any:
+        if isinstance(self._parse, tuple):
+            return self._parse[position](self._data[position])
+        return self._parse(self._data[position])
+
+
+def sentence_field_index(definition: dict, count: int) -> Dict[str, int]:
+    """Field index of a NMEA0183 sentence definition, limited to the first count
+    fields as not all sentences carry all fields
+
+    Args:
+        definition (dict): Sentence definition
+        count (int): Number of data elements in the sentence
+
+    Returns:
+        Dict[str, int]: Field ids mapped to their positions
+    """
+    key = id(definition)
+    cached = _SENTENCE_FIELD_INDEXES.get(key)
+
+    # Make sure the cached index belongs to this very definition
+    if cached is None or cached[0] is not definition:
+        cached = _SENTENCE_FIELD_INDEXES[key] = (
+            definition,
+            {
+                field["Id"]: position
+                for position, field in enumerate(definition["Fields"])
+            },
+        )
+
+    index = cached[1]
+    if count >= len(definition["Fields"]):
+        return index
+
+    return {field: position for field, position in index.items() if position < count}
@@ -1,11 +1,20 @@
 """Containing functionality for unpacking textual NMEA0183 messages
 """
 import re
-import json
-import operator
 from pathlib import Path
-from typing import Sequence, Union, Optional, Dict, Type, Callable
-from functools import reduce
+from typing import (
+    Sequence,
+    Union,
+    Optional,
+    Dict,
+    Type,
+    Callable,
+    List,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Tuple,
+)
 
 from marulc.parser_bases import (
     RawParserBase,
@@ -13,15 +22,111 @@ from marulc.parser_bases import (
     NMEA0183StandardFormatterBase,
     NMEA0183ProprietaryFormatterBase,
 )
-from marulc.exceptions import ParseError, SentenceTypeError, ChecksumError
+from marulc.database import LazyDatabase, load_database
+from marulc.lazy import SentenceFields
+from marulc.converters import (
+    DEFAULT_CONVERSION,
+    Conversion,
+    compile_converters,
+    parse_value,
+)
+from marulc.changes import ChangeFilter
+from marulc.utils import calculate_checksum
+from marulc.can import FastPacketBucket
+from marulc.ais import AIS_SENTENCE_FORMATTERS, unpack_ais_sentence
+from marulc.exceptions import (
+    ParseError,
+    SentenceTypeError,
+    ChecksumError,
+    UnchangedMessageError,
+    MultiPacketError,
+    FilteredMessageError,
+)
 
-# Read Sentence Formatter definitions from file
+# Sentence Formatter definitions, read from file on first use
 DB_PATH = Path(__file__).parent / "nmea0183_sentence_formatters.json"
-with DB_PATH.open() as f_handle:
-    db = json.load(f_handle)
+db = LazyDatabase(lambda: load_database(DB_PATH))
+
+STANDARD_SENTENCE_FORMATTERS: MutableMapping[str, dict] = LazyDatabase(
+    lambda: db["Standard"]
+)
+PROPRIETARY_SENTENCE_FORMATTERS: MutableMapping[str, dict] = LazyDatabase(
+    lambda: db["Proprietary"]
+)
+
+# (identifier, definition) of a proprietary sentence
+ProprietaryDefinition = Tuple[str, dict]
+
+
+def index_proprietary_sentences(
+    formatters: Mapping[str, dict]
+) -> Dict[str, Dict[str, Dict[str, ProprietaryDefinition]]]:
+    """Index the proprietary sentence definitions of each manufacturer by every
+    split of their identifiers into a leading and a trailing part, i.e. "RATT" by
+    "" + "RATT", "R" + "ATT", ... and "RATT" + "", so that definitions are resolved
+    straight from the first two raw data elements of a sentence
+
+    Args:
+        formatters (Mapping[str, dict]): Proprietary definitions by manufacturer
+
+    Returns:
+        Dict[str, Dict[str, Dict[str, ProprietaryDefinition]]]: Manufacturer,
+            leading part and trailing part mapped to (identifier, definition)
+    """
+    index: Dict[str, Dict[str, Dict[str, ProprietaryDefinition]]] = {}
+    for manufacturer, manufacturer_def in formatters.items():
+        prefixes = index.setdefault(manufacturer, {})
+        for identifier, definition in manufacturer_def["Sentences"].items():
+            for split in range(len(identifier) + 1):
+                prefixes.setdefault(identifier[:split], {})[identifier[split:]] = (
+                    identifier,
+                    definition,
+                )
+    return index
+
+
+# Proprietary definitions indexed by index_proprietary_sentences, on first use
+PROPRIETARY_SENTENCE_INDEX: Mapping[
+    str, Dict[str, Dict[str, ProprietaryDefinition]]
+] = LazyDatabase(lambda: index_proprietary_sentences(PROPRIETARY_SENTENCE_FORMATTERS))
+
+# Indexed again once proprietary definitions are added, replaced or removed
+PROPRIETARY_SENTENCE_FORMATTERS.observe(lambda _: PROPRIETARY_SENTENCE_INDEX.reset())
+
+
+def find_proprietary_definition(
+    manufacturer: str, data: List[str]
+) -> Optional[ProprietaryDefinition]:
+    """Find the definition of a proprietary sentence by its raw data elements,
+    identified by the first two data elements joined or, failing that, the first
+    one alone, i.e. "R" and "ATT" of "$PASHR,ATT,..." or "E" of "$PGRME,15.0,...".
+
+    Args:
+        manufacturer (str): Manufacturer acronym
+        data (List[str]): Raw data elements
+
+    Returns:
+        Optional[ProprietaryDefinition]: (identifier, definition), None if there is
+            no such definition
+    """
+    prefixes = PROPRIETARY_SENTENCE_INDEX.get(manufacturer)
+    if prefixes is None or not data:
+        return None
 
-STANDARD_SENTENCE_FORMATTERS = db["Standard"]
-PROPRIETARY_SENTENCE_FORMATTERS = db["Proprietary"]
+    suffixes = prefixes.get(data[0])
+    if suffixes is None:
+        return None
+    if len(data) > 1 and data[1] in suffixes:
+        return suffixes[data[1]]
+    return suffixes.get("")
+
+
+def _proprietary_label(data: List[str]) -> str:
+    """Identifier of a proprietary sentence unpacked by a custom formatter, the
+    first data element joined with the second one unless numeric"""
+    first = data[0] if data else ""
+    second = data[1] if len(data) > 1 else ""
+    return first + (second if isinstance(parse_value(second), str) else "")
 
 
 def get_description_for_sentence_formatter(sentence_formatter: str) -> dict:
@@ -43,8 +148,8 @@ def get_description_for_sentence_formatter(sentence_formatter: str) -> dict:
 # REGEXes
 SENTENCE_REGEX = re.compile(
     r"""
-    # start of string, optional whitespace, optional '$'
-    ^\s*\$?
+    # start of string, optional whitespace, optional '$' or '!' (encapsulation)
+    ^\s*[$!]?
 
     # message (from '$' or start to checksum or end, non-inclusve)
     (?P<nmea_str>
@@ -80,61 +185,177 @@ QUERY_REGEX = re.compile(
 )
 PROPRIETARY_REGEX = re.compile(r"^P(?P<manufacturer>\w{3})$")
 
+# Kinds of sentences, as classified by tokenize_sentence
+TALKER = "talker"
+QUERY = "query"
+PROPRIETARY = "proprietary"
+
+# (nmea_str, sentence_type, data, checksum, kind)
+Tokens = Tuple[str, str, str, Optional[str], Optional[str]]
+
+_HEX_DIGITS = "0123456789abcdefABCDEF"
+_CHECKSUMS = frozenset(high + low for high in _HEX_DIGITS for low in _HEX_DIGITS)
+
+# Start of a sentence (6 characters following "$") mapped to (kind, sentence type)
+_SENTENCE_TYPES: Dict[str, Tuple[str, str]] = {}
+_MAX_SENTENCE_TYPES = 1024
+
+
+def _is_word(chars: str) -> bool:
+    # Stricter than \w, anything else is left to the regexes
+    return chars.isalnum() and chars.isascii()
+
+
+def _classify(head: str) -> Optional[Tuple[str, str]]:
+    """Classify a sentence by the (up to 9) characters of its start, in the same
+    order of precedence as SENTENCE_REGEX"""
+    if head[:1] in ("P", "p") and len(head) >= 4 and _is_word(head[1:4]):
+        return PROPRIETARY, head[:4].upper()
+    if (
+        len(head) == 9
+        and head[4] in ("Q", "q")
+        and head[5] == ","
+        and _is_word(head[:4])
+        and _is_word(head[6:])
+    ):
+        return QUERY, head.upper()
+    if len(head) >= 6 and head[5] == "," and _is_word(head[:5]):
+        return TALKER, head[:6].upper()
+    return None
+
+
+def _tokenize_fast(line: str) -> Optional[Tokens]:
+    """Tokenize plain, well-formed sentences using fixed positions only, None
+    for anything else"""
+    start = line.find("$") + 1 or line.find("!") + 1
+    if start != 1 and (not start or not line[: start - 1].isspace()):
+        return None
+
+    end = line.find("*", start)
+    if end < 0:
+        # Like SENTENCE_REGEX, the data runs until the end of the line
+        end = len(line)
+        checksum = None
+    else:
+        checksum = line[end + 1 : end + 3]
+        rest = line[end + 3 :]
+        if checksum not in _CHECKSUMS or (rest and not rest.isspace()):
+            return None
+
+    key = line[start : start + 6]
+    classified = _SENTENCE_TYPES.get(key)
+    if classified is None:
+        classified = _classify(line[start : min(start + 9, end)])
+        if classified is None:
+            return None
+        # Whether a talker sentence is a query depends on more than the key
+        if len(_SENTENCE_TYPES) < _MAX_SENTENCE_TYPES and key[4:5] not in "Qq":
+            _SENTENCE_TYPES[key] = classified
+
+    kind, sentence_type = classified
+    return (
+        line[start:end],
+        sentence_type,
+        line[start + len(sentence_type) : end],
+        checksum,
+        kind,
+    )
 
-def calculate_checksum(nmea_str: str) -> int:
-    """Calculate checksum from inputted raw nmea string
 
-    Args:
-        nmea_str (str): Raw received nmea string
+def _tokenize_with_regex(line: str) -> Tokens:
+    match = SENTENCE_REGEX.match(line)
+    if not match:
+        raise ParseError("could not parse data", line)
 
-    Returns:
-        int: Calculated checksum
-    """
-    return reduce(operator.xor, map(ord, nmea_str), 0)
+    sentence_type = match.group("sentence_type").upper()
+    if TALKER_REGEX.match(sentence_type):
+        kind = TALKER
+    elif QUERY_REGEX.match(sentence_type):
+        kind = QUERY
+    elif PROPRIETARY_REGEX.match(sentence_type):
+        kind = PROPRIETARY
+    else:
+        kind = None
+
+    return (
+        match.group("nmea_str"),
+        sentence_type,
+        match.group("data"),
+        match.group("checksum"),
+        kind,
+    )
 
 
-def parse_value(value: str) -> Union[str, int, float]:
-    """Parses a value to either str, int or float depending on format
+def tokenize_sentence(line: str) -> Tokens:
+    """Split a raw NMEA0183 sentence into its parts. Plain sentences are split
+    using fixed positions only, anything unusual is left to SENTENCE_REGEX, with
+    the same outcome.
 
     Args:
-        value (str): Inputted raw string
+        line (str): Raw NMEA0183 sentence
+
+    Raises:
+        ParseError: If the sentence is malformed
 
     Returns:
-        Union[str, int, float]: Parsed output
+        Tokens: The sentence without "$" (or "!") and checksum, the upper-cased sentence
+            type (i.e. "GPGGA,", "CCGPQ,GGA" or "PCDI"), the data following the
+            sentence type, the checksum if any and the kind of sentence (TALKER,
+            QUERY, PROPRIETARY or None if neither)
     """
-    try:
-        value = float(value)
-        value = int(value) if value.is_integer() else value
-    except ValueError:
-        # Keep as string
-        pass
-    return value
+    return _tokenize_fast(line) or _tokenize_with_regex(line)
 
 
-def unpack_using_definition(definition: dict, data: list) -> dict:
+def unpack_using_definition(
+    definition: dict,
+    data: list,
+    lazy: bool = False,
+    conversion: Conversion = DEFAULT_CONVERSION,
+) -> dict:
     """Unpack a list of data elements using the provided definition
 
     Args:
         definition (dict): Definition describing how the data should be interpreted
         data (list): Raw data elements
+        lazy (bool, optional): Whether to parse each field on first access, using
+            a SentenceFields mapping, instead of parsing all fields at once.
+            Defaults to False.
+        conversion (Conversion, optional): How to convert the data elements, see
+            marulc.converters.Conversion. Defaults to DEFAULT_CONVERSION, parsing
+            each using parse_value.
 
     Returns:
         dict: Unpacked data including parsed values and descriptions
     """
-    out = {"Fields": {}}
+    converters = compile_converters(definition, conversion)
 
-    for field, value in zip(definition["Fields"], data):
-        out["Fields"][field["Id"]] = parse_value(value)
+    if lazy:
+        parsers = tuple(convert for _, convert in converters)
+        return {"Fields": SentenceFields(definition, data, parsers)}
 
-    return out
+    return {
+        "Fields": {
+            field_id: convert(value)
+            for (field_id, convert), value in zip(converters, data)
+        }
+    }
 
 
-def unpack_using_proprietary(manufacturer: str, data: str) -> dict:
+def unpack_using_proprietary(
+    manufacturer: str,
+    data: str,
+    lazy: bool = False,
+    conversion: Conversion = DEFAULT_CONVERSION,
+) -> dict:
     """Unpack a raw, proprietary message based on knowledge about the manufacturer
 
     Args:
         manufacturer (str): Manufacturer acronym
         data (str): Raw data elements
+        lazy (bool, optional): Whether to parse each field on first access.
+            Defaults to False.
+        conversion (Conversion, optional): How to convert the data elements.
+            Defaults to DEFAULT_CONVERSION.
 
     Raises:
         ParseError: If a definition could not be found for this proprietary message
@@ -142,30 +363,31 @@ def unpack_using_proprietary(manufacturer: str, data: str) -> dict:
     Returns:
         dict: Unpacked data including parsed values and descriptions
     """
-    manufacturer_def = PROPRIETARY_SENTENCE_FORMATTERS[manufacturer]
+    found = find_proprietary_definition(manufacturer, data)
 
-    # Try to figure out the identifier of the message type
-    first = parse_value(data[0])
-    second = parse_value(data[1])
-    identifier = first + (second if isinstance(second, str) else "")
-
-    if identifier in manufacturer_def["Sentences"]:
-        definition = manufacturer_def["Sentences"][identifier]
-        out = unpack_using_definition(definition, data)
+    if found is not None:
+        identifier, definition = found
+        out = unpack_using_definition(definition, data, lazy, conversion)
         out["Talker"] = manufacturer
         out["Formatter"] = identifier
         return out
 
     raise ParseError(
         "Could not find a definition for this proprietary sentence",
-        list(manufacturer, identifier, *data),
+        ",".join([manufacturer, *data]),
     )
 
 
-def unpack_nmea0183_message(  # pylint: disable=too-many-locals, too-many-statements
+def unpack_nmea0183_message(  # pylint: disable=too-many-locals, too-many-statements, too-many-arguments
     line: str,
     standard_custom_formatters: Optional[Dict[str, Callable]] = None,
     proprietary_custom_formatters: Optional[Dict[str, Callable]] = None,
+    lazy: bool = False,
+    change_filter: Optional[ChangeFilter] = None,
+    *,
+    verify_checksum: bool = True,
+    conversion: Conversion = DEFAULT_CONVERSION,
+    fragments: Optional[MutableMapping] = None,
 ) -> dict:
     """Parses a string representing a NMEA 0183 sentence, and returns a
     python dictionary with the unpacked sentence
@@ -178,30 +400,44 @@ def unpack_nmea0183_message(  # pylint: disable=too-many-locals, too-many-statem
         proprietary_custom_formatters (Optional[Dict[str, Callable]]): Dict with custom sentence
             formatters. Keys are sentence formatter strings (ex. 'PGN') and values are
             callables returning a parsed message for the specific sentence formatter.
+        lazy (bool, optional): Whether to parse the "Fields" of sentences unpacked
+            using the bundled definitions on first access only. "Talker" and
+            "Formatter" are always available. Defaults to False.
+        change_filter (Optional[ChangeFilter], optional): Only unpack sentences
+            whose data changed since the last sentence with the same talker and
+            formatter, using the bundled definitions. Defaults to None.
+        verify_checksum (bool, optional): Whether to verify the checksum, if any.
+            Skip for trusted links or sentences already verified in bulk, see
+            marulc.batch.verify_checksums. Defaults to True.
+        conversion (Conversion, optional): How to convert the data elements of
+            sentences unpacked using the bundled definitions, i.e. according to
+            the types of their fields, see marulc.converters.Conversion. Defaults
+            to DEFAULT_CONVERSION, parsing each using parse_value.
+        fragments (Optional[MutableMapping], optional): Temporary storage for
+            partly assembled AIS messages of !AIVDM and !AIVDO sentences, typically
+            a FastPacketBucket, see marulc.ais. Defaults to None, meaning that only
+            single-fragment AIS messages can be unpacked.
 
     Raises:
         ParseError:
             If parsing of message fails
         ChecksumError:
-            If checksum does not match
+            If checksum does not match, unless verify_checksum is False
         SentenceTypeError:
             If the inputted NMEA sentence is of a type that is not supported
+        UnchangedMessageError:
+            If the data of the sentence is unchanged, see change_filter
+        MultiPacketError:
+            If the sentence is a fragment of an AIS message that is not yet
+            complete, or is discarded
 
     Returns:
         dict: Complete unpacked message
     """
-    match = SENTENCE_REGEX.match(line)
-    if not match:
-        raise ParseError("could not parse data", line)
-
-    # Unpack groups
-    nmea_str = match.group("nmea_str")
-    data_str = match.group("data")
-    checksum = match.group("checksum")
-    sentence_type = match.group("sentence_type").upper()
+    nmea_str, sentence_type, data_str, checksum, kind = tokenize_sentence(line)
     data = data_str.split(",")
 
-    if checksum:
+    if checksum and verify_checksum:
         cs1 = int(checksum, 16)
         cs2 = calculate_checksum(nmea_str)
         if cs1 != cs2:
@@ -210,10 +446,9 @@ def unpack_nmea0183_message(  # pylint: disable=too-many-locals, too-many-statem
             )
 
     # Is this a regular NMEA0183 sentence?
-    talker_match = TALKER_REGEX.match(sentence_type)
-    if talker_match:
-        talker = talker_match.group("talker")
-        sentence_formatter = talker_match.group("sentence_formatter")
+    if kind == TALKER:
+        talker = sentence_type[:2]
+        sentence_formatter = sentence_type[2:5]
 
         # Check if we have a custom formatter for this sentence
         formatters = standard_custom_formatters or {}
@@ -223,9 +458,17 @@ def unpack_nmea0183_message(  # pylint: disable=too-many-locals, too-many-statem
             output["Formatter"] = sentence_formatter
             return output
 
+        if sentence_formatter in AIS_SENTENCE_FORMATTERS:
+            return unpack_ais_sentence(sentence_type, data, fragments)
+
         if sentence_formatter in STANDARD_SENTENCE_FORMATTERS:
+            if change_filter is not None and not change_filter.changed(
+                (talker, sentence_formatter), data_str
+            ):
+                raise UnchangedMessageError("Unchanged sentence", nmea_str)
+
             definition = STANDARD_SENTENCE_FORMATTERS[sentence_formatter]
-            output = unpack_using_definition(definition, data)
+            output = unpack_using_definition(definition, data, lazy, conversion)
             output["Talker"] = talker
             output["Formatter"] = sentence_formatter
             return output
@@ -235,34 +478,32 @@ def unpack_nmea0183_message(  # pylint: disable=too-many-locals, too-many-statem
         )
 
     # Is this a query sentence?
-    query_match = QUERY_REGEX.match(sentence_type)
-    if query_match and not data_str:
+    if kind == QUERY and not data_str:
         raise SentenceTypeError("Query sentences not supported!", nmea_str)
 
     # Is this a proprietary sentence?
-    proprietary_match = PROPRIETARY_REGEX.match(sentence_type)
-    if proprietary_match:
-        manufacturer = proprietary_match.group("manufacturer")
-
-        # Try to figure out the identifier of the message type
-        first = parse_value(data[0])
-        second = parse_value(data[1])
-        identifier = first + (second if isinstance(second, str) else "")
+    if kind == PROPRIETARY:
+        manufacturer = sentence_type[1:4]
 
         # Check if we have a custom formatter for this sentence
         formatters = proprietary_custom_formatters or {}
         if manufacturer in formatters:
             output = formatters[manufacturer](data)
             output["Talker"] = manufacturer
-            output["Formatter"] = identifier
+            output["Formatter"] = _proprietary_label(data)
             return output
 
         # Otherwise, try our library of proprietary sentences
-        manufacturer_def = PROPRIETARY_SENTENCE_FORMATTERS.get(manufacturer)
+        found = find_proprietary_definition(manufacturer, data)
 
-        if manufacturer_def and (identifier in manufacturer_def["Sentences"]):
-            definition = manufacturer_def["Sentences"][identifier]
-            out = unpack_using_definition(definition, data)
+        if found is not None:
+            identifier, definition = found
+            if change_filter is not None and not change_filter.changed(
+                (manufacturer, identifier), data_str
+            ):
+                raise UnchangedMessageError("Unchanged sentence", nmea_str)
+
+            out = unpack_using_definition(definition, data, lazy, conversion)
             out["Talker"] = manufacturer
             out["Formatter"] = identifier
             return out
@@ -274,14 +515,54 @@ def unpack_nmea0183_message(  # pylint: disable=too-many-locals, too-many-statem
     raise ParseError("Malformed NMEA0183 sentence!", nmea_str)
 
 
+class UnpackedBuffer(NamedTuple):
+    """Outcome of unpacking a buffer of sentences, see NMEA0183Parser.unpack_buffer"""
+
+    messages: List[dict]
+    # (index of the line in the buffer, exception)
+    errors: List[Tuple[int, Exception]]
+    # Incomplete last line, to be prepended to the next buffer
+    tail: bytes
+
+
 class NMEA0183Parser(RawParserBase):  # pylint: disable=too-few-public-methods
     """A parser for parsing raw NMEA0183 strings"""
 
-    def __init__(
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         custom_formatters: Optional[Sequence[Type[NMEA0183FormatterBase]]] = None,
+        lazy: bool = False,
+        change_filter: Optional[ChangeFilter] = None,
+        *,
+        verify_checksums: bool = True,
+        conversion: Conversion = DEFAULT_CONVERSION,
+        fragments: Optional[FastPacketBucket] = None,
     ) -> None:
+        """
+        Args:
+            custom_formatters (Optional[Sequence[Type[NMEA0183FormatterBase]]]):
+                Custom sentence formatters. Defaults to None.
+            lazy (bool, optional): Whether to parse the "Fields" of each message on
+                first access only, see unpack_nmea0183_message. Defaults to False.
+            change_filter (Optional[ChangeFilter], optional): Only unpack sentences
+                whose data changed, see unpack_nmea0183_message. Custom formatters
+                take their own change filters. Defaults to None.
+            verify_checksums (bool, optional): Whether to verify the checksums of
+                sentences. Disable for links that are already trusted, or when
+                sentences are verified in bulk beforehand. Defaults to True.
+            conversion (Conversion, optional): How to convert the data elements of
+                sentences, see unpack_nmea0183_message. Defaults to
+                DEFAULT_CONVERSION.
+            fragments (Optional[FastPacketBucket], optional): Storage for partly
+                assembled, multi-fragment AIS messages. Defaults to None, meaning
+                that a FastPacketBucket with default settings is used.
+        """
         super().__init__()
+        self._lazy = lazy
+        self._changes = change_filter
+        self._verify_checksums = verify_checksums
+        self._conversion = conversion
+        self._fragments = FastPacketBucket() if fragments is None else fragments
         self._standard_formatters = {}
         self._proprietary_formatters = {}
         custom_formatters = custom_formatters or []
@@ -295,6 +576,94 @@ class NMEA0183Parser(RawParserBase):  # pylint: disable=too-few-public-methods
                 raise ValueError("Unknown custom parser type!", type(fmt))
 
     def unpack(self, msg: str) -> dict:
+        return self._unpack(msg, self._verify_checksums)
+
+    def _unpack(self, msg: str, verify_checksum: bool) -> dict:
         return unpack_nmea0183_message(
-            msg, self._standard_formatters, self._proprietary_formatters
+            msg,
+            self._standard_formatters,
+            self._proprietary_formatters,
+            self._lazy,
+            self._changes,
+            verify_checksum=verify_checksum,
+            conversion=self._conversion,
+            fragments=self._fragments,
         )
+
+    def _verify_buffer(self, data: bytes, text: str) -> Optional[List[bool]]:
+        # Checksums of all lines at once, None if they are to be verified line by
+        # line: when disabled, without numpy or when bytes outside of ASCII were
+        # replaced and the decoded lines no longer match the bytes
+        if not self._verify_checksums or "\ufffd" in text:
+            return None
+
+        try:
+            # pylint: disable=import-outside-toplevel
+            from marulc.batch import verify_checksums
+        except ImportError:
+            return None
+
+        return verify_checksums(data).tolist()
+
+    def unpack_buffer(
+        self, data: Union[bytes, bytearray, memoryview]
+    ) -> UnpackedBuffer:
+        """Unpack all complete sentences of a block of bytes, as read from a serial
+        port or received in a datagram, in one call. The checksums of all complete
+        lines are verified in bulk, see marulc.batch.verify_checksums, and only the
+        lines that fail are verified again, one by one, to raise the ChecksumError.
+        Without numpy, every line is verified on its own. The lines are decoded at
+        once and split, rather than decoded line by line, and lines that fail to
+        unpack are collected instead of raised. MultiPacketErrors and filtered
+        messages are skipped, as are empty lines. Only "\\n" ends a line, a
+        preceding "\\r" is stripped.
+
+        .. highlight:: python
+        .. code-block:: python
+
+            from marulc import NMEA0183Parser
+
+            parser = NMEA0183Parser()
+            tail = b""
+
+            while True:
+                messages, errors, tail = parser.unpack_buffer(tail + serial.read(4096))
+                for msg in messages:
+                    print(msg)
+
+        Args:
+            data (Union[bytes, bytearray, memoryview]): Sentences terminated by
+                "\\r\\n" or "\\n", the last one possibly incomplete
+
+        Returns:
+            UnpackedBuffer: The unpacked messages, (index, ParseError) of each line
+                that failed to unpack, the index counting "\\n" line endings, and
+                the bytes following the last line ending. Bytes outside of ASCII
+                are replaced, and fail on the checksum, rather than raising
+                UnicodeDecodeError.
+        """
+        data = bytes(data)
+        end = data.rfind(b"\n") + 1
+        messages = []
+        errors = []
+
+        text = data[:end].decode("ascii", errors="replace")
+        valid = self._verify_buffer(data[:end], text)
+
+        lines = text.split("\n")
+        # The last item is the empty remainder following the last line ending
+        for index in range(len(lines) - 1):
+            line = lines[index].rstrip("\r")
+            if not line:
+                continue
+            try:
+                if valid is not None and valid[index]:
+                    messages.append(self._unpack(line, False))
+                else:
+                    messages.append(self.unpack(line))
+            except (MultiPacketError, FilteredMessageError):
+                pass
+            except ParseError as exc:
+                errors.append((index, exc))
+
+        return UnpackedBuffer(messages, errors, data[end:])
@@ -1,23 +1,148 @@
+# pylint: disable=too-many-lines
 """Containing functionality for unpacking binary n2k messages according to PGN-specific definitions
 """
-import json
 from pathlib import Path
+from functools import partial
 from binascii import unhexlify
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import bitstruct
 
 from marulc.parser_bases import RawParserBase
+from marulc.cache import DecodeCache
+from marulc.changes import ChangeFilter
+from marulc.database import LazyDatabase, load_database
+from marulc.lazy import PacketFields
+from marulc.fields import (  # pylint: disable=unused-import
+    BitfieldLookup,
+    EnumLookup,
+    compile_lookup,
+    field_sentinel,
+)
+from marulc.can import (  # pylint: disable=unused-import
+    CANFrame,
+    FastPacketBucket,
+    FrameFilter,
+    read_can_frames,
+    read_candump_log,
+)
 
 from marulc.exceptions import (
+    FilteredMessageError,
     MultiPacketDiscardedError,
+    MultiPacketError,
     MultiPacketInProcessError,
+    ParseError,
     PGNError,
+    UnchangedMessageError,
+)
+
+# Fast packets carry 6 payload bytes in the first frame and 7 in the rest
+FAST_PACKET_MAX_LENGTH = 6 + 31 * 7
+
+# Field types of variable length
+VARIABLE_LENGTH_TYPES = frozenset(
+    (
+        "ASCII or UNICODE string starting with length and control byte",
+        "ASCII string starting with length byte",
+        "String with start/stop byte",
+    )
 )
 
-# Read PGNs metadata from CANBOAT database
+# PGNs metadata from CANBOAT database, read on first use
 DB_PATH = Path(__file__).parent / "nmea2000_pgn_specifications.json"
-with DB_PATH.open() as f_handle:
-    PGN_DB = {item["PGN"]: item for item in json.load(f_handle)["PGNs"]}
+
+
+def _load_pgn_definitions() -> Dict[int, List[dict]]:
+    definitions: Dict[int, List[dict]] = {}
+    for item in load_database(DB_PATH)["PGNs"]:
+        definitions.setdefault(item["PGN"], []).append(item)
+    return definitions
+
+
+PGN_DEFINITIONS: MutableMapping[int, List[dict]] = LazyDatabase(_load_pgn_definitions)
+
+# Proprietary PGNs may have several definitions, told apart by the value of their
+# "Match" fields. PGN_DB holds the last definition of each PGN. Custom PGNs can be
+# added to either, definitions are replaced as a whole rather than changed in
+# place.
+PGN_DB: MutableMapping[int, dict] = LazyDatabase(
+    lambda: {pgn: definitions[-1] for pgn, definitions in PGN_DEFINITIONS.items()}
+)
+
+
+class DefinitionIndex(NamedTuple):
+    """Index for resolving which of several definitions sharing a PGN number that
+    applies to a payload, by the values of the "Match" fields of the definitions"""
+
+    peek_length: int
+    groups: Tuple[Tuple[Tuple[Tuple[int, int], ...], Dict[Tuple[int, ...], int]], ...]
+    default: Optional[int]
+    # Range of payload lengths, in bytes, that some definition can hold
+    min_length: int
+    max_length: int
+
+
+class PacketDecoder(NamedTuple):
+    """Pre-compiled, ready-to-use decoding information for a single PGN definition"""
+
+    pgn: int
+    id: str
+    variant: int
+    variants: int
+    packet_type: str
+    length: int
+    complete: bool
+    compiled_format: Optional[bitstruct.CompiledFormat]
+    field_ids: Tuple[str, ...]
+    scales: Tuple[Union[int, float], ...]
+    bit_offsets: Tuple[int, ...]
+    bit_lengths: Tuple[int, ...]
+    signed: Tuple[bool, ...]
+    total_bits: int
+    field_index: Dict[str, int]
+    lookups: Dict[int, Mapping[int, Any]]
+    sentinels: Tuple[int, ...]
+
+
+DecodeFunction = Callable[[bytes], dict]
+
+
+# Registry of pre-compiled decoders, filled lazily or by warm_packet_decoders.
+# Keyed by PGN number for the default definition and by (PGN number, variant)
+# for definitions resolved through a DefinitionIndex.
+_PACKET_DECODERS: Dict[Hashable, PacketDecoder] = {}
+
+# Registry of generated decode functions, filled lazily by get_decode_function
+_DECODE_FUNCTIONS: Dict[Tuple[int, int, bool], DecodeFunction] = {}
+
+
+def unpack_can_id(can_id: int) -> Tuple[int, int, int]:
+    """Unpack a 29-bit CAN identifier into priority, PGN number and source address.
+    See https://www.kvaser.com/about-can/higher-layer-protocols/j1939-introduction/
+    for more details.
+
+    Args:
+        can_id (int): The 29-bit CAN identifier as an integer
+
+    Returns:
+        tuple (int, int, int): (Source address, PGN, priority)
+    """
+    return can_id & 0xFF, (can_id >> 8) & 0x3FFFF, (can_id >> 26) & 0x7
 
 
 def unpack_header(header: bytearray):
@@ -31,8 +156,7 @@ def unpack_header(header: bytearray):
     Returns:
         tuple (int, int, int): (Source address, PGN, priority)
     """
-    prio, pgn, source_address = bitstruct.unpack(">u6u18u8", header)
-    return source_address, pgn, prio
+    return unpack_can_id(int.from_bytes(header[:4], "big"))
 
 
 def get_description_for_pgn(pgn: int) -> dict:
@@ -52,7 +176,13 @@ def get_description_for_pgn(pgn: int) -> dict:
     return descr
 
 
-def process_sub_packet(pgn: int, address: int, data: bytearray, bucket: dict):
+def process_sub_packet(
+    pgn: int,
+    address: int,
+    data: bytearray,
+    bucket: MutableMapping,
+    timestamp: Optional[float] = None,
+):
     """Process a single subpacket part of a multi-packet n2k message. The following
     description of the protocol is taken from CANBOAT:
 
@@ -70,7 +200,11 @@ def process_sub_packet(pgn: int, address: int, data: bytearray, bucket: dict):
         pgn (int): PGN number
         address (int): Source address of message
         data (bytearray): Raw binary packet data
-        bucket (dict): Reference to temporary storage for partly parsed messages
+        bucket (MutableMapping): Reference to temporary storage for partly parsed
+            messages, typically a FastPacketBucket
+        timestamp (Optional[float], optional): Timestamp of this frame, used for
+            expiring stale sequences in a FastPacketBucket. Defaults to None,
+            meaning that the clock of the bucket is used.
 
     Raises:
         MultiPacketDiscardedError: If this subpacket is discarded due to missing
@@ -81,41 +215,63 @@ def process_sub_packet(pgn: int, address: int, data: bytearray, bucket: dict):
     Returns:
         bytearray: Complete, raw binary message stitched together from multiple subpackets
     """
-    data = data[::-1]
-    length = len(data) * 8  # bits
-    order, idx = bitstruct.unpack(f">P{length - 8}u3u5", data)
-    hashed_id = hash((pgn, address, order))
+    order, idx = data[0] >> 5, data[0] & 0x1F
+    sequence_id = (pgn, address, order)
+
+    if isinstance(bucket, FastPacketBucket):
+        bucket.expire(timestamp)
 
     # Too late to the party
-    if idx > 0 and hashed_id not in bucket:
+    if idx > 0 and sequence_id not in bucket:
         raise MultiPacketDiscardedError
 
     # First message in a new sequence
     if idx == 0:
-        (payload,) = bitstruct.unpack(">r48P16", data)
-        bucket[hashed_id] = {"payload": payload, "counter": 1}
-        raise MultiPacketInProcessError
-
-    # Fetch existing bucket
-    buffer = bucket[hashed_id]
-
-    # Check for fck-up
-    if buffer["counter"] != idx:
-        # Dropped sub-package
-        del bucket[hashed_id]
-        raise MultiPacketDiscardedError
-
-    # Still on track, append this payload to existing one!
-    (payload,) = bitstruct.unpack(f">r{length - 8}P8", data)
-    buffer["payload"] = payload + buffer["payload"]
-    buffer["counter"] += 1
+        # Preallocate room for all sub-packets, 6 bytes in the first and 7 in the rest
+        total_length = packet_total_length(pgn)
+        index = DEFINITION_INDEX.get(pgn)
+        if index is not None:
+            # The definitions sharing this PGN may differ in length, trust the
+            # sender as long as some definition can hold the stated length
+            total_length = data[1]
+            if not index.min_length <= total_length <= index.max_length:
+                raise ParseError(
+                    f"Fast packet length {total_length} out of range for PGN {pgn}",
+                    data,
+                )
+        payload = bytearray(6 + 7 * max(0, -(-(total_length - 6) // 7)))
+        received = len(data) - 2
+        payload[:received] = memoryview(data)[2:]
+        buffer = bucket[sequence_id] = {
+            "payload": payload,
+            "counter": 1,
+            "received": received,
+            "length": total_length,
+        }
+
+    else:
+        # Fetch existing bucket
+        buffer = bucket[sequence_id]
+
+        # Check for fck-up
+        if buffer["counter"] != idx:
+            # Dropped sub-package
+            del bucket[sequence_id]
+            raise MultiPacketDiscardedError
+
+        # Still on track, write this payload at its offset in the existing one!
+        offset = 7 * idx - 1
+        received = len(data) - 1
+        buffer["payload"][offset : offset + received] = memoryview(data)[1:]
+        buffer["received"] += received
+        buffer["counter"] += 1
 
     # Check if we are done with this specific sequence
-    total_length = packet_total_length(pgn)
-    if len(buffer["payload"]) >= total_length:
-        final_payload = buffer["payload"]
-        del bucket[hashed_id]  # Clean up
-        return final_payload[::-1][:total_length]
+    if buffer["received"] >= buffer["length"]:
+        del bucket[sequence_id]  # Clean up
+        payload = buffer["payload"]
+        del payload[buffer["length"] :]  # In-place, no copy
+        return payload
 
     raise MultiPacketInProcessError
 
@@ -144,68 +300,714 @@ def packet_total_length(pgn: int) -> int:
     return PGN_DB[pgn]["Length"]
 
 
-def packet_field_decoder(pgn: int) -> bitstruct.CompiledFormat:
-    """Returns a pre-compiled bit field decoder for the message definition
-    associated with this PGn number
+def definition_fields(definition: dict) -> List[dict]:
+    """Returns the list of field definitions of a PGN definition. A few
+    definitions in the CANBOAT database holds a single field as
+    ``{"Field": {...}}`` instead of a list, these are normalized here.
+
+    Args:
+        definition (dict): PGN definition as found in PGN_DB
+
+    Returns:
+        List[dict]: Field definitions, in order
+    """
+    fields = definition.get("Fields", [])
+    if isinstance(fields, dict):
+        return list(fields.values())
+    return fields
+
+
+def definition_length_range(definition: dict) -> Tuple[int, int]:
+    """Returns the range of payload lengths of a PGN definition. Definitions with
+    repeating fields or variable length strings hold a fixed part followed by up
+    to the maximal fast packet payload, 223 bytes.
+
+    Args:
+        definition (dict): PGN definition as found in PGN_DEFINITIONS
+
+    Returns:
+        Tuple[int, int]: Minimal and maximal length in bytes
+    """
+    fields = definition_fields(definition)
+    repeating = definition.get("RepeatingFields") or 0
+    fixed_bits = 0
+
+    for position, field in enumerate(fields):
+        if (
+            "BitOffset" not in field
+            or field.get("Type") in VARIABLE_LENGTH_TYPES
+            or (repeating and position >= len(fields) - repeating)
+        ):
+            # Fields from here on are of variable length, or at variable offsets
+            return (fixed_bits + 7) // 8, FAST_PACKET_MAX_LENGTH
+        fixed_bits = field["BitOffset"] + field["BitLength"]
+
+    return definition["Length"], definition["Length"]
+
+
+def compile_definition_index(definitions: List[dict]) -> DefinitionIndex:
+    """Compile an index resolving which of several definitions of the same PGN
+    applies to a payload. Definitions are grouped by the positions of their "Match"
+    fields, each group holding a dict from match values to definition. Groups
+    are tried from the most to the least specific one.
+
+    Args:
+        definitions (List[dict]): All definitions sharing a single PGN number
+
+    Returns:
+        DefinitionIndex: Compiled index
+    """
+    groups: Dict[Tuple[Tuple[int, int], ...], Dict[Tuple[int, ...], int]] = {}
+    default = None
+    peek_length = 0
+
+    for variant, definition in enumerate(definitions):
+        matches = [field for field in definition_fields(definition) if "Match" in field]
+        if not matches:
+            default = variant
+            continue
+
+        slots = tuple(
+            (field["BitOffset"], (1 << field["BitLength"]) - 1) for field in matches
+        )
+        values = tuple(field["Match"] for field in matches)
+        peek_length = max(
+            peek_length,
+            *((field["BitOffset"] + field["BitLength"] + 7) // 8 for field in matches),
+        )
+
+        table = groups.setdefault(slots, {})
+        # Prefer complete definitions in case several share the same match values
+        if values not in table or not definitions[table[values]]["Complete"]:
+            table[values] = variant
+
+    lengths = [definition_length_range(definition) for definition in definitions]
+    return DefinitionIndex(
+        peek_length=peek_length,
+        groups=tuple(sorted(groups.items(), key=lambda item: -len(item[0]))),
+        default=default,
+        min_length=max(1, min(low for low, _ in lengths)),
+        max_length=min(FAST_PACKET_MAX_LENGTH, max(high for _, high in lengths)),
+    )
+
+
+# Pre-computed indexes for all PGN numbers with several definitions, compiled on
+# first use
+DEFINITION_INDEX: Mapping[int, DefinitionIndex] = LazyDatabase(
+    lambda: {
+        pgn: compile_definition_index(definitions)
+        for pgn, definitions in PGN_DEFINITIONS.items()
+        if len(definitions) > 1
+    }
+)
+
+
+def _pgn_definitions_changed(pgn: int) -> None:
+    # Keep PGN_DB in line and drop everything compiled from the old definitions
+    if PGN_DB.loaded:
+        if pgn in PGN_DEFINITIONS:
+            PGN_DB.data[pgn] = PGN_DEFINITIONS[pgn][-1]
+        else:
+            PGN_DB.data.pop(pgn, None)
+
+    DEFINITION_INDEX.reset()
+    for key in list(_PACKET_DECODERS):
+        if key == pgn or (isinstance(key, tuple) and key[0] == pgn):
+            del _PACKET_DECODERS[key]
+    for key in [key for key in _DECODE_FUNCTIONS if key[0] == pgn]:
+        del _DECODE_FUNCTIONS[key]
+
+
+def _pgn_db_changed(pgn: int) -> None:
+    # A definition set in PGN_DB replaces all definitions of the PGN
+    if pgn in PGN_DB:
+        PGN_DEFINITIONS[pgn] = [PGN_DB[pgn]]
+    else:
+        PGN_DEFINITIONS.pop(pgn, None)
+
+
+PGN_DEFINITIONS.observe(_pgn_definitions_changed)
+PGN_DB.observe(_pgn_db_changed)
+
+
+def resolve_definition(pgn: int, data: bytes) -> Optional[int]:
+    """Resolve which of the definitions of this PGN number that applies to a
+    payload, using a cheap peek at the "Match" fields in the start of the payload.
 
     Args:
         pgn (int): PGN number
+        data (bytes): Raw binary message, only the first few bytes are required
 
     Returns:
-        bitstruct.CompiledFormat: Pre-compiled bit field decoder
+        Optional[int]: Index into PGN_DEFINITIONS[pgn] or None if no definition
+            matches
     """
+    index = DEFINITION_INDEX.get(pgn)
+    if index is None:
+        return len(PGN_DEFINITIONS[pgn]) - 1 if pgn in PGN_DEFINITIONS else None
+
+    raw = int.from_bytes(data[: index.peek_length], "little")
+    for slots, table in index.groups:
+        variant = table.get(tuple((raw >> offset) & mask for offset, mask in slots))
+        if variant is not None:
+            return variant
+
+    return index.default
+
+
+def compile_packet_decoder(
+    definition: dict, variant: int = 0, variants: int = 1
+) -> PacketDecoder:
+    """Compile a decoder for a PGN definition
+
+    Args:
+        definition (dict): PGN definition as found in PGN_DEFINITIONS
+        variant (int, optional): Index of the definition among all definitions
+            sharing this PGN number. Defaults to 0.
+        variants (int, optional): Number of definitions sharing this PGN number.
+            Defaults to 1.
+
+    Returns:
+        PacketDecoder: Pre-compiled decoder
+    """
+    fields = definition_fields(definition)
+
     bits = ""
-    for field in PGN_DB[pgn]["Fields"]:
+    offsets = []
+    total_bits = 0
+    for field in fields:
         length = field["BitLength"]
         signed = field["Signed"]
         bits = f"{'s' if signed else 'u'}{length}" + bits
+        offsets.append(total_bits)
+        total_bits += length
+
+    # Definitions sharing a PGN number are told apart by match fields counted from
+    # the start of the payload, align all their fields with the start of the
+    # payload. Other definitions keep their fields aligned with the end of the
+    # payload.
+    padding = -total_bits % 8
+    if variants > 1 and padding:
+        bits = f"p{padding}" + bits
+
+    try:
+        # Bigendian
+        compiled_format = bitstruct.compile(">" + bits)
+    except bitstruct.Error:
+        # Zero-length fields can not be expressed as a bitstruct format
+        compiled_format = None
+
+    # Last position wins for duplicate ids, as for the dict built when decoding
+    field_index = {field["Id"]: position for position, field in enumerate(fields)}
+
+    return PacketDecoder(
+        pgn=definition["PGN"],
+        id=definition["Id"],
+        variant=variant,
+        variants=variants,
+        packet_type=definition["Type"],
+        length=definition["Length"],
+        complete=definition["Complete"],
+        compiled_format=compiled_format,
+        field_ids=tuple(field["Id"] for field in fields),
+        scales=tuple(float(field.get("Resolution", 0)) or 1 for field in fields),
+        bit_offsets=tuple(offsets),
+        bit_lengths=tuple(field["BitLength"] for field in fields),
+        signed=tuple(field["Signed"] for field in fields),
+        total_bits=total_bits,
+        field_index=field_index,
+        lookups={
+            position: lookup
+            for position, lookup in enumerate(map(compile_lookup, fields))
+            # Only the field that ends up in the output, for duplicate ids
+            if lookup is not None and field_index[fields[position]["Id"]] == position
+        },
+        sentinels=tuple(field_sentinel(field) for field in fields),
+    )
+
+
+def get_packet_decoder(
+    pgn: int, data: Optional[bytes] = None
+) -> Optional[PacketDecoder]:
+    """Returns the pre-compiled decoder for this PGN number from the decoder
+    registry, compiling it on first use.
+
+    If the PGN number has several definitions and a payload is given, the
+    decoder of the definition matching the payload is returned. Otherwise, the
+    decoder of the default definition (as found in PGN_DB) is returned.
 
-    # Bigendian
-    bits = ">" + bits
+    Args:
+        pgn (int): PGN number
+        data (Optional[bytes], optional): Raw binary message. Defaults to None.
 
-    return bitstruct.compile(bits)
+    Returns:
+        Optional[PacketDecoder]: Pre-compiled decoder or None if PGN is unknown or
+            no definition matches the payload
+    """
+    if data is None or pgn not in DEFINITION_INDEX:
+        try:
+            return _PACKET_DECODERS[pgn]
+        except KeyError:
+            if pgn not in PGN_DB:
+                return None
+
+        definitions = PGN_DEFINITIONS[pgn]
+        decoder = _PACKET_DECODERS[pgn] = compile_packet_decoder(
+            PGN_DB[pgn], len(definitions) - 1, len(definitions)
+        )
+        return decoder
+
+    variant = resolve_definition(pgn, data)
+    if variant is None:
+        return None
+
+    try:
+        return _PACKET_DECODERS[(pgn, variant)]
+    except KeyError:
+        definitions = PGN_DEFINITIONS[pgn]
+        decoder = _PACKET_DECODERS[(pgn, variant)] = compile_packet_decoder(
+            definitions[variant], variant, len(definitions)
+        )
+        return decoder
+
+
+def get_complete_packet_decoder(
+    pgn: int, data: Optional[bytes] = None
+) -> Optional[PacketDecoder]:
+    """Returns the pre-compiled decoder for this PGN number, but only if its
+    definition is complete.
+
+    Without a payload, a PGN number with several definitions is accepted as long
+    as it has a default definition, its definitions are resolved when the
+    payload is known.
 
+    Args:
+        pgn (int): PGN number
+        data (Optional[bytes], optional): Raw binary message. Defaults to None.
 
-def unpack_fields(pgn: int, data: bytearray) -> dict:
-    """Unpack all fields of a complete binary message into a python dictionary
+    Returns:
+        Optional[PacketDecoder]: Pre-compiled decoder or None
+    """
+    decoder = get_packet_decoder(pgn, data)
+    if decoder is None or decoder.packet_type not in ("Single", "Fast"):
+        return None
+
+    if decoder.complete or (data is None and decoder.variants > 1):
+        return decoder
+
+    return None
+
+
+def warm_packet_decoders(pgns: Optional[Iterable[int]] = None) -> int:
+    """Eagerly fill the decoder registry, typically called once at startup to
+    avoid paying the compilation cost while decoding the first messages.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc.nmea2000 import warm_packet_decoders
+
+        warm_packet_decoders()  # All complete PGNs
+        warm_packet_decoders([127488, 127489])  # Only these
+
+    Args:
+        pgns (Optional[Iterable[int]], optional): PGN numbers to compile decoders
+            for. Defaults to None, meaning all complete PGNs.
+
+    Returns:
+        int: Number of decoders available in the registry for the requested PGNs
+    """
+    if pgns is None:
+        pgns = [pgn for pgn, definition in PGN_DB.items() if definition["Complete"]]
+
+    count = 0
+    for pgn in pgns:
+        if get_packet_decoder(pgn) is None:
+            continue
+
+        count += 1
+        for variant, definition in enumerate(PGN_DEFINITIONS[pgn]):
+            if pgn in DEFINITION_INDEX and (pgn, variant) not in _PACKET_DECODERS:
+                _PACKET_DECODERS[(pgn, variant)] = compile_packet_decoder(
+                    definition, variant, len(PGN_DEFINITIONS[pgn])
+                )
+
+    return count
+
+
+def generate_decode_function(  # pylint: disable=too-many-locals
+    decoder: PacketDecoder, sentinels: bool = False
+) -> DecodeFunction:
+    """Generate a specialised, straight-line decode function for a PGN.
+
+    The generated function reads the payload as a single little-endian integer
+    and extracts every field with a shift and a mask, building the output
+    dictionary in one pass. The output is identical to the output of the
+    bitstruct based decoder.
+
+    Args:
+        decoder (PacketDecoder): Pre-compiled decoder to generate a function for
+        sentinels (bool, optional): Whether fields holding a "data not available"
+            sentinel are returned as None. Defaults to False.
+
+    Returns:
+        DecodeFunction: Callable taking the raw payload and returning the fields
+    """
+    items = []
+    for field_id, offset, length, signed, scale, sentinel in zip(
+        decoder.field_ids,
+        decoder.bit_offsets,
+        decoder.bit_lengths,
+        decoder.signed,
+        decoder.scales,
+        decoder.sentinels,
+    ):
+        expr = f"(raw >> {offset})" if offset else "raw"
+        expr = f"({expr} & {(1 << length) - 1:#x})"
+
+        if signed and length:
+            sign_bit = 1 << (length - 1)
+            expr = f"(({expr} ^ {sign_bit:#x}) - {sign_bit:#x})"
+
+        # An int scale of 1 leaves the value untouched, the type included
+        scaling = "" if isinstance(scale, int) and scale == 1 else f" * {scale!r}"
+
+        if sentinels and sentinel < 1 << length:
+            expr = f"(None if (value := {expr}) >= {sentinel:#x} else value{scaling})"
+        else:
+            expr = f"{expr}{scaling}"
+
+        items.append(f"        {field_id!r}: {expr},")
+
+    total_bits = decoder.total_bits
+    # See compile_packet_decoder regarding the alignment of the fields
+    shift = f"len(data) * 8 - {total_bits}"
+    if decoder.variants > 1:
+        shift = f"min(0, {shift})"
+    source = "\n".join(
+        [
+            f"def decode_{decoder.pgn}_{decoder.variant}(data):",
+            f"    shift = {shift}",
+            "    if shift < 0:",
+            "        raise Error(",
+            f"            f'unpack requires at least {total_bits} bits to unpack '",
+            "            f'(got {len(data) * 8})'",
+            "        )",
+            "    raw = int.from_bytes(data, 'little') >> shift",
+            "    return {",
+            *items,
+            "    }",
+        ]
+    )
+
+    namespace = {"Error": bitstruct.Error}
+    exec(source, namespace)  # pylint: disable=exec-used
+    return namespace[f"decode_{decoder.pgn}_{decoder.variant}"]
+
+
+def get_decode_function(
+    decoder: PacketDecoder, sentinels: bool = False
+) -> DecodeFunction:
+    """Returns the generated decode function for this decoder, generating it
+    on first use
+
+    Args:
+        decoder (PacketDecoder): Pre-compiled decoder, see get_packet_decoder
+        sentinels (bool, optional): Whether fields holding a "data not available"
+            sentinel are returned as None. Defaults to False.
+
+    Returns:
+        DecodeFunction: Decode function
+    """
+    key = (decoder.pgn, decoder.variant, sentinels)
+    try:
+        return _DECODE_FUNCTIONS[key]
+    except KeyError:
+        function = _DECODE_FUNCTIONS[key] = generate_decode_function(decoder, sentinels)
+        return function
+
+
+def packet_field_decoder(pgn: int) -> bitstruct.CompiledFormat:
+    """Returns a pre-compiled bit field decoder for the message definition
+    associated with this PGn number
 
     Args:
         pgn (int): PGN number
-        data (bytearray): Complete, raw binary message as a bytearray
 
     Returns:
-        dict: Unpacked fields as a python dictionary
+        bitstruct.CompiledFormat: Pre-compiled bit field decoder
     """
+    return get_packet_decoder(pgn).compiled_format
 
-    # Fetch field decoder and unpack raw data
-    decoder = packet_field_decoder(pgn)
-    # Reverse twice to match field ordering in JSON
-    unpacked = decoder.unpack(data[::-1])[::-1]
 
-    output = {}
+def resolve_lookups(decoder: PacketDecoder, fields: dict) -> dict:
+    """Resolve the raw values of all lookup table and bitfield fields into names,
+    in place, using the lookup tables of the decoder
 
-    for value, field in zip(unpacked, PGN_DB[pgn]["Fields"]):
-        # Add parsed value, scaled according to "Resolution"
-        output[field["Id"]] = value * (float(field.get("Resolution", 0)) or 1)
+    Args:
+        decoder (PacketDecoder): Pre-compiled decoder used for decoding fields
+        fields (dict): Decoded fields
 
-    return output
+    Returns:
+        dict: The same fields, with names instead of raw values where known
+    """
+    field_ids = decoder.field_ids
+    for position, lookup in decoder.lookups.items():
+        field_id = field_ids[position]
+        fields[field_id] = lookup[fields[field_id]]
+
+    return fields
+
+
+def unpack_fields(  # pylint: disable=too-many-arguments
+    pgn: int,
+    data: bytearray,
+    compiled: bool = False,
+    lazy: bool = False,
+    lookups: bool = False,
+    *,
+    sentinels: bool = False,
+) -> Mapping[str, Any]:
+    """Unpack all fields of a complete binary message into a python dictionary
 
+    Args:
+        pgn (int): PGN number
+        data (bytearray): Complete, raw binary message as a bytearray, bytes or
+            memoryview
+        compiled (bool, optional): Whether to use the generated, straight-line
+            decode function instead of the bitstruct based decoder. Both yield
+            identical results. Defaults to False.
+        lazy (bool, optional): Whether to return a PacketFields mapping which
+            decodes each field on first access instead of a dictionary. Defaults
+            to False.
+        lookups (bool, optional): Whether to resolve lookup table fields into
+            names and bitfields into tuples of the names of the set bits, see
+            resolve_lookups. Defaults to False.
+        sentinels (bool, optional): Whether fields holding a "data not available",
+            "out of range" or "reserved" sentinel value are returned as None, see
+            field_sentinel. Defaults to False.
+
+    Raises:
+        PGNError: If no definition of this PGN number matches the message
+
+    Returns:
+        Mapping[str, Any]: Unpacked fields as a python dictionary or a
+            PacketFields mapping
+    """
+    if isinstance(data, memoryview):
+        # Reversed memoryviews are not contiguous, which bitstruct cannot handle
+        data = bytes(data)
 
-def unpack_complete_message(pgn: int, data: bytearray) -> dict:
+    # Fetch field decoder and unpack raw data
+    decoder = get_packet_decoder(pgn, data)
+    if decoder is None:
+        raise PGNError(f"No definition of PGN {pgn} matches this message", data)
+
+    if lazy:
+        return PacketFields(decoder, data, lookups, sentinels)
+
+    if compiled:
+        fields = get_decode_function(decoder, sentinels)(data)
+    else:
+        if decoder.compiled_format is None:
+            raise PGNError(f"Cant decode message with PGN {pgn} using bitstruct", data)
+
+        if decoder.variants > 1:
+            # Skip trailing bytes not covered by the fields, see compile_packet_decoder
+            data = data[: (decoder.total_bits + 7) // 8]
+
+        # Reverse twice to match field ordering in JSON
+        unpacked = decoder.compiled_format.unpack(data[::-1])[::-1]
+
+        # Add parsed values, scaled according to "Resolution"
+        if sentinels:
+            fields = {
+                field_id: None if value >= sentinel else value * scale
+                for field_id, value, scale, sentinel in zip(
+                    decoder.field_ids, unpacked, decoder.scales, decoder.sentinels
+                )
+            }
+        else:
+            fields = {
+                field_id: value * scale
+                for field_id, value, scale in zip(
+                    decoder.field_ids, unpacked, decoder.scales
+                )
+            }
+
+    return resolve_lookups(decoder, fields) if lookups else fields
+
+
+def unpack_complete_message(  # pylint: disable=too-many-arguments
+    pgn: int,
+    data: bytearray,
+    compiled: bool = False,
+    lazy: bool = False,
+    lookups: bool = False,
+    *,
+    sentinels: bool = False,
+) -> dict:
     """Unpack a complete n2k message associated with this PGN number
 
     Args:
         pgn (int): PGN number
         data (bytearray): Complete, raw binary message as a bytearray
+        compiled (bool, optional): Whether to use the generated decode functions.
+            Defaults to False.
+        lazy (bool, optional): Whether to decode the fields on first access, see
+            unpack_fields. Defaults to False.
+        lookups (bool, optional): Whether to resolve lookup table and bitfield
+            fields into names, see unpack_fields. Defaults to False.
+        sentinels (bool, optional): Whether fields holding sentinel values are
+            returned as None, see unpack_fields. Defaults to False.
 
     Returns:
         dict: Unpacked message as a python dictionary
     """
     return {
-        "Fields": unpack_fields(pgn, data),
+        "Fields": unpack_fields(
+            pgn, data, compiled, lazy, lookups, sentinels=sentinels
+        ),
     }
 
 
+class MessageUnpacker:
+    """The steps of unpacking an NMEA2000 message shared by NMEA2000Parser and the
+    formatters of NMEA2000 messages wrapped in NMEA0183 sentences, MXPGN and PCDIN:
+    filtering, decoder selection, fast packet reassembly, change detection and
+    caching.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc.nmea2000 import FrameFilter, MessageUnpacker
+
+        unpacker = MessageUnpacker(frame_filter=FrameFilter(pgns=[127245]))
+
+        decoder = unpacker.decoder(127245, 10, "09F10D0A")
+        msg = unpacker.unpack(decoder, 10, bytes.fromhex("FF000000FF7FFFFF"), "09F10D0A")
+    """
+
+    __slots__ = ("_bucket", "_filter", "_cache", "_changes", "_unpack_message")
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        *,
+        compiled: bool = False,
+        bucket: Optional[FastPacketBucket] = None,
+        lazy: bool = False,
+        frame_filter: Optional[FrameFilter] = None,
+        lookups: bool = False,
+        sentinels: bool = False,
+        cache: Optional[DecodeCache] = None,
+        change_filter: Optional[ChangeFilter] = None,
+    ) -> None:
+        """
+        Args:
+            compiled (bool, optional): See unpack_fields. Defaults to False.
+            bucket (Optional[FastPacketBucket], optional): Storage for partly
+                reassembled fast packet messages. Defaults to None, meaning that
+                payloads are always complete messages.
+            lazy (bool, optional): See unpack_fields. Defaults to False.
+            frame_filter (Optional[FrameFilter], optional): Only unpack messages
+                passing this filter. Defaults to None.
+            lookups (bool, optional): See unpack_fields. Defaults to False.
+            sentinels (bool, optional): See unpack_fields. Defaults to False.
+            cache (Optional[DecodeCache], optional): Cache of decoded messages.
+                Defaults to None.
+            change_filter (Optional[ChangeFilter], optional): Only unpack changed
+                messages. Defaults to None.
+        """
+        self._bucket = bucket
+        self._filter = frame_filter
+        self._cache = cache
+        self._changes = change_filter
+        self._unpack_message = partial(
+            unpack_complete_message,
+            compiled=compiled,
+            lazy=lazy,
+            lookups=lookups,
+            sentinels=sentinels,
+        )
+
+    def decoder(self, pgn: int, source_address: int, message: Any) -> PacketDecoder:
+        """Check a message against the frame filter and select its decoder, before
+        the payload is touched
+
+        Args:
+            pgn (int): PGN number
+            source_address (int): Source address
+            message (Any): Message as received, attached to raised errors
+
+        Raises:
+            FilteredMessageError: If the message does not pass the frame filter
+            PGNError: If we dont know how to decode a message with this PGN number
+
+        Returns:
+            PacketDecoder: Decoder of the PGN number
+        """
+        if self._filter and not self._filter.accepts(pgn, source_address):
+            raise FilteredMessageError(f"Message with PGN {pgn} filtered out", message)
+
+        decoder = get_complete_packet_decoder(pgn)
+        if decoder is None:
+            raise PGNError(f"Cant decode message with PGN {pgn}", message)
+
+        return decoder
+
+    def unpack(  # pylint: disable=too-many-arguments
+        self,
+        decoder: PacketDecoder,
+        source_address: int,
+        data: Union[bytes, bytearray],
+        message: Any,
+        timestamp: Optional[float] = None,
+    ) -> dict:
+        """Unpack the payload of a message, see decoder
+
+        Args:
+            decoder (PacketDecoder): Decoder returned by decoder
+            source_address (int): Source address
+            data (Union[bytes, bytearray]): Payload, a single frame of a fast packet
+                message if a bucket is used
+            message (Any): Message as received, attached to raised errors
+            timestamp (Optional[float], optional): Timestamp of the message, used
+                for expiring stale fast packet messages and for heartbeats of the
+                change filter. Defaults to None.
+
+        Raises:
+            PGNError: If no variant of the PGN number matches the payload
+            UnchangedMessageError: If the payload is unchanged
+            MultiPacketDiscardedError: If this subpacket is discarded due to missing
+                messages
+            MultiPacketInProcessError: If this subpacket has been processed
+                successfully but we require more subpackets to be able to decode
+                the full message
+
+        Returns:
+            dict: Unpacked message, with only the "Fields" key
+        """
+        pgn = decoder.pgn
+        if self._bucket is not None and decoder.packet_type == "Fast":
+            # Will raise if packet is not complete!
+            data = process_sub_packet(
+                pgn, source_address, data, self._bucket, timestamp
+            )
+
+        if decoder.variants > 1 and not get_complete_packet_decoder(pgn, data):
+            raise PGNError(f"Cant decode message with PGN {pgn}", message)
+
+        if self._changes is not None and not self._changes.changed(
+            (pgn, source_address), data, timestamp
+        ):
+            raise UnchangedMessageError(f"Unchanged message, PGN {pgn}", message)
+
+        if self._cache is not None:
+            return self._cache.unpack(pgn, data, self._unpack_message)
+
+        return self._unpack_message(pgn, data)
+
+
 class NMEA2000Parser(RawParserBase):  # pylint: disable=too-few-public-methods
     """A parser for parsing raw NMEA2000 CAN frames in hex format, example:
 
@@ -229,35 +1031,117 @@ class NMEA2000Parser(RawParserBase):  # pylint: disable=too-few-public-methods
         08FF14C9 4A9A0000000000FF
     """
 
-    def __init__(
+    def __init__(  # pylint: disable=too-many-arguments
         self,
+        compiled: bool = False,
+        bucket: Optional[FastPacketBucket] = None,
+        lazy: bool = False,
+        *,
+        frame_filter: Optional[FrameFilter] = None,
+        lookups: bool = False,
+        sentinels: bool = False,
+        cache: Optional[DecodeCache] = None,
+        change_filter: Optional[ChangeFilter] = None,
     ) -> None:
+        """
+        Args:
+            compiled (bool, optional): Whether to decode using generated,
+                straight-line decode functions. Defaults to False.
+            bucket (Optional[FastPacketBucket], optional): Storage for partly
+                reassembled multi-packet messages. Defaults to None, meaning a
+                FastPacketBucket with default settings, which never expires
+                sequences.
+            lazy (bool, optional): Whether to decode the "Fields" of each message
+                on first access only, using a PacketFields mapping. The header
+                attributes are always available. Defaults to False.
+            frame_filter (Optional[FrameFilter], optional): Only unpack frames
+                passing this filter. Other frames are dropped as soon as the CAN id
+                is read, raising FilteredMessageError. Defaults to None.
+            lookups (bool, optional): Whether to resolve lookup table and bitfield
+                fields into names, see unpack_fields. Defaults to False.
+            sentinels (bool, optional): Whether fields holding "data not
+                available" sentinel values are returned as None, see
+                unpack_fields. Defaults to False.
+            cache (Optional[DecodeCache], optional): Cache of decoded messages,
+                repeated payloads are handed out from the cache instead of being
+                decoded again. Defaults to None, i.e. no caching.
+            change_filter (Optional[ChangeFilter], optional): Only unpack messages
+                whose payload changed since the last message with the same PGN and
+                source address, others raise UnchangedMessageError. Timestamps of
+                frames, when given, are used for heartbeats. Defaults to None.
+        """
         super().__init__()
-        self._bucket = {}
+        self._unpacker = MessageUnpacker(
+            compiled=compiled,
+            bucket=FastPacketBucket() if bucket is None else bucket,
+            lazy=lazy,
+            frame_filter=frame_filter,
+            lookups=lookups,
+            sentinels=sentinels,
+            cache=cache,
+            change_filter=change_filter,
+        )
 
     def unpack(self, frame: str) -> dict:  # pylint: disable=arguments-renamed
         header, *data = frame.split()
-        data = "".join(data)
-
-        source_address, pgn, priority = unpack_header(unhexlify(header))
 
-        if pgn not in PGN_DB or not PGN_DB[pgn]["Complete"]:
-            raise PGNError(f"Cant decode CAN frame with PGN {pgn}", frame)
+        source_address, pgn, priority = unpack_can_id(int(header, 16))
+        decoder = self._unpacker.decoder(pgn, source_address, frame)
+        output = self._unpacker.unpack(
+            decoder, source_address, unhexlify("".join(data)), frame
+        )
 
-        data = unhexlify(data)
+        # Add some attributes to output
+        output["Priority"] = priority
+        output["SourceAddress"] = source_address
+        output["PGN"] = pgn
 
-        # Unpack message
-        if packet_type(pgn) == "Single":
-            output = unpack_complete_message(pgn, data)
-        elif packet_type(pgn) == "Fast":
-            # Will raise if packet is not complete!
-            complete_packet = process_sub_packet(
-                pgn, source_address, data, self._bucket
-            )
-            output = unpack_complete_message(pgn, complete_packet)
+        return output
 
-        else:
-            raise PGNError(f"Cant decode CAN frame with PGN {pgn}", frame)
+    def unpack_frame(
+        self,
+        can_id: int,
+        data: Union[bytes, bytearray, memoryview],
+        timestamp: Optional[float] = None,
+    ) -> dict:
+        """Unpack a binary CAN frame, skipping the round-trip through hex text
+
+        .. highlight:: python
+        .. code-block:: python
+
+            from marulc import NMEA2000Parser
+
+            parser = NMEA2000Parser()
+            msg_as_dict = parser.unpack_frame(0x09F10D0A, bytes.fromhex("FF000000FF7FFFFF"))
+
+        Args:
+            can_id (int): 29-bit CAN identifier
+            data (Union[bytes, bytearray, memoryview]): Frame payload
+            timestamp (Optional[float], optional): Frame timestamp, used for expiring
+                stale multi-packet sequences. Defaults to None.
+
+        Raises:
+            PGNError: If we dont know how to decode a message with this PGN number
+            FilteredMessageError: If the frame does not pass the filters of this
+                parser, or the message is unchanged (UnchangedMessageError)
+            MultiPacketDiscardedError: If this subpacket is discarded due to missing
+                messages
+            MultiPacketInProcessError: If this subpacket has been processed
+                successfully but we require more subpackets to be able to decode
+                the full message
+
+        Returns:
+            dict: Complete unpacked message
+        """
+        source_address, pgn, priority = unpack_can_id(can_id)
+
+        # Views may point into buffers that are reused, and are not contiguous
+        # once reversed by the bitstruct based decoder
+        data = bytes(data)
+        decoder = self._unpacker.decoder(pgn, source_address, (can_id, data))
+        output = self._unpacker.unpack(
+            decoder, source_address, data, (can_id, data), timestamp
+        )
 
         # Add some attributes to output
         output["Priority"] = priority
@@ -265,3 +1149,39 @@ class NMEA2000Parser(RawParserBase):  # pylint: disable=too-few-public-methods
         output["PGN"] = pgn
 
         return output
+
+    def unpack_frames(
+        self, frames: Iterable[CANFrame], quiet: bool = False
+    ) -> Iterator[dict]:
+        """Unpack binary CAN frames in bulk, as yielded by read_can_frames or
+        read_candump_log. Behaves like parse_from_iterator.
+
+        .. highlight:: python
+        .. code-block:: python
+
+            from marulc import NMEA2000Parser
+            from marulc.nmea2000 import read_candump_log
+
+            parser = NMEA2000Parser()
+
+            with open("candump.log") as f_handle:
+                for msg in parser.unpack_frames(read_candump_log(f_handle, quiet=True), quiet=True):
+                    print(msg)
+
+        Args:
+            frames (Iterable[CANFrame]): (CAN id, payload, timestamp) tuples
+            quiet (bool, optional): Whether exceptions encountered should be raised
+                or silenced. Defaults to False.
+
+        Yields:
+            Iterator[dict]: The next, complete, unpacked message
+        """
+        for can_id, data, timestamp in frames:
+            try:
+                yield self.unpack_frame(can_id, data, timestamp)
+            except (MultiPacketError, FilteredMessageError):
+                # Never do anything about MultiPacketErrors or filtered frames
+                pass
+            except ParseError:
+                if not quiet:
+                    raise
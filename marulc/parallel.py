@@ -0,0 +1,384 @@
+"""Containing a parallel front end for parsing, spreading the frames or sentences
+of a source over a number of worker processes, each running its own copy of a
+parser. Frames are sharded on a cheap peek at their headers, i.e. by PGN number
+and source address, so that every multi-packet sequence is reassembled by a
+single worker.
+"""
+import os
+import queue
+import multiprocessing
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Type,
+    Union,
+)
+
+from marulc.can import CANFrame
+from marulc.parser_bases import RawParserBase
+from marulc.exceptions import (
+    FilteredMessageError,
+    MultiPacketError,
+    ParseError,
+)
+
+Frame = Union[str, CANFrame]
+ShardKey = Callable[[Frame], Hashable]
+
+# Batches queued per worker before the dispatching process blocks
+MAX_BATCHES_IN_FLIGHT = 4
+
+# Seconds between checks on the workers when waiting for results
+POLL_INTERVAL = 1.0
+
+
+def peek_shard_key(frame: Frame) -> Hashable:
+    """Cheap key of the stream a frame or sentence belongs to, without parsing it.
+    Frames with equal keys are handed to the same worker, in order.
+
+    Args:
+        frame (Frame): NMEA2000 frame as a hex string (i.e. "09F200C9 00 57 30 FF
+            FF 01 FF FF") or a CANFrame tuple, or a NMEA0183 sentence
+
+    Returns:
+        Hashable: PGN number and source address of NMEA2000 frames as well as of
+            --PGN and PCDIN sentences, the sentence type of any other NMEA0183
+            sentence. None if the frame cannot be peeked at.
+    """
+    if isinstance(frame, tuple):
+        # (PGN << 8) | source address
+        return frame[0] & 0x3FFFFFF
+
+    try:
+        head, separator, tail = frame.partition(",")
+        if not separator:
+            return int(frame.split(None, 1)[0], 16) & 0x3FFFFFF
+
+        sentence_type = head[max(head.rfind("$"), head.rfind("!")) + 1 :]
+        if sentence_type.endswith("PGN"):
+            # PGN and the source address, the last byte of the attributes
+            pgn, attributes, _ = tail.split(",", 2)
+            return pgn, attributes[-2:]
+        if sentence_type == "PCDIN":
+            pgn, _, source_id, _ = tail.split(",", 3)
+            return pgn, source_id
+        return sentence_type
+    except (ValueError, IndexError):
+        return None
+
+
+def _work(
+    parser: Type[RawParserBase],
+    inbox: multiprocessing.Queue,
+    outbox: multiprocessing.Queue,
+    quiet: bool,
+) -> None:
+    """Worker loop, unpacking batches of frames until receiving None. Outputs are
+    sent back in batch order, with None for frames not resulting in a message."""
+    while (item := inbox.get()) is not None:
+        batch_id, frames = item
+        outputs: List[Any] = []
+        for frame in frames:
+            try:
+                if isinstance(frame, tuple):
+                    outputs.append(parser.unpack_frame(*frame))
+                else:
+                    outputs.append(parser.unpack(frame))
+            except (MultiPacketError, FilteredMessageError):
+                outputs.append(None)
+            except ParseError as exc:
+                outputs.append(None if quiet else exc)
+            except Exception as exc:  # pylint: disable=broad-except
+                # Handed to the dispatching process rather than killing the worker
+                outputs.append(exc)
+        outbox.put((batch_id, outputs))
+
+    outbox.put(None)
+
+
+class _InputOrder:
+    """Holds back outputs until all outputs of earlier input frames have arrived"""
+
+    def __init__(self) -> None:
+        self._batches: Dict[int, List[int]] = {}
+        self._pending: Dict[int, Any] = {}
+        self._next_index = 0
+
+    def __len__(self) -> int:
+        # Outputs held back
+        return len(self._pending)
+
+    def add(self, batch_id: int, indices: List[int]) -> None:
+        """Remember the input indices of a dispatched batch"""
+        self._batches[batch_id] = indices
+
+    def release(self, batch_id: int, outputs: List[Any]) -> List[Any]:
+        """Outputs of a batch in, outputs ready to be yielded out"""
+        self._pending.update(zip(self._batches.pop(batch_id), outputs))
+        released = []
+        while self._next_index in self._pending:
+            released.append(self._pending.pop(self._next_index))
+            self._next_index += 1
+        return released
+
+
+class _Workers:  # pylint: disable=too-many-instance-attributes
+    """Worker processes, the batches being filled for them and the bookkeeping
+    needed to merge their outputs"""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        parser: Type[RawParserBase],
+        workers: int,
+        quiet: bool,
+        ordered: bool,
+        batch_size: int,
+    ) -> None:
+        self._outbox: multiprocessing.Queue = multiprocessing.Queue()
+        self._inboxes = [
+            multiprocessing.Queue(MAX_BATCHES_IN_FLIGHT) for _ in range(workers)
+        ]
+        self._processes = [
+            multiprocessing.Process(
+                target=_work, args=(parser, inbox, self._outbox, quiet), daemon=True
+            )
+            for inbox in self._inboxes
+        ]
+        self._running = workers
+        self._batch_id = 0
+        self._batch_size = batch_size
+        self._indices: List[List[int]] = [[] for _ in range(workers)]
+        self._frames: List[List[Frame]] = [[] for _ in range(workers)]
+        self._order = _InputOrder() if ordered else None
+
+        for process in self._processes:
+            process.start()
+
+    @property
+    def pending(self) -> int:
+        """Number of outputs held back, waiting for outputs of earlier frames"""
+        return 0 if self._order is None else len(self._order)
+
+    def add(self, worker: int, index: int, frame: Frame) -> None:
+        """Add a frame to the batch of a worker, handing the batch over once full"""
+        self._indices[worker].append(index)
+        self._frames[worker].append(frame)
+        if len(self._frames[worker]) >= self._batch_size:
+            self._dispatch(worker)
+
+    def flush_stale(self, index: int, max_age: int) -> None:
+        """Hand over the partial batches holding frames more than max_age frames
+        older than the frame at index"""
+        for worker, indices in enumerate(self._indices):
+            if indices and index - indices[0] >= max_age:
+                self._dispatch(worker)
+
+    def flush(self) -> None:
+        """Hand over all partial batches"""
+        for worker, frames in enumerate(self._frames):
+            if frames:
+                self._dispatch(worker)
+
+    def _dispatch(self, worker: int) -> None:
+        """Hand the batch of a worker over, blocking while the worker is busy"""
+        if self._order is not None:
+            self._order.add(self._batch_id, self._indices[worker])
+        self._put(worker, (self._batch_id, self._frames[worker]))
+        self._batch_id += 1
+        self._indices[worker], self._frames[worker] = [], []
+
+    def _put(self, worker: int, item: Any) -> None:
+        while True:
+            try:
+                self._inboxes[worker].put(item, True, POLL_INTERVAL)
+                return
+            except queue.Full:
+                self._check_workers()
+
+    def _check_workers(self) -> None:
+        if any(process.exitcode for process in self._processes):
+            raise RuntimeError("A worker process exited unexpectedly") from None
+
+    def _receive(self, block: bool) -> Optional[List[Any]]:
+        """Outputs of the next batch received from the workers, in input order if
+        ordered. None if there is none without blocking, or once the workers have
+        stopped."""
+        while self._running:
+            try:
+                item = self._outbox.get(block, POLL_INTERVAL)
+            except queue.Empty:
+                if not block:
+                    return None
+                self._check_workers()
+                continue
+
+            if item is None:
+                self._running -= 1
+                continue
+
+            batch_id, outputs = item
+            if self._order is not None:
+                outputs = self._order.release(batch_id, outputs)
+            return outputs
+
+        return None
+
+    @staticmethod
+    def _emit(outputs: List[Any]) -> Iterator[dict]:
+        for output in outputs:
+            if isinstance(output, Exception):
+                raise output
+            if output is not None:
+                yield output
+
+    def results(self, block: bool) -> Iterator[dict]:
+        """Unpacked messages received from the workers, either those available
+        right away or, if block, all of them until the workers have stopped"""
+        while (outputs := self._receive(block)) is not None:
+            yield from self._emit(outputs)
+
+    def drain(self, max_pending: int) -> Iterator[dict]:
+        """Hand over all partial batches and wait for results until no more than
+        max_pending outputs are held back"""
+        self.flush()
+        while self.pending > max_pending:
+            outputs = self._receive(block=True)
+            if outputs is None:
+                return
+            yield from self._emit(outputs)
+
+    def stop(self) -> None:
+        """Hand over all partial batches and ask the workers to stop once done"""
+        self.flush()
+        for worker in range(len(self._inboxes)):
+            self._put(worker, None)
+
+    def close(self) -> None:
+        """Terminate any workers still running"""
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+
+def _parse_in_process(
+    parser: Type[RawParserBase], source: Iterable[Frame], quiet: bool
+) -> Iterator[dict]:
+    """Same as parse_in_parallel, with a single worker, without worker processes"""
+    for frame in source:
+        try:
+            if isinstance(frame, tuple):
+                yield parser.unpack_frame(*frame)
+            else:
+                yield parser.unpack(frame)
+        except (MultiPacketError, FilteredMessageError):
+            pass
+        except ParseError:
+            if not quiet:
+                raise
+
+
+def parse_in_parallel(  # pylint: disable=too-many-arguments
+    parser: Type[RawParserBase],
+    source: Iterable[Frame],
+    quiet: bool = False,
+    *,
+    workers: Optional[int] = None,
+    batch_size: int = 256,
+    ordered: bool = False,
+    shard_key: ShardKey = peek_shard_key,
+    max_age: Optional[int] = None,
+    max_pending: Optional[int] = None,
+) -> Iterator[dict]:
+    """Parallel version of parse_from_iterator, unpacking frames or sentences in
+    worker processes each running its own copy of parser, including its own
+    multi-packet bucket, filters and caches. Frames are sharded by shard_key,
+    by default the PGN number and source address or the NMEA0183 sentence type
+    (see peek_shard_key), keeping multi-packet sequences, as well as the change
+    filters, within a single worker. Frames are handed to the workers in batches
+    to amortize the cost of communicating between processes.
+
+    Worthwhile for large logs or busy buses where unpacking, rather than reading,
+    is the bottleneck, on machines with several CPUs. With a single worker, frames
+    are unpacked in this process instead. Lazy messages cannot be sent between
+    processes, use a parser producing complete messages.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc import NMEA0183Parser
+        from marulc.custom_parsers.MXPGN import MXPGNFormatter
+        from marulc.parallel import parse_in_parallel
+
+        parser = NMEA0183Parser([MXPGNFormatter()])
+
+        with open("nmea_log.txt") as f_handle:
+            for msg in parse_in_parallel(parser, f_handle, quiet=True, ordered=True):
+                print(msg)
+
+    Args:
+        parser (Type[RawParserBase]): Parser conforming to the RawParser interface,
+            copied to each worker. Must be picklable on platforms not forking new
+            processes. CANFrame tuples are unpacked using unpack_frame.
+        source (Iterable[Frame]): Iterable source which yields NMEA 0183 sentences,
+            NMEA2000 frames as hex strings or CANFrame tuples
+        quiet (bool, optional): Whether exceptions encountered should be raised or
+            silenced. Defaults to False.
+        workers (Optional[int], optional): Number of worker processes. Defaults to
+            None, i.e. the number of CPUs.
+        batch_size (int, optional): Number of frames handed to a worker at a time.
+            Defaults to 256.
+        ordered (bool, optional): Whether to yield messages in the order of the
+            source, otherwise in the order they are unpacked, which is only kept
+            for frames of the same shard. Defaults to False.
+        shard_key (ShardKey, optional): Key of the shard of a frame, frames of equal
+            keys are unpacked by the same worker. Defaults to peek_shard_key.
+        max_age (Optional[int], optional): Partial batches are handed over once
+            their oldest frame is this many frames behind the source, so that
+            sparse shards do not hold back the outputs of busy shards. Defaults to
+            None, i.e. batch_size times the number of workers.
+        max_pending (Optional[int], optional): If ordered, the maximum number of
+            outputs held back waiting for outputs of earlier frames, before
+            waiting for the workers to catch up. Defaults to None, i.e. four times
+            batch_size times the number of workers.
+
+    Raises:
+        ParseError: If a frame cannot be unpacked, unless quiet
+        RuntimeError: If a worker process exits unexpectedly
+
+    Yields:
+        Iterator[dict]: The next, complete, unpacked message as a python dictionary.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from _parse_in_process(parser, source, quiet)
+        return
+
+    max_age = batch_size * workers if max_age is None else max_age
+    max_pending = 4 * batch_size * workers if max_pending is None else max_pending
+
+    pool = _Workers(parser, workers, quiet, ordered, batch_size)
+    try:
+        for index, frame in enumerate(source):
+            if isinstance(frame, tuple):
+                # Payloads may be views into larger buffers
+                frame = (frame[0], bytes(frame[1]), *frame[2:])
+
+            pool.add(hash(shard_key(frame)) % workers, index, frame)
+
+            if index % batch_size == batch_size - 1:
+                pool.flush_stale(index, max_age)
+                if pool.pending > max_pending:
+                    yield from pool.drain(max_pending)
+                yield from pool.results(block=False)
+
+        pool.stop()
+        yield from pool.results(block=True)
+    finally:
+        pool.close()
@@ -0,0 +1,391 @@
+"""Containing a columnar sink for unpacked messages, accumulating the values of
+each kind of message straight into typed column buffers and flushing them as
+NumPy arrays, optionally in chunks to .npz or Parquet files. Requires numpy to
+be installed (``pip install marulc[numpy]``), writing Parquet files requires
+pyarrow as well (``pip install marulc[parquet]``).
+"""
+import math
+from array import array
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Union,
+)
+
+import numpy as np
+
+from marulc.nmea2000 import PGN_DEFINITIONS
+from marulc.nmea0183 import (
+    STANDARD_SENTENCE_FORMATTERS,
+    PROPRIETARY_SENTENCE_FORMATTERS,
+)
+
+Buffer = Union[array, list]
+Table = Dict[str, Any]
+FlushCallback = Callable[[Hashable, Table], None]
+
+
+def spec_field_ids(key: Hashable) -> List[str]:
+    """Field ids of a kind of message according to the bundled definitions
+
+    Args:
+        key (Hashable): PGN number or (talker, formatter), see table_key
+
+    Returns:
+        List[str]: Field ids in definition order, the union of all definitions
+            sharing a PGN number. Empty if there is no definition.
+    """
+    if isinstance(key, int):
+        definitions = PGN_DEFINITIONS.get(key, [])
+    else:
+        talker, formatter = key
+        definitions = [STANDARD_SENTENCE_FORMATTERS.get(formatter)]
+        if talker in PROPRIETARY_SENTENCE_FORMATTERS:
+            definitions.append(
+                PROPRIETARY_SENTENCE_FORMATTERS[talker]["Sentences"].get(formatter)
+            )
+
+    field_ids = (
+        field["Id"]
+        for definition in definitions
+        if definition
+        for field in definition["Fields"]
+    )
+    return list(dict.fromkeys(field_ids))
+
+
+def table_key(msg: Mapping[str, Any]) -> Hashable:
+    """Key of the table a message is accumulated into
+
+    Args:
+        msg (Mapping[str, Any]): Unpacked message
+
+    Returns:
+        Hashable: The PGN number of NMEA2000 messages, including wrapped ones,
+            otherwise (talker, formatter)
+    """
+    if "PGN" in msg:
+        return msg["PGN"]
+    return msg["Talker"], msg["Formatter"]
+
+
+def table_name(key: Hashable) -> str:
+    """Name of a table, as used for file names
+
+    Args:
+        key (Hashable): Table key, see table_key
+
+    Returns:
+        str: I.e. "127488" or "GPGGA"
+    """
+    return str(key) if isinstance(key, int) else "".join(key)
+
+
+def _is_missing(value: Any) -> bool:
+    # Empty NMEA0183 data elements are kept as empty strings by parse_value
+    return value is None or value == ""
+
+
+def _is_nan(value: Any) -> bool:
+    return isinstance(value, float) and math.isnan(value)
+
+
+def _widen(buffer: Buffer, value: Any) -> Buffer:
+    """Widen a column buffer into one which can hold value, int64 columns become
+    float64 columns for floats and missing values and anything else becomes a
+    column of python objects"""
+    if isinstance(buffer, array) and buffer.typecode == "q":
+        if _is_missing(value) or isinstance(value, float):
+            widened: Buffer = array("d", buffer)
+            widened.append(math.nan if _is_missing(value) else value)
+            return widened
+
+    widened = list(buffer)
+    widened.append(value)
+    return widened
+
+
+def _fresh(buffer: Buffer) -> Buffer:
+    return array(buffer.typecode) if isinstance(buffer, array) else []
+
+
+def _to_numpy(buffer: Buffer) -> np.ndarray:
+    if isinstance(buffer, array):
+        return np.array(buffer, dtype=np.int64 if buffer.typecode == "q" else float)
+    column = np.empty(len(buffer), dtype=object)
+    column[:] = buffer
+    return column
+
+
+class _TableBuffer:
+    """Column buffers of a single table, one per attribute and field"""
+
+    __slots__ = ("attributes", "fields", "rows")
+
+    def __init__(self, attributes: Iterable[str], field_ids: Iterable[str]):
+        self.attributes: Dict[str, Buffer] = {name: array("q") for name in attributes}
+        self.fields: Dict[str, Buffer] = {name: array("q") for name in field_ids}
+        self.rows = 0
+
+    def append(self, msg: Mapping[str, Any]) -> None:
+        """Append a message as a row"""
+        fields = msg["Fields"]
+        # Not in the definition, respectively not in the first message
+        self._backfill(self.fields, fields.keys())
+        self._backfill(self.attributes, msg.keys() - {"Fields"})
+
+        self._append(self.fields, fields)
+        self._append(self.attributes, msg)
+        self.rows += 1
+
+    def _backfill(self, buffers: Dict[str, Buffer], names: Iterable[str]) -> None:
+        # Add columns for new names, earlier rows back-filled as missing
+        if not buffers.keys() >= names:
+            for name in names - buffers.keys():
+                buffers[name] = array("d", [math.nan]) * self.rows
+
+    @staticmethod
+    def _append(buffers: Dict[str, Buffer], values: Mapping[str, Any]) -> None:
+        for name, buffer in buffers.items():
+            value = values.get(name)
+            try:
+                buffer.append(value)
+            except (TypeError, OverflowError):
+                if buffer.typecode == "d" and _is_missing(value):
+                    buffer.append(math.nan)
+                else:
+                    buffers[name] = _widen(buffer, value)
+
+    def flush(self) -> Table:
+        """Convert the buffered rows into NumPy arrays and start over"""
+        table: Table = {
+            "Fields": {name: _to_numpy(buffer) for name, buffer in self.fields.items()}
+        }
+        table.update(
+            (name, _to_numpy(buffer)) for name, buffer in self.attributes.items()
+        )
+
+        # Keep the column types, later chunks are likely to need them as well
+        self.fields = {name: _fresh(buffer) for name, buffer in self.fields.items()}
+        self.attributes = {
+            name: _fresh(buffer) for name, buffer in self.attributes.items()
+        }
+        self.rows = 0
+        return table
+
+
+class ColumnSink:
+    """Accumulates unpacked NMEA0183 and NMEA2000 messages into columns, one table
+    per PGN number or per talker and sentence formatter. The columns of a table
+    are laid out according to the definitions of the message, values are
+    appended to typed buffers (int64, float64 or python objects) which are
+    widened as needed. Missing values, i.e. None or empty NMEA0183 data elements,
+    become NaN in numeric columns.
+
+    Columns of fields or attributes first appearing in a later message, i.e.
+    fields not in the definition or a "Timestamp" only set for some messages,
+    are added as they appear, earlier rows back-filled as missing.
+
+    Tables have the same layout as the output of
+    marulc.batch.unpack_frames_to_columns, i.e. "Fields" holding a NumPy array
+    per field and a NumPy array per attribute, such as "PGN" or "Talker".
+
+    With a chunk_size, tables are handed to on_flush as soon as they hold that
+    many rows, keeping memory bounded for logs of any size.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        from marulc import NMEA2000Parser, parse_from_iterator
+        from marulc.sink import ColumnSink, NpzWriter
+
+        parser = NMEA2000Parser()
+
+        with ColumnSink(chunk_size=100000, on_flush=NpzWriter("tables")) as sink:
+            sink.extend(parse_from_iterator(parser, open("candump.txt"), quiet=True))
+    """
+
+    def __init__(
+        self,
+        chunk_size: Optional[int] = None,
+        on_flush: Optional[FlushCallback] = None,
+    ) -> None:
+        """
+        Args:
+            chunk_size (Optional[int], optional): Flush a table as soon as it holds
+                this many rows. Defaults to None, i.e. only when flush is called.
+            on_flush (Optional[FlushCallback], optional): Called with the key and
+                the columns of each flushed table, i.e. a NpzWriter or a
+                ParquetWriter. Defaults to None.
+
+        Raises:
+            ValueError: If a chunk_size is given without an on_flush callback
+        """
+        if chunk_size is not None and on_flush is None:
+            raise ValueError("Flushing in chunks requires an on_flush callback")
+
+        self._chunk_size = chunk_size
+        self._on_flush = on_flush
+        self._tables: Dict[Hashable, _TableBuffer] = {}
+
+    def append(self, msg: Mapping[str, Any]) -> None:
+        """Append an unpacked message to its table
+
+        Args:
+            msg (Mapping[str, Any]): Unpacked message, as returned by a parser
+        """
+        key = table_key(msg)
+        table = self._tables.get(key)
+        if table is None:
+            attributes = [name for name in msg if name != "Fields"]
+            table = self._tables[key] = _TableBuffer(attributes, spec_field_ids(key))
+
+        table.append(msg)
+
+        if self._chunk_size is not None and table.rows >= self._chunk_size:
+            self._on_flush(key, table.flush())
+
+    def extend(self, messages: Iterable[Mapping[str, Any]]) -> None:
+        """Append unpacked messages, i.e. as yielded by parse_from_iterator
+
+        Args:
+            messages (Iterable[Mapping[str, Any]]): Unpacked messages
+        """
+        for msg in messages:
+            self.append(msg)
+
+    def rows(self, key: Hashable) -> int:
+        """Number of buffered rows of a table
+
+        Args:
+            key (Hashable): Table key, see table_key
+
+        Returns:
+            int: Number of rows not yet flushed
+        """
+        table = self._tables.get(key)
+        return table.rows if table else 0
+
+    def flush(self) -> Dict[Hashable, Table]:
+        """Flush all buffered rows as NumPy arrays, handing each non-empty table to
+        on_flush if given
+
+        Returns:
+            Dict[Hashable, Table]: Table keys mapped to flushed tables
+        """
+        output = {}
+        for key, table in self._tables.items():
+            if table.rows:
+                output[key] = table.flush()
+                if self._on_flush is not None:
+                    self._on_flush(key, output[key])
+
+        return output
+
+    def __enter__(self) -> "ColumnSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+
+def flatten_table(table: Table) -> Dict[str, np.ndarray]:
+    """Flatten a table into a single level of columns, fields are prefixed with
+    "Fields/"
+
+    Args:
+        table (Table): Flushed table
+
+    Returns:
+        Dict[str, np.ndarray]: Column names mapped to columns
+    """
+    flat = {f"Fields/{name}": column for name, column in table["Fields"].items()}
+    flat.update((name, column) for name, column in table.items() if name != "Fields")
+    return flat
+
+
+def _as_strings(column: np.ndarray) -> np.ndarray:
+    """Convert object columns only holding strings and missing values into unicode
+    columns, which can be loaded from .npz files without unpickling"""
+    if column.dtype != object or not all(
+        isinstance(value, str) or _is_missing(value) or _is_nan(value)
+        for value in column
+    ):
+        return column
+
+    return np.array(
+        [value if isinstance(value, str) else "" for value in column], dtype=str
+    )
+
+
+class NpzWriter:  # pylint: disable=too-few-public-methods
+    """Writes flushed tables to numbered .npz files, i.e. 127488-00000.npz,
+    holding the flattened columns, see flatten_table. Columns of strings are
+    stored as unicode arrays, missing strings as empty strings, other object
+    columns require allow_pickle=True when loaded."""
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        """
+        Args:
+            directory (Union[str, Path]): Where to write the files, created if
+                needed
+        """
+        self._directory = Path(directory)
+        self._chunks: Dict[Hashable, int] = {}
+
+    def __call__(self, key: Hashable, table: Table) -> None:
+        chunk = self._chunks.get(key, 0)
+        self._chunks[key] = chunk + 1
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            self._directory / f"{table_name(key)}-{chunk:05d}.npz",
+            **{
+                name: _as_strings(column)
+                for name, column in flatten_table(table).items()
+            },
+        )
+
+
+class ParquetWriter:  # pylint: disable=too-few-public-methods
+    """Writes flushed tables to numbered Parquet files, i.e.
+    127488-00000.parquet, holding the flattened columns, see flatten_table.
+    Requires pyarrow to be installed."""
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        """
+        Args:
+            directory (Union[str, Path]): Where to write the files, created if
+                needed
+        """
+        # Fail early rather than on the first flush
+        # pylint: disable=import-outside-toplevel, import-error, unused-import
+        import pyarrow
+
+        self._directory = Path(directory)
+        self._chunks: Dict[Hashable, int] = {}
+
+    def __call__(self, key: Hashable, table: Table) -> None:
+        # pylint: disable=import-outside-toplevel, import-error
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        chunk = self._chunks.get(key, 0)
+        self._chunks[key] = chunk + 1
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        columns = {
+            name: pa.array(column, from_pandas=True)
+            for name, column in flatten_table(table).items()
+        }
+        pq.write_table(
+            pa.table(columns),
+            self._directory / f"{table_name(key)}-{chunk:05d}.parquet",
+        )
@@ -1,11 +1,12 @@
 """Utility functions
 """
 import re
-from typing import Any, Callable, Iterable, Type
+import operator
+from typing import Any, Callable, Iterable, Type, Union
 from functools import reduce
 
 from marulc.parser_bases import RawParserBase
-from marulc.exceptions import MultiPacketError, ParseError
+from marulc.exceptions import FilteredMessageError, MultiPacketError, ParseError
 
 Filter = Callable[[dict], bool]
 
@@ -29,8 +30,8 @@ def parse_from_iterator(
     for sentence in source:
         try:
             yield parser.unpack(sentence)
-        except MultiPacketError:
-            # Never do anything about MultiPacketErrors
+        except (MultiPacketError, FilteredMessageError):
+            # Never do anything about MultiPacketErrors or filtered messages
             pass
         except ParseError:
             if not quiet:
@@ -113,3 +114,37 @@ def filter_on_pgn(*PGNs: int) -> Filter:
         Callable[[dict], bool]: A pre-loaded filter callable
     """
     return lambda item: item.get("PGN") in PGNs
+
+
+def calculate_checksum(nmea_str: Union[str, bytes, bytearray, memoryview]) -> int:
+    """Calculate checksum from inputted raw nmea string
+
+    The characters are XOR:ed together as a single integer, folded in halves, rather
+    than one by one.
+
+    Args:
+        nmea_str (Union[str, bytes, bytearray, memoryview]): Raw received nmea
+            string, without "$" and checksum, as text or bytes
+
+    Returns:
+        int: Calculated checksum
+    """
+    if isinstance(nmea_str, str):
+        try:
+            nmea_str = nmea_str.encode("latin-1")
+        except UnicodeEncodeError:
+            # Not a valid sentence anyway, but keep the per-character result
+            return reduce(operator.xor, map(ord, nmea_str), 0)
+
+    value = int.from_bytes(nmea_str, "little")
+    while value >> 1024:
+        value = (value >> 1024) ^ (value & ((1 << 1024) - 1))
+
+    value ^= value >> 512
+    value ^= value >> 256
+    value ^= value >> 128
+    value ^= value >> 64
+    value ^= value >> 32
+    value ^= value >> 16
+    value ^= value >> 8
+    return value & 0xFF
@@ -0,0 +1,29 @@
+"""Micro-benchmark comparing the bitstruct based and the generated (compiled)
+decoding engines on a few high-rate PGNs.
+
+Usage: python scripts/benchmark_nmea2000_decoding.py
+"""
+import os
+import timeit
+
+from marulc.nmea2000 import get_packet_decoder, unpack_fields
+
+PGNS = [127488, 127245, 129025, 130306]
+NUMBER = 100_000
+
+for pgn in PGNS:
+    payload = os.urandom(get_packet_decoder(pgn).length)
+    assert unpack_fields(pgn, payload) == unpack_fields(pgn, payload, compiled=True)
+
+    bitstruct_time = timeit.timeit(
+        "unpack_fields(pgn, payload)", globals=globals(), number=NUMBER
+    )
+    compiled_time = timeit.timeit(
+        "unpack_fields(pgn, payload, True)", globals=globals(), number=NUMBER
+    )
+
+    print(
+        f"PGN {pgn}: bitstruct {bitstruct_time / NUMBER * 1e6:.2f} us, "
+        f"compiled {compiled_time / NUMBER * 1e6:.2f} us "
+        f"({bitstruct_time / compiled_time:.1f}x)"
+    )
@@ -1,6 +1,14 @@
 import os
+import importlib.util
 
 from setuptools import setup
+from setuptools.command.build_py import build_py
+
+DATABASES = [
+    "nmea2000_pgn_specifications.json",
+    "nmea0183_sentence_formatters.json",
+    "ais_message_types.json",
+]
 
 
 # Utility function to read the README file.
@@ -11,6 +19,25 @@ def read(fname):
     return open(os.path.join(os.path.dirname(__file__), fname)).read()
 
 
+class BuildPyWithDatabases(build_py):
+    """Precompile the JSON databases into artifacts for fast loading"""
+
+    def run(self):
+        super().run()
+
+        # Load the module by path, the package itself may not be importable yet
+        spec = importlib.util.spec_from_file_location(
+            "marulc_database",
+            os.path.join(os.path.dirname(__file__), "marulc", "database.py"),
+        )
+        database = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(database)
+
+        for name in DATABASES:
+            json_path = os.path.join(self.build_lib, "marulc", name)
+            database.compile_database(json_path)
+
+
 setup(
     name="marulc",
     version="0.2.0",
@@ -26,6 +53,8 @@ setup(
     packages=["marulc"],
     include_package_data=True,
     package_data={"": ["*.json"]},
+    cmdclass={"build_py": BuildPyWithDatabases},
     python_requires=">=3.8",
     install_requires=["bitstruct"],
+    extras_require={"numpy": ["numpy"], "parquet": ["numpy", "pyarrow"]},
 )
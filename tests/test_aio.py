@@ -0,0 +1,133 @@
+import asyncio
+import socket
+from pathlib import Path
+
+import pytest
+
+from marulc import NMEA0183Parser, NMEA2000Parser, parse_from_iterator
+from marulc.aio import (
+    LineBuffer,
+    MessageQueue,
+    NMEADatagramProtocol,
+    parse_from_async_iterator,
+    read_messages,
+)
+from marulc.custom_parsers.MXPGN import MXPGNFormatter
+from marulc.exceptions import ParseError
+
+THIS_DIR = Path(__file__).parent
+
+
+def read_log():
+    with (THIS_DIR / "nmea_test_log.txt").open() as f_handle:
+        return f_handle.read()
+
+
+async def aiterate(iterable):
+    for item in iterable:
+        yield item
+
+
+async def collect(source):
+    return [msg async for msg in source]
+
+
+def test_parse_from_async_iterator():
+    lines = read_log().splitlines()
+    expected = list(parse_from_iterator(NMEA0183Parser(), lines, quiet=True))
+
+    messages = asyncio.run(
+        collect(parse_from_async_iterator(NMEA0183Parser(), aiterate(lines), True))
+    )
+    assert messages == expected
+
+    with pytest.raises(ParseError):
+        asyncio.run(
+            collect(parse_from_async_iterator(NMEA0183Parser(), aiterate(lines)))
+        )
+
+
+def test_line_buffer():
+    buffer = LineBuffer(max_length=16)
+    assert buffer.feed(b"$GPZDA,1\r\n$GP") == ["$GPZDA,1"]
+    assert buffer.feed(b"ZDA,2\n\n") == ["$GPZDA,2"]
+    assert buffer.feed(b"x" * 20 + b"\n$GPZDA,3") == []
+    assert buffer.discarded == 1
+    assert buffer.flush() == ["$GPZDA,3"]
+    assert buffer.flush() == []
+
+
+def test_message_queue_drops_when_full():
+    async def main():
+        messages = MessageQueue(maxsize=2)
+        assert [messages.put_nowait({"n": n}) for n in range(3)] == [
+            True,
+            True,
+            False,
+        ]
+        messages.close()
+        assert not messages.put_nowait({"n": 3})
+        return messages.dropped, await collect(messages)
+
+    assert asyncio.run(main()) == (1, [{"n": 0}, {"n": 1}])
+
+
+def test_tcp_stream():
+    data = read_log().encode()
+    parser = NMEA0183Parser([MXPGNFormatter()])
+    expected = list(parse_from_iterator(parser, data.decode().splitlines(), True))
+
+    async def serve(_, writer):
+        # Chunks not aligned with the lines
+        for start in range(0, len(data), 1000):
+            writer.write(data[start : start + 1000])
+            await writer.drain()
+        writer.close()
+
+    async def main():
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            messages = MessageQueue(maxsize=16)
+            parser = NMEA0183Parser([MXPGNFormatter()])
+            task = asyncio.create_task(
+                messages.feed(read_messages(reader, parser, quiet=True))
+            )
+            received = await collect(messages)
+            await task
+            writer.close()
+            return received, messages.dropped
+
+    assert asyncio.run(main()) == (expected, 0)
+
+
+def test_udp_datagrams():
+    frames = [
+        "09F200C9 00 57 30 FF FF 01 FF FF",
+        "09F10DE5 00 F8 FF 7F F9 FE FF FF",
+        "09F200B7 01 DA 2F FF FF 01 FF FF",
+    ]
+    expected = list(parse_from_iterator(NMEA2000Parser(), frames))
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.create_datagram_endpoint(
+            lambda: NMEADatagramProtocol(NMEA2000Parser(), quiet=True),
+            local_addr=("127.0.0.1", 0),
+        )
+        address = transport.get_extra_info("sockname")
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto("\r\n".join(frames[:2]).encode(), address)
+            sock.sendto(b"muppet\r\n", address)
+            sock.sendto(frames[2].encode(), address)
+
+        received = []
+        async for msg in protocol.messages:
+            received.append(msg)
+            if len(received) == len(expected):
+                transport.close()
+        return received
+
+    assert asyncio.run(asyncio.wait_for(main(), 10)) == expected
@@ -0,0 +1,149 @@
+import pytest
+
+from marulc import NMEA0183Parser, parse_from_iterator, unpack_nmea0183_message
+from marulc.ais import (
+    AIS_MESSAGE_TYPES,
+    armored_to_bits,
+    decode_payload,
+    get_decode_function,
+    process_fragment,
+)
+from marulc.can import FastPacketBucket
+from marulc.exceptions import (
+    MultiPacketDiscardedError,
+    MultiPacketInProcessError,
+    ParseError,
+)
+from marulc.nmea0183 import _tokenize_fast, _tokenize_with_regex
+
+POSITION = "!AIVDM,1,1,,B,15M67FC000G?ufbE`FepT@3n00Sa,0*5C"
+STATIC = [
+    "!AIVDM,2,1,3,B,55P5TL01VIaAL@7WKO@mBplU@<PDhh000000001S;AJ::4A80?4i@E53,0*3E",
+    "!AIVDM,2,2,3,B,1@0000000000000,2*55",
+]
+
+
+def test_tokenize_encapsulated():
+    assert _tokenize_fast(POSITION) == _tokenize_with_regex(POSITION)
+    assert _tokenize_fast(POSITION)[1] == "AIVDM,"
+
+
+def test_armored_to_bits():
+    assert armored_to_bits("0") == (0, 6)
+    assert armored_to_bits("w") == (63, 6)
+    assert armored_to_bits("1w", 2) == (0b000001111111 >> 2, 10)
+
+    for payload, fill_bits in [("", 0), ("X", 0), ("é", 0), ("1", 6)]:
+        with pytest.raises(ParseError):
+            armored_to_bits(payload, fill_bits)
+
+
+def test_unpack_position_report():
+    msg = unpack_nmea0183_message(POSITION)
+
+    assert msg["Talker"] == "AI"
+    assert msg["Formatter"] == "VDM"
+    assert msg["Channel"] == "B"
+    assert msg["MessageType"] == 1
+
+    fields = msg["Fields"]
+    assert fields["mmsi"] == 366053209
+    assert fields["status"] == 3
+    assert fields["lat"] == pytest.approx(37.802118)
+    assert fields["lon"] == pytest.approx(-122.341618)
+    assert fields["course"] == pytest.approx(219.3)
+    assert fields["second"] == 59
+    assert fields["accuracy"] is False
+
+
+@pytest.mark.parametrize(
+    "payload,expected",
+    [
+        (
+            "B6CdCm0t3`tba35f@V9faHi7kP06",
+            {"msg_type": 18, "mmsi": 423302100, "speed": 1.4, "heading": 177},
+        ),
+        (
+            "C5N3SRgPEnJGEBT>NhWAwwo862PaLELTBJ:V00000000S0D:R220",
+            {"msg_type": 19, "mmsi": 367059850, "shipname": "CAPT.J.RIMES"},
+        ),
+        (
+            "H42O55i18tMET00000000000000",
+            {"msg_type": 24, "partno": 0, "shipname": "PROGUY"},
+        ),
+        (
+            "H42O55lti4hhhilD3nink000?050",
+            {"partno": 1, "shiptype": 60, "callsign": "TC6163", "to_stern": 15},
+        ),
+        (
+            "KC5E2b@U19PFdLbL",
+            {"msg_type": 27, "mmsi": 206914217, "speed": 57, "course": 167},
+        ),
+    ],
+)
+def test_decode_payload(payload, expected):
+    fields = decode_payload(payload)["Fields"]
+    assert {key: fields[key] for key in expected} == expected
+
+
+def test_decode_payload_errors():
+    # Base station report, no definition
+    with pytest.raises(ParseError):
+        decode_payload("403OviQuMGCqWrRO9>E6fE700@GO")
+
+    with pytest.raises(ParseError):
+        decode_payload("15M67F")
+
+
+def test_generated_decoders():
+    for key, definition in AIS_MESSAGE_TYPES.items():
+        decode = get_decode_function(key)
+        fields = decode(0, definition["Length"])
+        assert list(fields) == [field["Id"] for field in definition["Fields"]]
+        assert decode(0, 6) == fields
+
+
+def test_unpack_multi_fragment():
+    parser = NMEA0183Parser()
+
+    with pytest.raises(MultiPacketInProcessError):
+        parser.unpack(STATIC[0])
+    msg = parser.unpack(STATIC[1])
+
+    assert msg["MessageType"] == 5
+    assert msg["Fields"]["callsign"] == "WDA9674"
+    assert msg["Fields"]["shipname"] == "MT.MITCHELL"
+    assert msg["Fields"]["destination"] == "SEATTLE"
+    assert msg["Fields"]["draught"] == 6.0
+
+    # Single fragment messages in between, fragments in any case
+    messages = list(
+        parse_from_iterator(NMEA0183Parser(), [STATIC[0], POSITION, STATIC[1]])
+    )
+    assert [msg["MessageType"] for msg in messages] == [1, 5]
+
+    with pytest.raises(ParseError):
+        unpack_nmea0183_message(STATIC[0])
+
+
+def test_fragments_discarded_and_expired():
+    bucket = FastPacketBucket(timeout=1.0)
+    first, second = (sentence.split("*")[0].split(",")[1:] for sentence in STATIC)
+
+    with pytest.raises(MultiPacketDiscardedError):
+        process_fragment("AIVDM,", second, bucket, 0.0)
+
+    with pytest.raises(MultiPacketInProcessError):
+        process_fragment("AIVDM,", first, bucket, 0.0)
+    with pytest.raises(MultiPacketDiscardedError):
+        process_fragment("AIVDM,", second, bucket, 2.0)
+    assert bucket.expired == 1
+
+    with pytest.raises(MultiPacketInProcessError):
+        process_fragment("AIVDM,", first, bucket, 3.0)
+    payload, fill_bits = process_fragment("AIVDM,", second, bucket, 3.5)
+    assert payload.startswith("55P5TL") and fill_bits == 2
+    assert not bucket
+
+    with pytest.raises(ParseError):
+        process_fragment("AIVDM,", ["1", "1", ""], bucket)
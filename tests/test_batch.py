@@ -0,0 +1,242 @@
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from marulc import NMEA0183Parser, NMEA2000Parser, parse_from_iterator
+from marulc.batch import (
+    pack_columns,
+    split_frame,
+    unpack_ais_to_columns,
+    unpack_frames_to_columns,
+    verify_checksums,
+)
+from marulc.encoder import NMEA2000Encoder
+from marulc.custom_parsers.MXPGN import MXPGNFormatter
+from marulc.exceptions import ChecksumError
+
+THIS_DIR = Path(__file__).parent
+
+FRAMES = [
+    "09F201B7 C01A01FFFFFFFFB0",
+    "09F201B7 C1813C050000B0BA",
+    "09F201B7 C21C00FFFFFFFFFF",
+    "09F201B7 C3000000007F7FFF",
+    "09F10D0A FF 00 00 00 FF 7F FF FF",
+    "09F200B7 01 DA 2F FF FF 01 FF FF",
+    "09F200C9 00 57 30 FF FF 01 FF FF",
+    "09F10DE5 00 F8 FF 7F F9 FE FF FF",
+]
+
+
+def assert_columns_match_messages(columns, messages):
+    for pgn, table in columns.items():
+        expected = [msg for msg in messages if msg["PGN"] == pgn]
+
+        for key in ("Priority", "SourceAddress", "PGN"):
+            assert table[key].tolist() == [msg[key] for msg in expected]
+
+        for field_id, column in table["Fields"].items():
+            assert column.tolist() == [msg["Fields"][field_id] for msg in expected]
+
+
+def test_split_frame():
+    assert split_frame("09F10D0A FF 00 00 00 FF 7F FF FF") == (
+        0x09F10D0A,
+        bytes.fromhex("FF000000FF7FFFFF"),
+    )
+    assert split_frame(bytes.fromhex("09F10D0AFF000000FF7FFFFF")) == (
+        0x09F10D0A,
+        bytes.fromhex("FF000000FF7FFFFF"),
+    )
+
+
+def test_unpack_frames_to_columns():
+    columns = unpack_frames_to_columns(FRAMES)
+
+    assert sorted(columns) == [127245, 127488, 127489]
+    assert len(columns[127488]["PGN"]) == 2
+    assert len(columns[127489]["PGN"]) == 1
+
+    messages = list(parse_from_iterator(NMEA2000Parser(), FRAMES, quiet=True))
+    assert_columns_match_messages(columns, messages)
+
+
+def test_unpack_frames_to_columns_raw_bytes():
+    raw = [bytes.fromhex("".join(frame.split())) for frame in FRAMES]
+
+    columns = unpack_frames_to_columns(raw)
+    expected = unpack_frames_to_columns(FRAMES)
+
+    assert columns.keys() == expected.keys()
+    for pgn, table in columns.items():
+        for field_id, column in table["Fields"].items():
+            np.testing.assert_array_equal(column, expected[pgn]["Fields"][field_id])
+
+
+def test_unpack_frames_to_columns_from_log():
+    # Re-create raw CAN frames from the MXPGN sentences in the test log
+    frames = []
+    with (THIS_DIR / "nmea_test_log.txt").open() as f_handle:
+        for line in f_handle:
+            if line.startswith("$MXPGN"):
+                pgn, attributes, data = line.split("*")[0].split(",")[1:]
+                attributes = int(attributes, 16)
+                can_id = (
+                    ((attributes >> 12) & 0x7) << 26
+                    | int(pgn, 16) << 8
+                    | attributes & 0xFF
+                )
+                frames.append(f"{can_id:08X} {data}")
+
+    columns = unpack_frames_to_columns(frames)
+    messages = list(parse_from_iterator(NMEA2000Parser(), frames, quiet=True))
+
+    assert sum(len(table["PGN"]) for table in columns.values()) == len(messages)
+    assert_columns_match_messages(columns, messages)
+
+
+def test_unpack_frames_to_columns_wide_fields():
+    # Product information, a fast packet containing 256-bit wide text fields
+    payload = bytes(range(134))
+    chunks = [payload[:6]] + [payload[i : i + 7] for i in range(6, 134, 7)]
+    frames = [
+        f"19F01400 {((0 << 5) | index):02X}{'86' if index == 0 else ''}{chunk.hex()}"
+        for index, chunk in enumerate(chunks)
+    ]
+
+    columns = unpack_frames_to_columns(frames)
+    messages = list(parse_from_iterator(NMEA2000Parser(), frames, quiet=True))
+
+    assert len(messages) == 1
+    assert_columns_match_messages(columns, messages)
+
+
+def test_unpack_frames_to_columns_sentinels():
+    columns = unpack_frames_to_columns(
+        ["09F200B7 01 DA 2F FF FF 01 FF FF", "09F200B7 01 DA 2F 10 00 01 FF FF"],
+        sentinels=True,
+    )
+
+    boost = columns[127488]["Fields"]["boostPressure"]
+    assert np.isnan(boost[0])
+    assert boost[1] == 16
+
+
+@pytest.mark.parametrize("pgn", [127488, 129029])
+def test_pack_columns(pgn):
+    rows = 20
+    fields = (
+        {"instance": np.arange(rows) % 2, "speed": np.linspace(0, 3000, rows)}
+        if pgn == 127488
+        else {"latitude": np.linspace(-80, 80, rows), "altitude": np.full(rows, np.nan)}
+    )
+    source_address = np.arange(rows) % 3
+
+    can_ids, frames = pack_columns(pgn, fields, source_address, priority=3)
+
+    # Identical to packing the messages one by one
+    encoder = NMEA2000Encoder()
+    expected = encoder.pack_many(
+        {
+            "PGN": pgn,
+            "Priority": 3,
+            "SourceAddress": int(source_address[row]),
+            "Fields": {
+                key: None if np.isnan(column[row]) else column[row].item()
+                for key, column in fields.items()
+            },
+        }
+        for row in range(rows)
+    )
+    assert can_ids.tolist() == [can_id for can_id, _, _ in expected]
+    assert [row.tobytes() for row in frames] == [data for _, data, _ in expected]
+
+    columns = unpack_frames_to_columns(
+        int(can_id).to_bytes(4, "big") + row.tobytes()
+        for can_id, row in zip(can_ids, frames)
+    )
+    assert columns[pgn]["SourceAddress"].tolist() == source_address.tolist()
+
+
+def test_verify_checksums():
+    buffer = (
+        b"$GPZDA,1*00\n"
+        b"$YDHDM,0.0,M*3F\r\n"
+        b"no checksum\n"
+        b"$YDHDM,0.0,M*3\n"
+        b"$YDHDM,0.0,M*ZZ\n"
+        b"\n"
+        b"$YDHDM,0.0,M*3f\n"
+    )
+    assert verify_checksums(buffer).tolist() == [
+        False,
+        True,
+        True,
+        False,
+        False,
+        True,
+        True,
+    ]
+    assert verify_checksums(b"").tolist() == []
+    assert verify_checksums(b"$YDHDM,0.0,M*3F").tolist() == [True]
+
+
+def test_verify_checksums_matches_parser():
+    buffer = (THIS_DIR / "nmea_test_log.txt").read_bytes()
+    # Corrupt every tenth sentence
+    lines = buffer.splitlines()
+    lines[::10] = [line.replace(b",", b";", 1) for line in lines[::10]]
+    buffer = b"\n".join(lines)
+
+    expected = []
+    for line in lines:
+        try:
+            NMEA0183Parser([MXPGNFormatter()]).unpack(line.decode())
+            expected.append(True)
+        except ChecksumError:
+            expected.append(False)
+        except Exception:
+            expected.append(True)
+
+    assert verify_checksums(buffer).tolist() == expected
+    assert sum(expected) == len(lines) - len(lines[::10])
+
+
+def test_unpack_ais_to_columns():
+    sentences = [
+        "!AIVDM,1,1,,B,15M67FC000G?ufbE`FepT@3n00Sa,0*5C",
+        "!AIVDM,2,1,3,B,55P5TL01VIaAL@7WKO@mBplU@<PDhh000000001S;AJ::4A80?4i@E53,0*3E",
+        "!AIVDM,2,2,3,B,1@0000000000000,2*55",
+        "!AIVDM,1,1,,A,B6CdCm0t3`tba35f@V9faHi7kP06,0*58",
+        "!AIVDM,1,1,,A,H42O55i18tMET00000000000000,2*6D",
+        "!AIVDM,1,1,,B,15M67FC000G?ufbE`FepT@3n00Sa,0*5D",
+        "!AIVDM,1,1,,B,15M67FC000G?ufbE`FepT@3n00SX,0",
+        "$YDHDM,0.0,M*3F",
+    ]
+    parser = NMEA0183Parser()
+    expected = [
+        msg
+        for msg in parse_from_iterator(parser, sentences, quiet=True)
+        if msg["Formatter"] == "VDM"
+    ]
+
+    columns = unpack_ais_to_columns(sentences)
+    assert sorted(columns) == [1, 18]
+
+    # The sentence with a mismatching checksum
+    columns = unpack_ais_to_columns(sentences, [1], verify_checksum=False)
+    assert len(columns[1]["MessageType"]) == 2
+
+    columns = unpack_ais_to_columns(sentences, None)
+    assert sorted(columns, key=str) == [(24, 0), 1, 18, 5]
+
+    for msg in expected:
+        key = msg["MessageType"]
+        if key == 24:
+            key = (24, msg["Fields"]["partno"])
+        column = columns[key]
+        assert list(column["MessageType"]) == [msg["MessageType"]]
+        for field, value in msg["Fields"].items():
+            assert column["Fields"][field][0] == pytest.approx(value)
@@ -0,0 +1,85 @@
+from pathlib import Path
+
+from marulc import NMEA0183Parser, NMEA2000Parser, parse_from_iterator
+from marulc.cache import DecodeCache
+from marulc.nmea2000 import unpack_complete_message
+from marulc.custom_parsers.MXPGN import MXPGNFormatter
+from marulc.custom_parsers.PCDIN import PCDINFormatter
+
+THIS_DIR = Path(__file__).parent
+
+
+def test_decode_cache_counters():
+    cache = DecodeCache(max_entries=2)
+    calls = []
+
+    def unpack(pgn, data):
+        calls.append(pgn)
+        return unpack_complete_message(pgn, data)
+
+    first = bytes.fromhex("FF000000FF7FFFFF")
+    second = bytes.fromhex("FF010000FF7FFFFF")
+    third = bytes.fromhex("FF020000FF7FFFFF")
+
+    assert cache.unpack(127245, first, unpack) == unpack_complete_message(127245, first)
+    cache.unpack(127245, bytearray(first), unpack)
+    assert (cache.hits, cache.misses, cache.evicted) == (1, 1, 0)
+
+    cache.unpack(127245, second, unpack)
+    cache.unpack(127245, third, unpack)
+    assert (cache.hits, cache.misses, cache.evicted) == (1, 3, 1)
+    assert len(cache) == 2
+    assert len(calls) == 3
+
+    # The least recently used entry was evicted
+    cache.unpack(127245, first, unpack)
+    assert (cache.hits, cache.misses, cache.evicted) == (1, 4, 2)
+
+
+def test_decode_cache_hands_out_copies():
+    cache = DecodeCache()
+    payload = bytes.fromhex("FF000000FF7FFFFF")
+
+    msg = cache.unpack(127245, payload, unpack_complete_message)
+    msg["PGN"] = 127245
+    msg["Fields"]["angleOrder"] = "muppet"
+
+    assert cache.unpack(127245, payload, unpack_complete_message) == (
+        unpack_complete_message(127245, payload)
+    )
+
+
+def test_nmea2000_parser_cache():
+    cache = DecodeCache()
+    parser = NMEA2000Parser(cache=cache)
+
+    for source_address in ("0A", "0B", "0A"):
+        msg = parser.unpack(f"09F10D{source_address} FF 00 00 00 FF 7F FF FF")
+        assert msg == NMEA2000Parser().unpack(
+            f"09F10D{source_address} FF 00 00 00 FF 7F FF FF"
+        )
+
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_cached_parsers_match_uncached_parsers():
+    with (THIS_DIR / "nmea_test_log.txt").open() as f_handle:
+        lines = f_handle.readlines()
+
+    cache = DecodeCache()
+    expected = list(
+        parse_from_iterator(
+            NMEA0183Parser([MXPGNFormatter(), PCDINFormatter()]), lines, quiet=True
+        )
+    )
+    messages = list(
+        parse_from_iterator(
+            NMEA0183Parser([MXPGNFormatter(cache=cache), PCDINFormatter(cache=cache)]),
+            lines,
+            quiet=True,
+        )
+    )
+
+    assert messages == expected
+    assert cache.hits
+    assert cache.hits + cache.misses == len([msg for msg in messages if "PGN" in msg])
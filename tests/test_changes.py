@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import pytest
+
+from marulc import NMEA0183Parser, NMEA2000Parser, parse_from_iterator
+from marulc.changes import ChangeFilter
+from marulc.exceptions import UnchangedMessageError
+from marulc.custom_parsers.MXPGN import MXPGNFormatter
+from marulc.custom_parsers.PCDIN import PCDINFormatter
+
+THIS_DIR = Path(__file__).parent
+
+
+def test_change_filter():
+    changes = ChangeFilter()
+
+    assert changes.changed((127245, 10), b"\x00")
+    assert not changes.changed((127245, 10), bytearray(b"\x00"))
+    assert changes.changed((127245, 11), b"\x00")
+    assert changes.changed((127245, 10), b"\x01")
+    assert not changes.changed((127245, 10), b"\x01")
+    assert changes.suppressed == 2
+
+
+def test_change_filter_heartbeat():
+    now = [0.0]
+    changes = ChangeFilter(heartbeat=10, clock=lambda: now[0])
+
+    assert changes.changed("key", b"\x00")
+    now[0] = 9.0
+    assert not changes.changed("key", b"\x00")
+    now[0] = 10.0
+    assert changes.changed("key", b"\x00")
+    assert not changes.changed("key", b"\x00")
+
+    # Explicit timestamps take precedence over the clock
+    assert changes.changed("key", b"\x00", timestamp=25.0)
+
+
+def test_change_filter_bounded():
+    changes = ChangeFilter(max_entries=2)
+
+    for key in range(3):
+        assert changes.changed(key, b"\x00")
+    assert len(changes) == 2
+
+    # The oldest key was forgotten
+    assert changes.changed(0, b"\x00")
+    assert not changes.changed(2, b"\x00")
+
+
+def test_nmea2000_parser_change_filter():
+    parser = NMEA2000Parser(change_filter=ChangeFilter(heartbeat=1))
+
+    assert parser.unpack_frame(0x09F10D0A, bytes.fromhex("FF000000FF7FFFFF"), 0.0)
+    with pytest.raises(UnchangedMessageError):
+        parser.unpack_frame(0x09F10D0A, bytes.fromhex("FF000000FF7FFFFF"), 0.5)
+    assert parser.unpack_frame(0x09F10D0B, bytes.fromhex("FF000000FF7FFFFF"), 0.5)
+    assert parser.unpack_frame(0x09F10D0A, bytes.fromhex("FF000000FF7FFFFF"), 1.0)
+
+    frames = [(0x09F10D0A, bytes.fromhex("FF010000FF7FFFFF"), 2.0)] * 3
+    assert len(list(parser.unpack_frames(frames))) == 1
+
+
+def test_nmea0183_parser_change_filter():
+    parser = NMEA0183Parser(change_filter=ChangeFilter())
+    sentences = [
+        "$GPZDA,110759.39,01,01,1970",
+        "$GPZDA,110759.39,01,01,1970",
+        "$IIZDA,110759.39,01,01,1970",
+        "$GPZDA,110800.39,01,01,1970",
+    ]
+
+    messages = list(parse_from_iterator(parser, sentences))
+    assert [msg["Talker"] for msg in messages] == ["GP", "II", "GP"]
+
+
+def test_change_filter_on_log():
+    with (THIS_DIR / "nmea_test_log.txt").open() as f_handle:
+        lines = f_handle.readlines()
+
+    changes = ChangeFilter()
+    parser = NMEA0183Parser(
+        [
+            MXPGNFormatter(change_filter=changes),
+            PCDINFormatter(change_filter=changes),
+        ],
+        change_filter=changes,
+    )
+    expected = list(
+        parse_from_iterator(
+            NMEA0183Parser([MXPGNFormatter(), PCDINFormatter()]), lines, quiet=True
+        )
+    )
+    messages = list(parse_from_iterator(parser, lines, quiet=True))
+
+    assert changes.suppressed
+    assert len(messages) + changes.suppressed == len(expected)
+
+    # Only unchanged messages are dropped, the rest are emitted in order
+    remaining = iter(expected)
+    assert all(msg in remaining for msg in messages)
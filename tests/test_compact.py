@@ -0,0 +1,50 @@
+import pickle
+from pathlib import Path
+
+from marulc import NMEA0183Parser, NMEA2000Parser, parse_from_iterator
+from marulc.compact import CompactMessage, compact_message, compact_messages
+from marulc.custom_parsers.MXPGN import MXPGNFormatter
+
+THIS_DIR = Path(__file__).parent
+
+
+def test_compact_message():
+    msg = NMEA2000Parser().unpack("09F200C9 00 57 30 FF FF 01 FF FF")
+    compact = compact_message(msg)
+
+    assert isinstance(compact, CompactMessage)
+    assert type(compact).__name__ == "CompactPGN127488"
+    assert compact.to_dict() == msg
+    assert list(compact.to_dict()) == list(msg)
+    assert compact.fields == msg["Fields"]
+
+    assert compact.speed == msg["Fields"]["speed"]
+    assert compact.get("speed") == msg["Fields"]["speed"]
+    assert compact.get("PGN") == 127488
+    assert compact.get("muppet", 42) == 42
+
+    # All messages of a kind share a single class and schema
+    other = compact_message(NMEA2000Parser().unpack("09F200B7 01 DA 2F FF FF 01 FF FF"))
+    assert type(other) is type(compact)
+    assert other.schema is compact.schema
+
+
+def test_compact_message_pickle():
+    compact = compact_message(NMEA0183Parser().unpack("$GPZDA,110759.39,01,01,1970"))
+
+    restored = pickle.loads(pickle.dumps(compact))
+    assert type(restored) is type(compact)
+    assert restored.to_dict() == compact.to_dict()
+
+
+def test_compact_messages_match_dicts():
+    with (THIS_DIR / "nmea_test_log.txt").open() as f_handle:
+        lines = f_handle.readlines()
+
+    parser = NMEA0183Parser([MXPGNFormatter()])
+    expected = list(parse_from_iterator(parser, lines, quiet=True))
+
+    parser = NMEA0183Parser([MXPGNFormatter(lazy=True)], lazy=True)
+    messages = list(compact_messages(parse_from_iterator(parser, lines, quiet=True)))
+
+    assert [msg.to_dict() for msg in messages] == expected
@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import pytest
+
+from marulc import unpack_nmea0183_message
+from marulc.converters import (
+    Conversion,
+    compile_converters,
+    field_converter,
+    parse_value,
+    to_degrees,
+    to_seconds,
+)
+from marulc.exceptions import ParseError
+from marulc.nmea0183 import STANDARD_SENTENCE_FORMATTERS
+
+THIS_DIR = Path(__file__).parent
+
+GGA = "$YDGGA,110800.00,5741.1612,N,01153.1447,E,1,10,1.30,43.00,M,0.00,M,,*59"
+
+
+def read_log():
+    with (THIS_DIR / "nmea_test_log.txt").open() as f_handle:
+        return f_handle.read().splitlines()
+
+
+def test_default_conversion_is_parse_value():
+    for definition in STANDARD_SENTENCE_FORMATTERS.values():
+        for field in definition["Fields"]:
+            convert = field_converter(field)
+            for value in (
+                "",
+                "A",
+                "7",
+                "1.5",
+                "110800.00",
+                "-0.0",
+                "GPS",
+                "infinity",
+                "Inf",
+            ):
+                assert convert(value) == parse_value(value)
+
+
+def test_default_conversion_of_log():
+    for line in read_log():
+        try:
+            msg = unpack_nmea0183_message(line)
+        except ParseError:
+            continue
+        if msg["Formatter"] not in STANDARD_SENTENCE_FORMATTERS:
+            continue
+
+        data = line.split("*")[0].split(",")[1:]
+        assert (
+            list(msg["Fields"].values())
+            == [parse_value(value) for value in data][: len(msg["Fields"])]
+        )
+
+
+def test_typed_conversion():
+    fields = unpack_nmea0183_message(GGA, conversion=Conversion(typed=True))["Fields"]
+
+    assert fields["timestamp"] == "110800.00"
+    assert fields["lat"] == 5741.1612
+    assert fields["lat_dir"] == "N"
+    assert fields["gps_qual"] == 1
+    assert isinstance(fields["num_sats"], int)
+    assert isinstance(fields["altitude"], float)
+    assert fields["geo_sep"] == 0.0
+    assert fields["age_gps_data"] is None
+    assert fields["ref_station_id"] is None
+
+
+def test_degrees_and_seconds():
+    conversion = Conversion(degrees=True, seconds=True)
+    fields = unpack_nmea0183_message(GGA, conversion=conversion)["Fields"]
+
+    assert fields["timestamp"] == 11 * 3600 + 8 * 60
+    assert fields["lat"] == pytest.approx(57 + 41.1612 / 60)
+    assert fields["lon"] == pytest.approx(11 + 53.1447 / 60)
+
+    assert to_degrees("") is None
+    assert to_degrees("4916.45") == pytest.approx(49 + 16.45 / 60)
+    assert to_degrees("muppet") == "muppet"
+    assert to_seconds("235959.5") == pytest.approx(86399.5)
+    assert to_seconds("muppet") == "muppet"
+
+
+def test_lazy_conversion():
+    conversion = Conversion(typed=True, degrees=True)
+    eager = unpack_nmea0183_message(GGA, conversion=conversion)
+    lazy = unpack_nmea0183_message(GGA, lazy=True, conversion=conversion)
+    assert lazy["Fields"] == eager["Fields"]
+
+
+def test_compiled_once():
+    definition = STANDARD_SENTENCE_FORMATTERS["GGA"]
+    assert compile_converters(definition) is compile_converters(definition)
+    assert compile_converters(definition) is not compile_converters(
+        definition, Conversion(typed=True)
+    )
@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import time
+import subprocess
+
+from marulc import database
+from marulc.database import (
+    LazyDatabase,
+    artifact_path,
+    compile_database,
+    load_database,
+)
+from marulc.nmea2000 import DB_PATH
+
+
+def test_lazy_database():
+    calls = []
+
+    def loader():
+        calls.append(None)
+        return {"A": 1}
+
+    db = LazyDatabase(loader)
+    assert not db.loaded
+    assert not calls
+
+    assert db["A"] == 1
+    assert "A" in db
+    assert db.get("B") is None
+    assert dict(db) == {"A": 1}
+    assert db.loaded
+    assert len(calls) == 1
+
+
+def test_lazy_database_writes():
+    changes = []
+    db = LazyDatabase(lambda: {"A": 1})
+    db.observe(changes.append)
+
+    db["B"] = 2
+    assert dict(db) == {"A": 1, "B": 2}
+    del db["A"]
+    assert db.pop("B") == 2
+    assert not db
+    assert changes == ["B", "A", "B"]
+
+    # Derived mappings are loaded again after a reset
+    db.reset()
+    assert not db.loaded
+    assert dict(db) == {"A": 1}
+
+
+def test_import_does_not_load_databases():
+    code = (
+        "import marulc, marulc.nmea2000, marulc.nmea0183;"
+        "print(marulc.nmea2000.PGN_DB.loaded, marulc.nmea0183.db.loaded)"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+    assert output.split() == ["False", "False"]
+
+
+def test_import_does_not_import_loaders():
+    code = (
+        "import sys, marulc;"
+        "print(*(name in sys.modules for name in ('json', 'pickle', 'hashlib')))"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+    assert output.split() == ["False", "False", "False"]
+
+
+def test_compile_database(tmp_path):
+    json_path = tmp_path / "db.json"
+    json_path.write_bytes(DB_PATH.read_bytes())
+
+    path = compile_database(json_path)
+    assert path == artifact_path(json_path)
+    assert path.exists()
+    assert load_database(json_path) == json.loads(DB_PATH.read_bytes())
+
+
+def test_load_database_stale_artifact(tmp_path):
+    json_path = tmp_path / "db.json"
+    json_path.write_text(json.dumps({"version": 1}))
+    compile_database(json_path)
+
+    # The artifact no longer matches the JSON file and must not be used
+    json_path.write_text(json.dumps({"version": 2}))
+    assert load_database(json_path) == {"version": 2}
+
+    # Broken artifacts are ignored as well
+    artifact_path(json_path).write_bytes(b"garbage")
+    assert load_database(json_path) == {"version": 2}
+
+
+def test_load_database_cheap_keys(tmp_path, monkeypatch):
+    json_path = tmp_path / "db.json"
+    json_path.write_text(json.dumps({"version": 1}))
+    modified = time.time_ns() - 10 * database.RACY_INTERVAL
+    os.utime(json_path, ns=(modified, modified))
+    compile_database(json_path)
+
+    def no_digest(raw):
+        raise AssertionError("Digest computed")
+
+    # Same size and modification time, the JSON file is neither read nor hashed
+    monkeypatch.setattr(database, "_digest", no_digest)
+    assert load_database(json_path) == {"version": 1}
+    monkeypatch.undo()
+
+    # Same content with a new modification time, i.e. once installed
+    os.utime(json_path, ns=(modified + 1000, modified + 1000))
+    assert load_database(json_path) == {"version": 1}
+
+    # The artifact has been refreshed with the new modification time
+    monkeypatch.setattr(database, "_digest", no_digest)
+    assert load_database(json_path) == {"version": 1}
+    assert set(tmp_path.iterdir()) == {json_path, artifact_path(json_path)}
@@ -0,0 +1,133 @@
+import pytest
+
+from marulc import NMEA2000Parser
+from marulc.encoder import (
+    NMEA2000Encoder,
+    format_frame,
+    get_packet_encoder,
+    pack_can_id,
+    pack_fields,
+    pack_header,
+    split_fast_packet,
+)
+from marulc.exceptions import PGNError
+from marulc.nmea2000 import (
+    DEFINITION_INDEX,
+    PGN_DEFINITIONS,
+    resolve_definition,
+    unpack_can_id,
+    unpack_fields,
+    unpack_header,
+)
+
+
+def test_pack_can_id():
+    assert pack_can_id(10, 127245, 2) == 0x09F10D0A
+    assert unpack_can_id(pack_can_id(201, 127488, 2)) == (201, 127488, 2)
+    assert unpack_header(pack_header(201, 130306, 6)) == (201, 130306, 6)
+
+
+def test_pack_fields():
+    payload = bytes.fromhex("005730FFFF01FFFF")
+    assert pack_fields(127488, unpack_fields(127488, payload)) == payload
+
+    # Missing fields and None are "data not available"
+    assert pack_fields(127488, {"instance": 0, "speed": None}) == bytes.fromhex(
+        "00FFFFFFFF7FFFFF"
+    )
+
+    with pytest.raises(ValueError):
+        pack_fields(127488, {"instance": 256})
+    with pytest.raises(ValueError):
+        pack_fields(127488, {"tiltTrim": -129})
+    with pytest.raises(PGNError):
+        pack_fields(1, {})
+
+
+@pytest.mark.parametrize(
+    "pgn",
+    [
+        pgn
+        for pgn, definitions in PGN_DEFINITIONS.items()
+        if pgn not in DEFINITION_INDEX
+        and definitions[0]["Complete"]
+        and definitions[0]["Type"] in ("Single", "Fast")
+        and (definitions[0]["Type"] == "Fast" or definitions[0]["Length"] <= 8)
+    ],
+)
+def test_pack_fields_inverts_unpack_fields(pgn):
+    encoder = get_packet_encoder(pgn)
+    payload = (bytes(range(7, 256, 3)) * 8)[: encoder.length]
+
+    fields = unpack_fields(pgn, payload)
+    assert unpack_fields(pgn, pack_fields(pgn, fields)) == fields
+
+
+def test_pack_fields_with_lookups():
+    payload = bytes.fromhex("FF00FFFF04001000")
+    fields = unpack_fields(127493, payload, lookups=True)
+    assert unpack_fields(127493, pack_fields(127493, fields), lookups=True) == fields
+
+
+def test_pack_fields_resolves_definition():
+    for variant, definition in enumerate(PGN_DEFINITIONS[126208]):
+        if not definition["Complete"]:
+            continue
+        match = {
+            field["Id"]: field["Match"]
+            for field in definition["Fields"]
+            if "Match" in field
+        }
+        assert resolve_definition(126208, pack_fields(126208, match)) == variant
+
+
+def test_split_fast_packet():
+    payload = bytes(range(20))
+    frames = split_fast_packet(payload, 3)
+
+    assert frames == [
+        bytes([0x60, 20]) + payload[:6],
+        bytes([0x61]) + payload[6:13],
+        bytes([0x62]) + payload[13:20],
+    ]
+    assert split_fast_packet(bytes(7), 0)[-1] == bytes([0x01, 0]) + b"\xff" * 6
+
+    with pytest.raises(ValueError):
+        split_fast_packet(bytes(224), 0)
+
+
+def test_encoder_round_trip():
+    encoder = NMEA2000Encoder()
+    parser = NMEA2000Parser()
+    messages = [
+        {
+            "PGN": 129029,
+            "Priority": 3,
+            "SourceAddress": source_address,
+            "Fields": {"latitude": 57.7, "longitude": 11.9},
+        }
+        for source_address in (1, 2, 1)
+    ]
+
+    frames = encoder.pack_many(messages)
+    count = 1 + -(-(get_packet_encoder(129029).length - 6) // 7)
+    assert len(frames) == 3 * count
+
+    # Sequence counters are kept per PGN and source address
+    assert [data[0] >> 5 for _, data, _ in frames[::count]] == [0, 0, 1]
+
+    unpacked = list(parser.unpack_frames(frames))
+    assert len(unpacked) == 3
+    for msg, expected in zip(unpacked, messages):
+        assert msg["Priority"] == 3
+        assert msg["SourceAddress"] == expected["SourceAddress"]
+        assert msg["Fields"]["latitude"] == pytest.approx(57.7)
+
+
+def test_encoder_formats():
+    encoder = NMEA2000Encoder(priority=2)
+    msg = NMEA2000Parser().unpack("09F200C9 00 57 30 FF FF 01 FF FF")
+
+    assert encoder.pack_hex(msg) == ["09F200C9 00 57 30 FF FF 01 FF FF"]
+    assert encoder.pack_bytes(msg) == [bytes.fromhex("09F200C9005730FFFF01FFFF")]
+    assert format_frame(0x09F10D0A, bytes(2)) == "09F10D0A 00 00"
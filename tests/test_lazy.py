@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import bitstruct
+import pytest
+
+from marulc import NMEA0183Parser, NMEA2000Parser, parse_from_iterator
+from marulc.lazy import LazyFields, PacketFields, SentenceFields
+from marulc.nmea2000 import PGN_DEFINITIONS, get_packet_decoder, unpack_fields
+from marulc.custom_parsers.MXPGN import MXPGNFormatter
+
+THIS_DIR = Path(__file__).parent
+
+
+def test_packet_fields_decode_on_access():
+    payload = bytes.fromhex("FF000000FF7FFFFF")
+    fields = unpack_fields(127245, payload, lazy=True)
+
+    assert isinstance(fields, PacketFields)
+    assert not fields._values
+    assert fields["angleOrder"] == unpack_fields(127245, payload)["angleOrder"]
+    assert list(fields._values) == ["angleOrder"]
+
+    assert fields == unpack_fields(127245, payload)
+    assert fields.to_dict() == unpack_fields(127245, payload)
+    assert list(fields) == list(unpack_fields(127245, payload))
+
+    with pytest.raises(KeyError):
+        fields["muppet"]
+
+
+def test_packet_fields_too_short():
+    with pytest.raises(bitstruct.Error):
+        PacketFields(get_packet_decoder(127245), bytes(2))
+
+
+@pytest.mark.parametrize(
+    "pgn",
+    [
+        pgn
+        for pgn, definitions in PGN_DEFINITIONS.items()
+        if len(definitions) == 1 and definitions[0]["Complete"]
+    ],
+)
+def test_packet_fields_match_unpack_fields(pgn):
+    decoder = get_packet_decoder(pgn)
+    length = max(decoder.length, (decoder.total_bits + 7) // 8)
+    payload = (bytes(range(256)) * 3)[:length]
+
+    assert unpack_fields(pgn, payload, lazy=True) == unpack_fields(
+        pgn, payload, compiled=True
+    )
+
+
+def test_sentence_fields():
+    parser = NMEA0183Parser(lazy=True)
+    msg = parser.unpack("$GPZDA,110759.39,01,01,1970")
+
+    assert msg["Talker"] == "GP"
+    assert msg["Formatter"] == "ZDA"
+    assert isinstance(msg["Fields"], SentenceFields)
+
+    # Sentences lacking trailing fields only hold the fields present
+    assert len(msg["Fields"]) == 4
+    assert (
+        msg["Fields"]
+        == NMEA0183Parser().unpack("$GPZDA,110759.39,01,01,1970")["Fields"]
+    )
+
+
+def test_lazy_parsers_match_eager_parsers():
+    with (THIS_DIR / "nmea_test_log.txt").open() as f_handle:
+        lines = f_handle.readlines()
+
+    eager = NMEA0183Parser([MXPGNFormatter()])
+    lazy = NMEA0183Parser([MXPGNFormatter(lazy=True)], lazy=True)
+
+    expected = list(parse_from_iterator(eager, lines, quiet=True))
+    messages = list(parse_from_iterator(lazy, lines, quiet=True))
+
+    assert len(messages) == len(expected)
+    for msg, reference in zip(messages, expected):
+        assert isinstance(msg["Fields"], LazyFields)
+        assert msg == reference
+
+
+def test_lazy_nmea2000_parser():
+    msg = NMEA2000Parser(lazy=True).unpack("09F10D0A FF 00 00 00 FF 7F FF FF")
+
+    assert msg["PGN"] == 127245
+    assert msg["SourceAddress"] == 10
+    assert isinstance(msg["Fields"], PacketFields)
+    assert msg == NMEA2000Parser().unpack("09F10D0A FF 00 00 00 FF 7F FF FF")
+
+
+def test_lazy_fields_is_abstract():
+    with pytest.raises(TypeError):
+        LazyFields({"a": 0})
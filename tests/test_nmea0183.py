@@ -1,17 +1,54 @@
+import operator
+import sys
+from functools import reduce
+from pathlib import Path
+
 import pytest
 
+from marulc import NMEA0183Parser, parse_from_iterator, unpack_nmea0183_message
+from marulc.exceptions import ChecksumError, ParseError
 from marulc.nmea0183 import (
+    PROPRIETARY,
+    QUERY,
+    TALKER,
+    _tokenize_fast,
+    _tokenize_with_regex,
     calculate_checksum,
+    find_proprietary_definition,
     parse_value,
     get_description_for_sentence_formatter,
+    tokenize_sentence,
+    unpack_using_proprietary,
 )
 
+THIS_DIR = Path(__file__).parent
+
 
 def test_checksum():
     nmea_str = "GNGGA,122203.19,5741.1549,N,01153.1748,E,4,37,0.5,4.03,M,35.78,M,,"
     checksum = "72"
 
     assert calculate_checksum(nmea_str) == int(checksum, 16)
+    assert calculate_checksum(nmea_str.encode()) == int(checksum, 16)
+    assert calculate_checksum(memoryview(nmea_str.encode())) == int(checksum, 16)
+    assert calculate_checksum("") == 0
+
+
+def test_checksum_long_sentences():
+    data = bytes(range(256)) * 3 + b"muppet"
+    expected = reduce(operator.xor, data, 0)
+    assert calculate_checksum(data) == expected
+    assert calculate_checksum(data.decode("latin-1")) == expected
+
+
+def test_skip_checksum_verification():
+    line = "$YDHDM,0.0,M*00"
+    with pytest.raises(ChecksumError):
+        unpack_nmea0183_message(line)
+
+    msg = unpack_nmea0183_message(line, verify_checksum=False)
+    assert msg["Formatter"] == "HDM"
+    assert NMEA0183Parser(verify_checksums=False).unpack(line) == msg
 
 
 def test_parse_value():
@@ -26,3 +63,169 @@ def test_get_description(pinned):
 
     with pytest.raises(ValueError):
         get_description_for_sentence_formatter("muppet")
+
+
+def test_tokenize_sentence():
+    assert tokenize_sentence("$YDHDM,0.0,M*3F\r\n") == (
+        "YDHDM,0.0,M",
+        "YDHDM,",
+        "0.0,M",
+        "3F",
+        TALKER,
+    )
+    assert tokenize_sentence("$CCGPQ,GGA")[1:] == ("CCGPQ,GGA", "", None, QUERY)
+    assert tokenize_sentence("$pcdin,01*00")[1::3] == ("PCDI", PROPRIETARY)
+    assert tokenize_sentence("$GPGGA")[1::3] == ("", None)
+
+    with pytest.raises(ParseError):
+        tokenize_sentence("$GPGGA,1*ZZ")
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "  $GPGGA,1,2*4E\r\n",
+        "$GPGGA,1,2\r\n",
+        "$gpgga,1*ab",
+        "\t$GPZDA,1*00",
+        "$CCGPQ,GGAX,1",
+        "$CCGPQ,G",
+        "$PABC*12",
+        "$P_AB,1",
+        "$GP_GA,1",
+        "$GPGGA,1*1",
+        "$GPGGA,1**12",
+        "GPGGA,1",
+        "x$GPGGA,1",
+        "$PABé,1",
+        "$",
+    ],
+)
+def test_tokenize_fast_matches_regex(line):
+    try:
+        expected = _tokenize_with_regex(line)
+    except ParseError:
+        expected = None
+
+    # Odd sentences are left to the regexes
+    assert _tokenize_fast(line) in (None, expected)
+    if expected is not None:
+        assert tokenize_sentence(line) == expected
+
+
+def test_tokenize_fast_matches_regex_on_log():
+    with (THIS_DIR / "nmea_test_log.txt").open() as f_handle:
+        for line in f_handle:
+            assert _tokenize_fast(line) == _tokenize_with_regex(line)
+
+
+def test_unpack_buffer():
+    parser = NMEA0183Parser()
+    data = (
+        b"$YDHDM,0.0,M*3F\r\n"
+        b"$YDROT,-0.6,A*00\r\n"
+        b"\r\n"
+        b"$YDRSA,-0.1,A,,V*48\n"
+        b"$YDVTG,328.0,T,3"
+    )
+    messages, errors, tail = parser.unpack_buffer(data)
+
+    assert [msg["Formatter"] for msg in messages] == ["HDM", "RSA"]
+    assert [(index, type(exc)) for index, exc in errors] == [(1, ChecksumError)]
+    assert tail == b"$YDVTG,328.0,T,3"
+
+    messages, errors, tail = parser.unpack_buffer(tail + b"28.0,M,0.0,N,0.0,K,A*29\r\n")
+    assert messages == [parser.unpack("$YDVTG,328.0,T,328.0,M,0.0,N,0.0,K,A*29")]
+    assert not errors
+    assert tail == b""
+
+
+def test_unpack_buffer_line_endings():
+    parser = NMEA0183Parser()
+    # Only "\n" ends a line, other line boundaries of str.splitlines do not
+    data = b"$YDHDM,0.0\x1c,M*3F\r\n$YDROT,-0.6,A*00\r\n\r\r\n$YDHDM,0.0,M*3F\n"
+    messages, errors, tail = parser.unpack_buffer(data)
+
+    assert [msg["Formatter"] for msg in messages] == ["HDM"]
+    assert [(index, type(exc)) for index, exc in errors] == [
+        (0, ChecksumError),
+        (1, ChecksumError),
+    ]
+    assert tail == b""
+
+
+def test_unpack_buffer_verifies_checksums_in_bulk(monkeypatch):
+    batch = pytest.importorskip("marulc.batch")
+    data = b"$YDHDM,0.0,M*3F\r\n$YDROT,-0.6,A*00\r\n$YDHDM,0.0,M*3F\n"
+
+    def unpacked(parser, buffer):
+        messages, errors, tail = parser.unpack_buffer(buffer)
+        return messages, [(index, type(error)) for index, error in errors], tail
+
+    expected = unpacked(NMEA0183Parser(), data)
+    assert expected[1] == [(1, ChecksumError)]
+
+    calls = []
+    verify_checksums = batch.verify_checksums
+    monkeypatch.setattr(
+        batch,
+        "verify_checksums",
+        lambda buffer: calls.append(buffer) or verify_checksums(buffer),
+    )
+    assert unpacked(NMEA0183Parser(), data + b"$YD") == (*expected[:2], b"$YD")
+    assert calls == [data]
+
+    # Line by line without numpy, or when checksums are not verified at all
+    monkeypatch.setitem(sys.modules, "marulc.batch", None)
+    assert unpacked(NMEA0183Parser(), data) == expected
+    assert not NMEA0183Parser(verify_checksums=False).unpack_buffer(data).errors
+    assert len(calls) == 1
+
+
+def test_unpack_buffer_matches_parse_from_iterator():
+    # The last line is complete once terminated
+    data = (THIS_DIR / "nmea_test_log.txt").read_bytes().rstrip() + b"\r\n"
+    parser = NMEA0183Parser()
+    expected = list(parse_from_iterator(parser, data.decode().splitlines(), True))
+
+    messages, tail = [], b""
+    for start in range(0, len(data), 1000):
+        result = parser.unpack_buffer(tail + data[start : start + 1000])
+        messages.extend(result.messages)
+        tail = result.tail
+
+    assert tail == b""
+    assert messages == expected
+
+
+@pytest.mark.parametrize(
+    "sentence,identifier",
+    [
+        ("$PASHR,ATT,1,2", "RATT"),
+        ("$PGRME,15.0,M,45.0,M,25.0,M", "E"),
+        ("$PGRMM,WGS 84", "M"),
+        ("$PGRMZ", "Z"),
+        ("$PSRF103,00,01,00,01", "103"),
+        ("$PUBX,00,1", "00"),
+        ("$PNORBT0,1,2", "BT0"),
+    ],
+)
+def test_unpack_proprietary_identifiers(sentence, identifier):
+    msg = unpack_nmea0183_message(sentence)
+    assert msg["Formatter"] == identifier
+
+    manufacturer = sentence[2:5]
+    data = sentence[5:].split(",")
+    assert find_proprietary_definition(manufacturer, data)[0] == identifier
+    assert unpack_using_proprietary(manufacturer, data)["Formatter"] == identifier
+
+
+def test_unpack_proprietary_unknown():
+    for sentence in ("$PASHR,123", "$PXXXA,1"):
+        with pytest.raises(ParseError):
+            unpack_nmea0183_message(sentence)
+
+    assert find_proprietary_definition("ASH", ["R"]) is None
+    assert find_proprietary_definition("ASH", []) is None
+    with pytest.raises(ParseError):
+        unpack_using_proprietary("ASH", ["R"])
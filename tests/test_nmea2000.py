@@ -2,19 +2,31 @@ from binascii import unhexlify
 
 import pytest
 
+from marulc import NMEA2000Parser
 from marulc.nmea2000 import (
     unpack_header,
+    unpack_can_id,
     packet_type,
     packet_total_length,
     packet_field_decoder,
     unpack_fields,
     unpack_complete_message,
     process_sub_packet,
+    FastPacketBucket,
     get_description_for_pgn,
+    get_packet_decoder,
+    warm_packet_decoders,
+    resolve_definition,
+    field_sentinel,
+    PGN_DB,
+    PGN_DEFINITIONS,
 )
+from marulc.encoder import pack_fields
 from marulc.exceptions import (
     MultiPacketDiscardedError,
     MultiPacketInProcessError,
+    ParseError,
+    PGNError,
 )
 
 
@@ -102,3 +114,308 @@ def test_get_description(pinned):
 
     with pytest.raises(ValueError):
         get_description_for_pgn(372418338952)
+
+
+def test_get_packet_decoder():
+    decoder = get_packet_decoder(127488)
+
+    assert decoder is get_packet_decoder(127488)
+    assert decoder.packet_type == "Single"
+    assert decoder.field_ids == tuple(
+        field["Id"] for field in get_description_for_pgn(127488)["Fields"]
+    )
+    assert decoder.compiled_format is packet_field_decoder(127488)
+
+    assert get_packet_decoder(372418338952) is None
+
+
+def test_warm_packet_decoders():
+    assert warm_packet_decoders([127488, 127489, 372418338952]) == 2
+    assert warm_packet_decoders() > 100
+
+
+def test_unpack_fields_single_field_definition():
+    # ISO Request holds its single field as a dict rather than a list
+    assert unpack_fields(59904, unhexlify("00EE00")) == {"pgn": 60928}
+
+
+@pytest.mark.parametrize("pgn", [127488, 127245, 129025, 130306, 127489])
+def test_unpack_fields_compiled(pgn):
+    length = get_packet_decoder(pgn).length
+    for raw in (bytes(length), b"\xff" * length, bytes(range(1, length + 1))):
+        expected = unpack_fields(pgn, raw)
+        unpacked = unpack_fields(pgn, raw, compiled=True)
+
+        assert unpacked == expected
+        assert list(unpacked) == list(expected)
+        assert [type(value) for value in unpacked.values()] == [
+            type(value) for value in expected.values()
+        ]
+
+
+def test_process_subpacket_complete_message(clean_bucket):
+    frames = [
+        "A01A00500F670D63",
+        "A1883C0A2D00FFFF",
+        "A2FFFFFFFF30007F",
+        "A3000000000809",
+    ]
+
+    for frame in frames[:-1]:
+        with pytest.raises(MultiPacketInProcessError):
+            process_sub_packet(127489, 86, unhexlify(frame), clean_bucket)
+
+    payload = process_sub_packet(127489, 86, unhexlify(frames[-1]), clean_bucket)
+
+    assert isinstance(payload, bytearray)
+    assert payload == unhexlify("00500F670D63883C0A2D00FFFFFFFFFFFF30007F000000000809")
+    assert len(payload) == packet_total_length(127489)
+    assert not clean_bucket
+
+
+@pytest.mark.parametrize("size", [0, 2, 7, 224, 255])
+def test_process_sub_packet_bogus_size(size):
+    # 130843 has several definitions of 8 bytes each, told apart by their payload
+    bucket = FastPacketBucket()
+    first = bytes([0xA0, size]) + bytes.fromhex("3F9F0100FFFF")
+
+    with pytest.raises(ParseError):
+        process_sub_packet(130843, 35, first, bucket)
+    assert not bucket
+
+    with pytest.raises(MultiPacketInProcessError):
+        process_sub_packet(130843, 35, bytes([0xA0, 8]) + first[2:], bucket)
+
+
+def test_fast_packet_bucket_eviction():
+    bucket = FastPacketBucket(max_entries=2)
+
+    for address in (1, 2, 3):
+        with pytest.raises(MultiPacketInProcessError):
+            process_sub_packet(127489, address, unhexlify("A01A00500F670D63"), bucket)
+
+    assert list(bucket) == [(127489, 2, 5), (127489, 3, 5)]
+    assert bucket.evicted == 1
+
+    # The evicted sequence can no longer be completed
+    with pytest.raises(MultiPacketDiscardedError):
+        process_sub_packet(127489, 1, unhexlify("A1883C0A2D00FFFF"), bucket)
+
+
+def test_fast_packet_bucket_expiry():
+    bucket = FastPacketBucket(timeout=0.5)
+
+    with pytest.raises(MultiPacketInProcessError):
+        process_sub_packet(127489, 86, unhexlify("A01A00500F670D63"), bucket, 10.0)
+
+    with pytest.raises(MultiPacketInProcessError):
+        process_sub_packet(127489, 86, unhexlify("A1883C0A2D00FFFF"), bucket, 10.4)
+
+    # Too long since the previous sub-packet
+    with pytest.raises(MultiPacketDiscardedError):
+        process_sub_packet(127489, 86, unhexlify("A2FFFFFFFF30007F"), bucket, 11.0)
+
+    assert bucket.expired == 1
+    assert len(bucket) == 0
+
+
+def test_fast_packet_bucket_clock():
+    now = [0.0]
+    bucket = FastPacketBucket(timeout=1.0, clock=lambda: now[0])
+
+    with pytest.raises(MultiPacketInProcessError):
+        process_sub_packet(127489, 86, unhexlify("A01A00500F670D63"), bucket)
+
+    now[0] = 5.0
+    assert bucket.expire() == 1
+    assert bucket.expired == 1
+
+
+FAST_PACKET_FRAMES = [
+    "09F201B7 C0 1A 01 FF FF FF FF B0",
+    "09F201B7 C1 FF FF FF FF FF FF FF",
+    "09F201B7 C2 FF FF FF FF FF FF FF",
+    "09F201B7 C3 FF FF FF FF FF FF 7F",
+]
+
+
+def test_fast_packet_bucket_default_never_expires():
+    now = [0.0]
+    parser = NMEA2000Parser(bucket=FastPacketBucket(clock=lambda: now[0]))
+
+    # A slow consumer or a replayed log, seconds pass between the frames
+    for frame in FAST_PACKET_FRAMES[:-1]:
+        with pytest.raises(MultiPacketInProcessError):
+            parser.unpack(frame)
+        now[0] += 1.5
+
+    assert parser.unpack(FAST_PACKET_FRAMES[-1])["PGN"] == 127489
+
+
+def test_fast_packet_bucket_does_not_mix_clocks():
+    bucket = FastPacketBucket(timeout=1.0, clock=lambda: 100.0)
+    parser = NMEA2000Parser(bucket=bucket)
+
+    # Frames without timestamps, then one with an epoch timestamp of a candump log
+    for frame in FAST_PACKET_FRAMES[:-1]:
+        with pytest.raises(MultiPacketInProcessError):
+            parser.unpack(frame)
+
+    can_id, data = FAST_PACKET_FRAMES[-1].split(maxsplit=1)
+    msg = parser.unpack_frame(int(can_id, 16), bytes.fromhex(data), 1436509052.0)
+    assert msg["PGN"] == 127489
+    assert bucket.expired == 0
+
+
+def test_unpack_can_id():
+    assert unpack_can_id(0x09F10DE5) == unpack_header(unhexlify("09F10DE5"))
+    assert unpack_can_id(0x09F10DE5) == (229, 127245, 2)
+
+
+def test_resolve_definition():
+    # Fusion (419), marine industry (4), message id 5
+    payload = (419 | 4 << 13 | 5 << 16).to_bytes(3, "little") + bytes(29)
+    variant = resolve_definition(130820, payload)
+    assert PGN_DEFINITIONS[130820][variant]["Id"] == "fusionTrack"
+
+    # Simnet (1857), marine industry (4), no message id in the definition
+    payload = (1857 | 4 << 13 | 0xFF << 16).to_bytes(3, "little") + bytes(5)
+    variant = resolve_definition(130820, payload)
+    assert PGN_DEFINITIONS[130820][variant]["Id"] == "simnetReprogramStatus"
+
+    # Unknown manufacturer
+    assert resolve_definition(130820, bytes(8)) is None
+
+    # PGNs with a single definition
+    assert resolve_definition(127488, bytes(8)) == 0
+    assert resolve_definition(372418338952, bytes(8)) is None
+
+
+def test_get_packet_decoder_resolves_definition():
+    assert get_packet_decoder(126208, bytes([2]) + bytes(7)).id == (
+        "nmeaAcknowledgeGroupFunction"
+    )
+    assert get_packet_decoder(126208, bytes([1]) + bytes(7)).id == (
+        "nmeaCommandGroupFunction"
+    )
+
+    # Without a payload, the last definition is used
+    assert get_packet_decoder(126208).id == PGN_DB[126208]["Id"]
+
+
+def test_unpack_fields_resolves_definition():
+    # Lowrance (140), marine industry (4), temperature source 1, 300.00 K
+    payload = (140 | 4 << 13 | 1 << 16 | 30000 << 24).to_bytes(8, "little")
+    fields = unpack_fields(65285, payload)
+    assert fields["temperatureSource"] == 1
+    assert fields["actualTemperature"] == pytest.approx(300.0)
+
+    # Airmar (135), marine industry (4), boot state 2
+    payload = (135 | 4 << 13 | 2 << 16).to_bytes(8, "little")
+    assert unpack_fields(65285, payload, compiled=True)["bootState"] == 2
+
+
+def test_compile_lookup():
+    decoder = get_packet_decoder(127489)
+
+    instance = decoder.lookups[decoder.field_index["instance"]]
+    assert instance[1] == "Dual Engine Starboard"
+    assert instance[200] == 200  # Unknown values are passed through
+
+    status = decoder.lookups[decoder.field_index["discreteStatus1"]]
+    assert status[0] == ()
+    assert status[0b101] == ("Check Engine", "Low Oil Pressure")
+
+    # Fields without lookup tables
+    assert decoder.field_index["oilPressure"] not in decoder.lookups
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_unpack_fields_lookups(compiled):
+    payload = bytes.fromhex("01DA2FFFFF01FFFF")
+    fields = unpack_fields(127488, payload, compiled=compiled, lookups=True)
+
+    assert fields["instance"] == "Dual Engine Starboard"
+    assert fields["speed"] == unpack_fields(127488, payload)["speed"]
+
+    assert unpack_fields(127488, payload, lazy=True, lookups=True) == fields
+
+
+def test_unpack_fields_bitfield_lookups():
+    decoder = get_packet_decoder(127489)
+    raw = 0b1001 << decoder.bit_offsets[decoder.field_index["discreteStatus1"]]
+    payload = raw.to_bytes(decoder.length, "little")
+
+    fields = unpack_fields(127489, payload, lookups=True)
+    assert fields["discreteStatus1"] == ("Check Engine", "Low Oil Level")
+    assert fields["discreteStatus2"] == ()
+    assert unpack_fields(127489, payload, compiled=True, lookups=True) == fields
+
+
+def test_field_sentinel():
+    rpm = {"Units": "rpm", "Resolution": "0.25"}
+    assert field_sentinel({"BitLength": 16, "Signed": False, **rpm}) == 0xFFFD
+    assert field_sentinel({"BitLength": 16, "Signed": True, **rpm}) == 0x7FFD
+    assert field_sentinel({"BitLength": 2, "Signed": False, **rpm}) == 0b11
+    assert field_sentinel({"BitLength": 1, "Signed": False, **rpm}) == 2  # None
+    assert field_sentinel({"BitLength": 8, "Signed": False, "Type": "Bitfield"}) == 256
+    assert field_sentinel({"BitLength": 8, "Signed": False, "Type": "Integer"}) == 253
+
+    # Untyped fields without units or resolution, such as a SID, are not physical
+    assert field_sentinel({"BitLength": 8, "Signed": False}) == 256
+    assert field_sentinel({"BitLength": 8, "Signed": True, "Units": None}) == 256
+
+
+@pytest.mark.parametrize(
+    "compiled, lazy", [(False, False), (True, False), (False, True)]
+)
+def test_unpack_fields_sentinels(compiled, lazy):
+    # 127488 with "boostPressure" not available
+    payload = bytes.fromhex("01DA2FFFFF01FFFF")
+    fields = unpack_fields(127488, payload, compiled, lazy, sentinels=True)
+
+    assert fields["boostPressure"] is None
+    assert fields["speed"] == 3062.5
+
+    payload = bytes.fromhex("01DA2F100001FFFF")
+    fields = unpack_fields(127488, payload, compiled, lazy, sentinels=True)
+    assert fields["boostPressure"] == 16
+
+
+@pytest.mark.parametrize(
+    "compiled, lazy", [(False, False), (True, False), (False, True)]
+)
+def test_unpack_fields_sentinels_untyped_sid(compiled, lazy):
+    # 127250 "Vessel Heading" starts with an untyped SID, which is not a sentinel
+    payload = bytes.fromhex("FF000000FF7FFFFF")
+    fields = unpack_fields(127250, payload, compiled, lazy, sentinels=True)
+
+    assert fields["sid"] == 255
+
+
+def test_custom_pgn_definition():
+    # A copy of the rudder definition under a PGN number of its own
+    definition = dict(PGN_DB[127245], PGN=130900, Id="customRudder")
+    can_id = 0x09FF540A
+    payload = bytes.fromhex("FF000000FF7FFFFF")
+    parser = NMEA2000Parser(compiled=True)
+
+    PGN_DB[130900] = definition
+    try:
+        assert PGN_DEFINITIONS[130900] == [definition]
+        fields = parser.unpack_frame(can_id, payload)["Fields"]
+        assert fields == parser.unpack_frame(0x09F10D0A, payload)["Fields"]
+        assert pack_fields(130900, fields) == pack_fields(127245, fields)
+
+        # Replaced definitions are compiled again
+        PGN_DB[130900] = dict(definition, Fields=definition["Fields"][:1])
+        assert list(parser.unpack_frame(can_id, payload)["Fields"]) == ["instance"]
+        assert unpack_fields(130900, pack_fields(130900, {"instance": 1})) == {
+            "instance": 1
+        }
+    finally:
+        del PGN_DB[130900]
+
+    assert 130900 not in PGN_DEFINITIONS
+    with pytest.raises(PGNError):
+        parser.unpack_frame(can_id, payload)
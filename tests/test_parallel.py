@@ -0,0 +1,138 @@
+import os
+import pickle
+from pathlib import Path
+
+import pytest
+
+from marulc import NMEA0183Parser, NMEA2000Parser, parse_from_iterator
+from marulc.custom_parsers.MXPGN import MXPGNFormatter
+from marulc.encoder import NMEA2000Encoder
+from marulc.exceptions import ParseError, PGNError
+from marulc.parallel import parse_in_parallel, peek_shard_key
+
+THIS_DIR = Path(__file__).parent
+
+
+def read_log():
+    with (THIS_DIR / "nmea_test_log.txt").open() as f_handle:
+        return f_handle.readlines()
+
+
+def test_peek_shard_key():
+    assert peek_shard_key("09F200C9 00 57 30 FF FF 01 FF FF") == (127488 << 8) | 0xC9
+    assert peek_shard_key((0x09F200C9, b"", None)) == (127488 << 8) | 0xC9
+    assert peek_shard_key("$MXPGN,01F801,2801,C1FC77BA0000FFFF*2A") == ("01F801", "01")
+    assert peek_shard_key("$PCDIN,01F119,00000000,0F,2AAF00D1067414FF*59") == (
+        "01F119",
+        "0F",
+    )
+    assert peek_shard_key("\\s:1*00\\$YDGGA,110759.00,5741.1612,N") == "YDGGA"
+    assert peek_shard_key("muppet") is None
+
+
+def test_parse_error_pickle():
+    error = pickle.loads(pickle.dumps(PGNError("Cant decode", b"\x00")))
+    assert isinstance(error, PGNError)
+    assert error.args == (("Cant decode", b"\x00"),)
+
+
+def test_parse_in_parallel_matches_parse_from_iterator():
+    lines = read_log()
+    parser = NMEA0183Parser([MXPGNFormatter()])
+    expected = list(parse_from_iterator(parser, lines, quiet=True))
+
+    parser = NMEA0183Parser([MXPGNFormatter()])
+    messages = parse_in_parallel(
+        parser, lines, quiet=True, workers=3, batch_size=64, ordered=True
+    )
+    assert list(messages) == expected
+
+    messages = parse_in_parallel(parser, lines, quiet=True, workers=2, batch_size=50)
+    assert sorted(map(repr, messages)) == sorted(map(repr, expected))
+
+
+def test_parse_in_parallel_fast_packets():
+    encoder = NMEA2000Encoder()
+    sources = [
+        encoder.pack_many(
+            {
+                "PGN": 129029,
+                "SourceAddress": source_address,
+                "Fields": {"latitude": 57.0 + index},
+            }
+            for index in range(20)
+        )
+        for source_address in (1, 2, 3)
+    ]
+    # Interleave the frames of different sources
+    frames = [frame for batch in zip(*sources) for frame in batch]
+
+    expected = list(NMEA2000Parser().unpack_frames(frames, quiet=True))
+    messages = list(
+        parse_in_parallel(
+            NMEA2000Parser(), frames, quiet=True, workers=2, batch_size=7, ordered=True
+        )
+    )
+    assert len(messages) == 60
+    assert messages == expected
+
+
+def test_parse_in_parallel_raises():
+    lines = ["09F200C9 00 57 30 FF FF 01 FF FF", "09F0FFC9 00 00 00 00 00 00 00 00"]
+
+    with pytest.raises(ParseError):
+        list(parse_in_parallel(NMEA2000Parser(), lines, workers=2))
+
+    assert len(list(parse_in_parallel(NMEA2000Parser(), lines, True, workers=2))) == 1
+
+
+def test_parse_in_parallel_sparse_shard():
+    lines = read_log()
+    consumed = []
+
+    def source():
+        for line in lines:
+            consumed.append(line)
+            yield line
+
+    # A single frame of a shard of its own must not hold back all later outputs
+    parser = NMEA0183Parser([MXPGNFormatter()])
+    messages = parse_in_parallel(
+        parser,
+        source(),
+        quiet=True,
+        workers=2,
+        batch_size=16,
+        ordered=True,
+        shard_key=lambda line: line is lines[0] or line,
+        max_pending=64,
+    )
+    first = next(messages)
+    assert len(consumed) < len(lines) // 2
+
+    expected = list(parse_from_iterator(parser, lines, quiet=True))
+    assert [first, *messages] == expected
+
+
+class CrashingParser(NMEA2000Parser):
+    def unpack(self, frame):
+        os._exit(1)
+
+
+def test_parse_in_parallel_worker_crash():
+    lines = ["09F200C9 00 57 30 FF FF 01 FF FF"] * 100
+
+    with pytest.raises(RuntimeError):
+        list(
+            parse_in_parallel(
+                CrashingParser(), lines, workers=2, batch_size=1, shard_key=len
+            )
+        )
+
+
+def test_parse_in_parallel_single_worker():
+    lines = read_log()
+    parser = NMEA0183Parser([MXPGNFormatter()])
+    expected = list(parse_from_iterator(parser, lines, quiet=True))
+
+    assert list(parse_in_parallel(parser, lines, quiet=True, workers=1)) == expected
@@ -0,0 +1,132 @@
+import math
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from marulc import NMEA0183Parser, NMEA2000Parser, parse_from_iterator
+from marulc.batch import unpack_frames_to_columns
+from marulc.custom_parsers.MXPGN import MXPGNFormatter
+from marulc.sink import ColumnSink, NpzWriter, ParquetWriter, spec_field_ids
+
+THIS_DIR = Path(__file__).parent
+
+FRAMES = [
+    "09F10D0A FF 00 00 00 FF 7F FF FF",
+    "09F200B7 01 DA 2F FF FF 01 FF FF",
+    "09F200C9 00 57 30 FF FF 01 FF FF",
+    "09F10DE5 00 F8 FF 7F F9 FE FF FF",
+]
+
+
+def read_log():
+    with (THIS_DIR / "nmea_test_log.txt").open() as f_handle:
+        return f_handle.readlines()
+
+
+def test_column_sink_matches_batch_decoding():
+    sink = ColumnSink()
+    sink.extend(parse_from_iterator(NMEA2000Parser(), FRAMES))
+    tables = sink.flush()
+
+    expected = unpack_frames_to_columns(FRAMES)
+    assert tables.keys() == expected.keys()
+
+    for pgn, table in tables.items():
+        assert list(table["Fields"]) == spec_field_ids(pgn)
+        for key in ("Priority", "SourceAddress", "PGN"):
+            assert table[key].tolist() == expected[pgn][key].tolist()
+        for field_id, column in table["Fields"].items():
+            assert column.tolist() == expected[pgn]["Fields"][field_id].tolist()
+
+    # Everything was flushed
+    assert sink.rows(127488) == 0
+    assert not sink.flush()
+
+
+def test_column_sink_nmea0183():
+    sink = ColumnSink()
+    sink.extend(parse_from_iterator(NMEA0183Parser(), read_log(), quiet=True))
+    table = sink.flush()["YD", "GGA"]
+
+    assert table["Fields"]["lat"].dtype == np.float64
+    assert table["Fields"]["num_sats"].dtype == np.int64
+    assert table["Fields"]["lat_dir"].dtype == object
+    assert set(table["Fields"]["lat_dir"]) == {"N"}
+
+    # Empty data elements are missing values
+    assert np.isnan(table["Fields"]["age_gps_data"]).all()
+    assert set(table["Talker"]) == {"YD"}
+
+
+def test_column_sink_widens_columns():
+    sink = ColumnSink()
+    for value in (1, 2.5, None, "text"):
+        sink.append({"Fields": {"value": value}, "Talker": "XX", "Formatter": "YYY"})
+
+    column = sink.flush()["XX", "YYY"]["Fields"]["value"]
+    assert column.dtype == object
+    assert column[:2].tolist() == [1, 2.5]
+    assert math.isnan(column[2])
+    assert column[3] == "text"
+
+
+def test_column_sink_adds_columns():
+    sink = ColumnSink()
+    sink.append({"Fields": {"a": 1}, "Talker": "XX", "Formatter": "YYY"})
+    sink.append(
+        {"Fields": {"b": 2}, "Talker": "XX", "Formatter": "YYY", "Timestamp": 1.5}
+    )
+    sink.append({"Fields": {"a": 3}, "Talker": "XX", "Formatter": "YYY"})
+
+    table = sink.flush()["XX", "YYY"]
+    assert table["Talker"].tolist() == ["XX"] * 3
+    np.testing.assert_array_equal(table["Timestamp"], [math.nan, 1.5, math.nan])
+    np.testing.assert_array_equal(table["Fields"]["a"], [1, math.nan, 3])
+    np.testing.assert_array_equal(table["Fields"]["b"], [math.nan, 2, math.nan])
+
+
+def test_column_sink_chunks(tmp_path):
+    lines = read_log()
+    parser = NMEA0183Parser([MXPGNFormatter()])
+    expected = [
+        msg["Fields"]["speed"]
+        for msg in parse_from_iterator(parser, lines, quiet=True)
+        if msg.get("PGN") == 127488
+    ]
+
+    flushed = []
+    with ColumnSink(chunk_size=100, on_flush=NpzWriter(tmp_path)) as sink:
+        sink.extend(parse_from_iterator(parser, lines, quiet=True))
+        assert sink.rows(127488) < 100
+
+    files = sorted(tmp_path.glob("127488-*.npz"))
+    assert len(files) == math.ceil(len(expected) / 100)
+
+    for path in files:
+        with np.load(path) as chunk:
+            assert chunk["Talker"].dtype.kind == "U"
+            flushed.extend(chunk["Fields/speed"].tolist())
+
+    assert flushed == expected
+
+
+def test_column_sink_requires_callback_for_chunks():
+    with pytest.raises(ValueError):
+        ColumnSink(chunk_size=10)
+
+
+def test_parquet_writer(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    with ColumnSink(chunk_size=2, on_flush=ParquetWriter(tmp_path)) as sink:
+        sink.extend(parse_from_iterator(NMEA2000Parser(), FRAMES))
+
+    expected = [
+        msg["Fields"]["speed"]
+        for msg in parse_from_iterator(NMEA2000Parser(), FRAMES)
+        if msg["PGN"] == 127488
+    ]
+    table = pq.read_table(tmp_path / "127488-00000.parquet")
+    assert table.column("Fields/speed").to_pylist() == expected
@@ -1,3 +1,4 @@
+import struct
 from pathlib import Path
 
 import pytest
@@ -8,8 +9,20 @@ from marulc import (
     unpack_nmea0183_message,
     NMEA2000Parser,
 )
-from marulc.exceptions import MultiPacketInProcessError, ParseError
+from marulc.exceptions import (
+    FilteredMessageError,
+    MultiPacketInProcessError,
+    ParseError,
+)
 from marulc.utils import filter_on_talker_formatter, filter_on_pgn, deep_get
+from marulc.nmea2000 import (
+    FastPacketBucket,
+    FrameFilter,
+    MessageUnpacker,
+    read_can_frames,
+    read_candump_log,
+    unpack_fields,
+)
 from marulc.custom_parsers.MXPGN import MXPGNFormatter
 from marulc.custom_parsers.PCDIN import PCDINFormatter
 
@@ -119,3 +132,229 @@ def test_unpack_N2K_multi_frame_message(pinned):
     full_message = parser.unpack(multi_packet_message[3])
 
     assert full_message == pinned
+
+
+def test_parse_from_iterator_compiled():
+    parser = NMEA0183Parser([MXPGNFormatter(), PCDINFormatter()])
+    compiled_parser = NMEA0183Parser(
+        [MXPGNFormatter(compiled=True), PCDINFormatter(compiled=True)]
+    )
+
+    with (THIS_DIR / "nmea_test_log.txt").open() as f_handle:
+        lines = f_handle.readlines()
+
+    assert list(parse_from_iterator(compiled_parser, lines)) == list(
+        parse_from_iterator(parser, lines)
+    )
+
+
+def test_unpack_N2K_binary_frame():
+    parser = NMEA2000Parser()
+
+    assert parser.unpack_frame(
+        0x09F10D0A, bytes.fromhex("FF000000FF7FFFFF")
+    ) == parser.unpack("09F10D0A FF 00 00 00 FF 7F FF FF")
+
+    with pytest.raises(ParseError):
+        parser.unpack_frame(0x09F25600, bytes(8))
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_unpack_N2K_memoryview_frame(compiled):
+    parser = NMEA2000Parser(compiled=compiled)
+    buffer = bytearray.fromhex("09F10D0AFF000000FF7FFFFF")
+
+    msg = parser.unpack_frame(0x09F10D0A, memoryview(buffer)[4:])
+    assert msg == parser.unpack("09F10D0A FF 00 00 00 FF 7F FF FF")
+    assert unpack_fields(127245, memoryview(buffer)[4:], compiled) == msg["Fields"]
+
+
+def test_unpack_N2K_can_frame_buffer():
+    frames = [
+        "09F201B7 C01A01FFFFFFFFB0",
+        "09F201B7 C1813C050000B0BA",
+        "09F201B7 C21C00FFFFFFFFFF",
+        "09F201B7 C3000000007F7FFF",
+        "09F10D0A FF000000FF7FFFFF",
+    ]
+
+    buffer = b""
+    for frame in frames:
+        header, data = frame.split()
+        data = bytes.fromhex(data)
+        buffer += struct.pack("=IB3x8s", int(header, 16) | 0x80000000, len(data), data)
+
+    # Standard (11-bit) frame, should be skipped
+    buffer += struct.pack("=IB3x8s", 0x123, 8, bytes(8))
+    # Trailing, incomplete record
+    buffer += b"\x00" * 5
+
+    assert [can_id for can_id, _, _ in read_can_frames(buffer)] == [
+        0x09F201B7,
+        0x09F201B7,
+        0x09F201B7,
+        0x09F201B7,
+        0x09F10D0A,
+    ]
+
+    assert list(NMEA2000Parser().unpack_frames(read_can_frames(buffer))) == list(
+        parse_from_iterator(NMEA2000Parser(), frames)
+    )
+
+
+def test_unpack_N2K_candump_log():
+    log = [
+        "(1436509052.249713) can0 09F201B7#C01A01FFFFFFFFB0",
+        "(1436509052.250713) can0 09F201B7#C1813C050000B0BA",
+        "(1436509052.251713)  can0  09F201B7   [8]  C2 1C 00 FF FF FF FF FF",
+        "  can0  09F201B7   [8]  C3 00 00 00 00 7F 7F FF",
+        "(1436509052.252713) can0 123#DEADBEEF",
+        "(1436509052.253713) can0 09F201B7#R",
+        "(1436509052.254713)  can0  09F201B7   [0]  remote request",
+        "",
+    ]
+
+    frames = list(read_candump_log(log))
+    assert len(frames) == 4
+    assert frames[0] == (
+        0x09F201B7,
+        bytes.fromhex("C01A01FFFFFFFFB0"),
+        1436509052.249713,
+    )
+    assert frames[3][2] is None
+
+    messages = list(NMEA2000Parser().unpack_frames(frames))
+    assert len(messages) == 1
+    assert messages[0]["PGN"] == 127489
+
+
+def test_unpack_N2K_candump_log_malformed():
+    log = [
+        "(1436509052.249713) can0 09F201B7#C01A01FFFFFFFFB0",
+        "(1436509052.250713) can0 09F201B7#C1813C050000B0B",
+        "(1436509052.250813) can0 09F201ZZ#C1813C050000B0BA",
+        "(1436509052.250913)  can0  09F201B7   [8]  C1 81 3C 05 00 00 B0 XY",
+        "(1436509052.2510",
+        "(1436509052.251713) can0 09F10D0A#FF000000FF7FFFFF",
+    ]
+
+    with pytest.raises(ParseError):
+        list(read_candump_log(log))
+
+    frames = list(read_candump_log(log, quiet=True))
+    assert [can_id for can_id, _, _ in frames] == [0x09F201B7, 0x09F10D0A]
+
+    messages = list(NMEA2000Parser().unpack_frames(frames, quiet=True))
+    assert [msg["PGN"] for msg in messages] == [127245]
+
+
+def test_unpack_N2K_proprietary_message():
+    parser = NMEA2000Parser()
+
+    # Airmar (135) and Lowrance (140) share PGN 65285
+    airmar = parser.unpack_frame(
+        0x08FF0523, (135 | 4 << 13 | 2 << 16).to_bytes(8, "little")
+    )
+    lowrance = parser.unpack_frame(
+        0x08FF0523, (140 | 4 << 13 | 1 << 16 | 30000 << 24).to_bytes(8, "little")
+    )
+
+    assert "bootState" in airmar["Fields"]
+    assert "actualTemperature" in lowrance["Fields"]
+
+    # Known PGN but unknown manufacturer
+    with pytest.raises(ParseError):
+        parser.unpack_frame(0x08FF0523, bytes(8))
+
+
+def test_parser_options_keyword_only():
+    with pytest.raises(TypeError):
+        NMEA2000Parser(False, None, False, FrameFilter())
+    with pytest.raises(TypeError):
+        MXPGNFormatter(False, False, None, False, FrameFilter())
+    with pytest.raises(TypeError):
+        PCDINFormatter(False, False, FrameFilter())
+
+
+def test_message_unpacker():
+    unpacker = MessageUnpacker(frame_filter=FrameFilter(source_addresses=[10]))
+
+    decoder = unpacker.decoder(127245, 10, None)
+    msg = unpacker.unpack(decoder, 10, bytes.fromhex("FF000000FF7FFFFF"), None)
+    assert msg["Fields"]["instance"] == 0
+
+    with pytest.raises(FilteredMessageError):
+        unpacker.decoder(127245, 11, None)
+
+    # Without a bucket, payloads of fast packet PGNs are complete messages
+    bucket = FastPacketBucket()
+    parser = NMEA2000Parser(bucket=bucket)
+    frames = [
+        "09F201B7 C0 1A 01 FF FF FF FF B0",
+        "09F201B7 C1 FF FF FF FF FF FF FF",
+        "09F201B7 C2 FF FF FF FF FF FF FF",
+        "09F201B7 C3 FF FF FF FF FF FF 7F",
+    ]
+    expected = list(parse_from_iterator(parser, frames))[0]
+    payload = bytes.fromhex("01FFFFFFFFB0" + "FF" * 20)
+
+    decoder = MessageUnpacker().decoder(127489, 0xB7, None)
+    assert MessageUnpacker().unpack(decoder, 0xB7, payload, None) == {
+        "Fields": expected["Fields"]
+    }
+
+
+def test_unpack_N2K_frame_filter():
+    bucket = FastPacketBucket()
+    parser = NMEA2000Parser(
+        bucket=bucket, frame_filter=FrameFilter(exclude_pgns=[127489])
+    )
+
+    # Fast packets that are filtered out never reach the bucket
+    with pytest.raises(FilteredMessageError):
+        parser.unpack("09F201B7 C01A01FFFFFFFFB0")
+    assert not bucket
+
+    parser = NMEA2000Parser(
+        frame_filter=FrameFilter(pgns=[127245], source_addresses=[10])
+    )
+    assert parser.unpack("09F10D0A FF 00 00 00 FF 7F FF FF")["PGN"] == 127245
+    with pytest.raises(FilteredMessageError):
+        parser.unpack("09F10DE5 00 F8 FF 7F F9 FE FF FF")
+    with pytest.raises(FilteredMessageError):
+        parser.unpack_frame(0x09F200B7, bytes.fromhex("01DA2FFFFF01FFFF"))
+
+    # Filtered frames are silently skipped when unpacking in bulk
+    frames = [
+        "09F10D0A FF 00 00 00 FF 7F FF FF",
+        "09F10DE5 00 F8 FF 7F F9 FE FF FF",
+        "09F200B7 01 DA 2F FF FF 01 FF FF",
+    ]
+    assert len(list(parse_from_iterator(parser, frames))) == 1
+
+
+def test_parse_from_iterator_frame_filter():
+    parser = NMEA0183Parser([MXPGNFormatter(frame_filter=FrameFilter(pgns=[127488]))])
+
+    with (THIS_DIR / "nmea_test_log.txt").open() as f_handle:
+        lines = f_handle.readlines()
+
+    expected = list(
+        filter(
+            filter_on_pgn(127488),
+            parse_from_iterator(NMEA0183Parser([MXPGNFormatter()]), lines, quiet=True),
+        )
+    )
+    filtered = [
+        msg for msg in parse_from_iterator(parser, lines, quiet=True) if "PGN" in msg
+    ]
+
+    assert filtered == expected
+
+    parser = NMEA0183Parser(
+        [PCDINFormatter(frame_filter=FrameFilter(source_addresses=[0x37]))]
+    )
+    with pytest.raises(FilteredMessageError):
+        parser.unpack(
+            "$PCDIN,01F201,001935D5,38,0000000B0C477CBC0C0000FFFFFFFFFFFF30007F000000000000*26"
+        )